@@ -13,6 +13,7 @@ from rest_framework.authtoken.models import Token
 
 from ralph.admin.autocomplete import AutocompleteTooltipMixin
 from ralph.lib.mixins.models import AdminAbsoluteUrlMixin, NamedMixin
+from ralph.lib.permissions.cache import get_permissions_digest
 from ralph.lib.permissions.models import (
     PermByFieldMixin,
     PermissionsForObjectMixin,
@@ -180,8 +181,7 @@ class RalphUser(
         Property used in template as a param to cache invalidation.
         Hash for caching is calculated from user ID and its permissions.
         """
-        perms_set = frozenset(self.get_all_permissions())
-        key = ':'.join((str(self.id), str(hash(perms_set))))
+        key = ':'.join((str(self.id), get_permissions_digest(self)))
         return hashlib.md5(force_bytes(key)).hexdigest()
 
 
@@ -1,7 +1,7 @@
 import inspect
 import logging
 import operator
-from functools import reduce
+from functools import lru_cache, reduce
 
 from django.contrib.contenttypes.models import ContentType
 from django.core.exceptions import FieldDoesNotExist
@@ -184,37 +184,45 @@ class LookupFilterBackend(BaseFilterBackend):
             is not empty if lookup for field is valid. Result is empty when
             field path is not valid or lookup for field is not valid.
         """
-        result = {}
-        logger.debug('Validating {}__{} lookup for model {}; value: {}'.format(
+        logger.debug(
+            'Validating %s__%s lookup for model %s; value: %s',
             model_field_name, lookup, model, value
-        ))
+        )
+        if lookup not in self._get_field_lookups(model, model_field_name):
+            return {}
+        if lookup == 'isnull':
+            if value not in BOOL_VALUES:
+                logger.debug('Unknown value for isnull filter: %s', value)
+                return {}
+            value = BOOL_VALUES[value]
+        return {'{}__{}'.format(model_field_name, lookup): value}
+
+    @classmethod
+    @lru_cache(maxsize=None)
+    def _get_field_lookups(cls, model, model_field_name):
+        """
+        Return set of lookups available for field of the model (empty when
+        field path is not valid).
+
+        Result depends only on model and field path, so it's calculated once
+        (on first use) for every model (viewset) and field path.
+        """
         try:
             model_field = get_field_by_relation_path(
                 model, model_field_name
             )
         except FieldDoesNotExist:
-            logger.debug(
-                '{} not found for model {}'.format(model_field_name, model)
-            )
-        else:
-            field_lookups = set()
-            # process every class from which field is inheriting
-            for cl in inspect.getmro(model_field.__class__):
-                field_lookups |= self.field_type_lookups.get(cl, set())
-            logger.debug('Available lookups for {}.{} : {}'.format(
-                model, model_field_name, field_lookups
-            ))
-            if lookup in field_lookups:
-                if lookup == 'isnull':
-                    if value not in BOOL_VALUES:
-                        logger.debug(
-                            'Unknown value for isnull filter: {}'.format(value)
-                        )
-                        return {}
-                    else:
-                        value = BOOL_VALUES[value]
-                result = {'{}__{}'.format(model_field_name, lookup): value}
-        return result
+            logger.debug('%s not found for model %s', model_field_name, model)
+            return frozenset()
+        field_lookups = set()
+        # process every class from which field is inheriting
+        for cl in inspect.getmro(model_field.__class__):
+            field_lookups |= cls.field_type_lookups.get(cl, set())
+        logger.debug(
+            'Available lookups for %s.%s : %s',
+            model, model_field_name, field_lookups
+        )
+        return frozenset(field_lookups)
 
     def _validate_query_lookups(
         self, model, request, filter_fields, extended_filter_fields
@@ -239,13 +247,12 @@ class LookupFilterBackend(BaseFilterBackend):
         result = []
         kw_result = {}
         logger.debug(
-            'Processing {} filters with filter fields={} and extended filter '
-            'fields={}'.format(model, filter_fields, extended_filter_fields)
+            'Processing %s filters with filter fields=%s and extended filter '
+            'fields=%s', model, filter_fields, extended_filter_fields
         )
+        filter_fields = set(filter_fields)
         for field_name, value in request.query_params.items():
-            logger.debug(
-                'Processing query param {}:{}'.format(field_name, value)
-            )
+            logger.debug('Processing query param %s:%s', field_name, value)
             model_field_name, _, lookup = field_name.rpartition('__')
 
             # try if this field search could be expanded to other fields
@@ -262,9 +269,10 @@ class LookupFilterBackend(BaseFilterBackend):
                     )
                 )
             if extended_filters:
-                logger.debug('Using {} extended filters for query {}:{}'.format(
+                logger.debug(
+                    'Using %s extended filters for query %s:%s',
                     extended_filters, field_name, value
-                ))
+                )
                 result.append(reduce(
                     operator.or_,
                     [models.Q(**{k: v}) for k, v in extended_filters.items()]
@@ -275,9 +283,10 @@ class LookupFilterBackend(BaseFilterBackend):
                 filters = self._validate_single_query_lookup(
                     model, model_field_name, lookup, value
                 )
-                logger.debug('Using {} filters for query {}:{}'.format(
+                logger.debug(
+                    'Using %s filters for query %s:%s',
                     filters, field_name, value
-                ))
+                )
                 kw_result.update(filters)
         return result, kw_result
 
@@ -299,23 +308,28 @@ class PolymorphicDescendantsFilterBackend(LookupFilterBackend):
     def _process_model(
         self, model, request, filter_fields, extended_filter_fields
     ):
-        ids = set()
-        is_lookup_used = False
+        """
+        Returns condition (for base model) matching objects of `model`
+        filtered by query lookups or None if none of the lookups applies to
+        the model.
+
+        Objects of the model are selected by subquery, so filtering is done
+        entirely by the database (without fetching ids).
+        """
         lookups, kw_lookups = self._validate_query_lookups(
             model, request, filter_fields, extended_filter_fields
         )
         if lookups or kw_lookups:
-            is_lookup_used = True
-            ids = set(model.objects.filter(
+            return models.Q(pk__in=model.objects.filter(
                 *lookups, **kw_lookups
-            ).values_list('pk', flat=True))
-        return ids, is_lookup_used
+            ).values('pk'))
+        return None
 
-    def _get_polymorphic_ids(
+    def _get_polymorphic_query(
         self, base_model, polymorphic_models, request, view
     ):
         """
-        Returns ids of polymorphic objects based on query filters.
+        Returns condition for polymorphic objects based on query filters.
 
         Args:
             base_model: (polymorphic) parent model
@@ -324,22 +338,17 @@ class PolymorphicDescendantsFilterBackend(LookupFilterBackend):
             request: current request
             view: current view
 
-        Returns: tuple (
-            * set of ids,
-            * True if at least one of the lookups was applied
-        )
+        Returns: Q object joining (by OR) conditions for every model or None
+            if none of the lookups was applied
         """
-        ids = set()
-        is_lookup_used = False
+        queries = []
 
         # process base model
         # used only with extended filters
-        model_ids, model_is_lookup_used = self._process_model(
+        queries.append(self._process_model(
             base_model, request, view.filter_fields,
             getattr(view, 'extended_filter_fields', {})
-        )
-        ids |= model_ids
-        is_lookup_used |= model_is_lookup_used
+        ))
         for model in polymorphic_models:
             filter_fields = []
             model_viewset = view._viewsets_registry.get(model)
@@ -351,24 +360,25 @@ class PolymorphicDescendantsFilterBackend(LookupFilterBackend):
                 # from django model admin
                 filter_fields = ralph_site._registry[model].search_fields
 
-            model_ids, model_is_lookup_used = self._process_model(
+            queries.append(self._process_model(
                 model, request, filter_fields, {}
-            )
-            ids |= model_ids
-            is_lookup_used |= model_is_lookup_used
-        return ids, is_lookup_used
+            ))
+        queries = [query for query in queries if query is not None]
+        if not queries:
+            return None
+        return reduce(operator.or_, queries)
 
     def filter_queryset(self, request, queryset, view):
         polymorphic_descendants = getattr(
             queryset.model, '_polymorphic_descendants', []
         )
         if polymorphic_descendants:
-            ids, is_lookup_used = self._get_polymorphic_ids(
+            query = self._get_polymorphic_query(
                 queryset.model, polymorphic_descendants, request, view
             )
-            if is_lookup_used:
+            if query is not None:
                 logger.debug(
                     'Applying PolymorphicDescendantsFilterBackend filters'
                 )
-                queryset = queryset.filter(pk__in=list(ids))
+                queryset = queryset.filter(query)
         return queryset
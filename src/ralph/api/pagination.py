@@ -0,0 +1,295 @@
+# -*- coding: utf-8 -*-
+import datetime
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections import OrderedDict
+
+from django.contrib.admin.utils import NotRelationField
+from django.core.exceptions import FieldDoesNotExist
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+from django.utils.encoding import force_bytes, force_text
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import LimitOffsetPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from ralph.admin.helpers import get_field_by_relation_path
+from ralph.api.filters import TRUE_VALUES
+
+
+class CursorJSONEncoder(DjangoJSONEncoder):
+    """
+    Keep full precision of datetime values (`DjangoJSONEncoder` truncates
+    microseconds), otherwise cursor would point before the last object.
+    """
+    def default(self, o):
+        if isinstance(o, (datetime.datetime, datetime.time)):
+            return o.isoformat()
+        return super().default(o)
+
+
+def _validate_keyset_ordering_field(queryset, field_name):
+    if field_name in queryset.query.annotations:
+        return
+    try:
+        field = get_field_by_relation_path(queryset.model, field_name)
+    except (FieldDoesNotExist, NotRelationField):
+        field = None
+    if field is None or field.is_relation:
+        raise ValueError(field_name)
+
+
+def get_keyset_ordering(queryset):
+    """
+    Return ordering of the queryset (as list of fields names) with primary
+    key as the last field (to make it unique).
+
+    Raises `ValueError` (with the field as argument) when queryset is ordered
+    by something which could not be used in keyset condition (expression,
+    random ordering or relation).
+    """
+    model = queryset.model
+    ordering = list(queryset.query.order_by)
+    if not ordering and queryset.query.default_ordering:
+        ordering = list(model._meta.ordering)
+    result = []
+    for field in ordering:
+        if not isinstance(field, str) or field == '?':
+            raise ValueError(field)
+        field_name = field.lstrip('-')
+        if field_name in ('pk', model._meta.pk.name):
+            result.append(field.replace(field_name, 'pk'))
+            return result
+        _validate_keyset_ordering_field(queryset, field_name)
+        result.append(field)
+    result.append('pk')
+    return result
+
+
+def get_keyset_order_by(ordering):
+    """
+    Return ordering expressions with NULLs placed explicitly (first in
+    ascending and last in descending order - as `get_keyset_condition`
+    assumes), regardless of database default (ex. PostgreSQL sorts NULLs
+    last in ascending order).
+    """
+    return [
+        models.F(field[1:]).desc(nulls_last=True) if field.startswith('-')
+        else models.F(field).asc(nulls_first=True)
+        for field in ordering
+    ]
+
+
+def get_keyset_position(ordering, obj):
+    position = []
+    for field in ordering:
+        value = obj
+        for attr in field.lstrip('-').split('__'):
+            if value is None:
+                break
+            value = getattr(value, attr)
+        position.append(value)
+    return position
+
+
+def get_keyset_condition(ordering, position):
+    """
+    Return condition for objects placed after `position` for `ordering`:
+    `(f1 > v1) OR (f1 = v1 AND f2 > v2) OR ...`.
+    """
+    condition = models.Q(pk__in=[])
+    equal = models.Q()
+    for field, value in zip(ordering, position):
+        descending = field.startswith('-')
+        field_name = field.lstrip('-')
+        if value is None:
+            # NULLs are sorted first (see `get_keyset_order_by`)
+            if not descending:
+                condition |= equal & models.Q(
+                    **{'{}__isnull'.format(field_name): False}
+                )
+            equal &= models.Q(**{'{}__isnull'.format(field_name): True})
+        else:
+            after = models.Q(**{
+                '{}__{}'.format(
+                    field_name, 'lt' if descending else 'gt'
+                ): value
+            })
+            if descending:
+                after |= models.Q(
+                    **{'{}__isnull'.format(field_name): True}
+                )
+            condition |= equal & after
+            equal &= models.Q(**{field_name: value})
+    return condition
+
+
+class RalphPagination(LimitOffsetPagination):
+    """
+    Limit offset pagination with two opt-in (per request) extensions:
+
+    * keyset (cursor) pagination - enabled by passing `cursor` query param
+      (empty for the first page, ex. `?cursor=&limit=100`). Next and previous
+      links contain cursor pointing to the last (or first) object of the page,
+      so every page is fetched using `WHERE` condition on ordering fields
+      instead of scanning and discarding `OFFSET` rows. Ordering (including
+      `ordering` query param) is respected - primary key is always added as
+      the last ordering field to make it unique.
+    * skipping total count - enabled by passing `_skip_count=1` query param.
+      `count` in response is `null` then and next page existence is checked by
+      fetching one extra object.
+
+    Response has always the same shape (`count`, `next`, `previous`,
+    `results`).
+
+    NULL values are sorted first in ascending order (and last in descending
+    order) on every database (see `get_keyset_order_by`).
+    """
+    cursor_query_param = 'cursor'
+    skip_count_query_param = '_skip_count'
+
+    cursor = None
+    has_next = has_previous = False
+
+    def is_limit_offset_request(self, request):
+        """
+        Return True if regular limit offset pagination is used for request.
+        """
+        return not (
+            self.cursor_query_param in request.query_params or
+            self._should_skip_count(request)
+        )
+
+    def _should_skip_count(self, request):
+        return (
+            request.query_params.get(self.skip_count_query_param) in
+            TRUE_VALUES
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.is_limit_offset_request(request):
+            return super().paginate_queryset(queryset, request, view)
+        self.request = request
+        self.limit = self.get_limit(request)
+        if self.limit is None:
+            return None
+        self.count = (
+            None if self._should_skip_count(request)
+            else self.get_count(queryset)
+        )
+        if self.cursor_query_param in request.query_params:
+            return self._paginate_by_cursor(queryset, request)
+        self.offset = self.get_offset(request)
+        results = list(queryset[self.offset:self.offset + self.limit + 1])
+        self.has_next = len(results) > self.limit
+        return results[:self.limit]
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('count', self.count),
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data)
+        ]))
+
+    def get_next_link(self):
+        if self.cursor is not None:
+            return self._get_cursor_link(self.next_position, reverse=False)
+        if self.count is None:
+            if not self.has_next:
+                return None
+            url = self.request.build_absolute_uri()
+            url = replace_query_param(url, self.limit_query_param, self.limit)
+            return replace_query_param(
+                url, self.offset_query_param, self.offset + self.limit
+            )
+        return super().get_next_link()
+
+    def get_previous_link(self):
+        if self.cursor is not None:
+            return self._get_cursor_link(self.previous_position, reverse=True)
+        return super().get_previous_link()
+
+    # keyset (cursor) pagination
+
+    def _paginate_by_cursor(self, queryset, request):
+        self.cursor = self.decode_cursor(
+            request.query_params[self.cursor_query_param]
+        )
+        position = self.cursor.get('position')
+        reverse = self.cursor.get('reverse', False)
+        ordering = self.get_ordering(queryset)
+        if position is not None and len(position) != len(ordering):
+            raise NotFound('Invalid cursor')
+        query_ordering = ordering
+        if reverse:
+            query_ordering = [self._invert_ordering(f) for f in ordering]
+        queryset = queryset.order_by(*get_keyset_order_by(query_ordering))
+        if position is not None:
+            queryset = queryset.filter(
+                get_keyset_condition(query_ordering, position)
+            )
+        results = list(queryset[:self.limit + 1])
+        has_more = len(results) > self.limit
+        results = results[:self.limit]
+        if reverse:
+            results.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+        self.next_position = self.previous_position = None
+        if results and self.has_next:
+            self.next_position = get_keyset_position(ordering, results[-1])
+        if results and self.has_previous:
+            self.previous_position = get_keyset_position(ordering, results[0])
+        self.display_page_controls = False
+        return results
+
+    def get_ordering(self, queryset):
+        """
+        Return ordering of the queryset (as list of fields names) with
+        primary key as the last field.
+        """
+        try:
+            return get_keyset_ordering(queryset)
+        except ValueError as e:
+            raise ValidationError(
+                'Ordering by {} is not supported with cursor '
+                'pagination'.format(e)
+            )
+
+    def _invert_ordering(self, field):
+        return field[1:] if field.startswith('-') else '-' + field
+
+    def encode_cursor(self, position, reverse):
+        data = {'position': position}
+        if reverse:
+            data['reverse'] = True
+        return force_text(urlsafe_b64encode(force_bytes(
+            json.dumps(data, cls=CursorJSONEncoder, separators=(',', ':'))
+        )))
+
+    def decode_cursor(self, encoded):
+        if not encoded:
+            return {}
+        try:
+            cursor = json.loads(force_text(
+                urlsafe_b64decode(force_bytes(encoded))
+            ))
+        except (TypeError, ValueError):
+            raise NotFound('Invalid cursor')
+        if not isinstance(cursor, dict) or not isinstance(
+            cursor.get('position'), list
+        ):
+            raise NotFound('Invalid cursor')
+        return cursor
+
+    def _get_cursor_link(self, position, reverse):
+        if position is None:
+            return None
+        url = self.request.build_absolute_uri()
+        url = remove_query_param(url, self.offset_query_param)
+        return replace_query_param(
+            url, self.cursor_query_param, self.encode_cursor(position, reverse)
+        )
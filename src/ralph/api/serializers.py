@@ -1,7 +1,7 @@
 # -*- coding: utf-8 -*-
 import logging
 import operator
-from functools import reduce
+from functools import lru_cache, reduce
 
 from django.core.exceptions import ValidationError as DjangoValidationError
 from django.core.exceptions import NON_FIELD_ERRORS, ObjectDoesNotExist
@@ -13,6 +13,7 @@ from rest_framework.exceptions import \
     ValidationError as RestFrameworkValidationError
 from rest_framework.settings import api_settings
 from rest_framework.utils import model_meta
+from rest_framework.utils.field_mapping import get_nested_relation_kwargs
 from reversion import revisions as reversion
 from taggit_serializer.serializers import (
     TaggitSerializer,
@@ -165,30 +166,13 @@ class RalphAPISerializerMixin(
     def build_nested_field(self, field_name, relation_info, nested_depth):
         """
         Nested serializer is inheriting from `RalphAPISerializer`.
+
+        Serializer class is created once for every related model and depth.
         """
-        class NestedMeta:
-            model = relation_info.related_model
-            depth = nested_depth - 1
-            # don't register this serializer as main model serializer
-            exclude_from_registry = True
-            exclude = []
-
-        # exclude some fields from nested serializer
-        for field in NESTED_SERIALIZER_FIELDS_BLACKLIST:
-            try:
-                relation_info.related_model._meta.get_field(field)
-            except exceptions.FieldDoesNotExist:
-                pass
-            else:
-                NestedMeta.exclude.append(field)
-
-        class NestedSerializer(RalphAPISerializer):
-            Meta = NestedMeta
-
-        field_class, field_kwargs = super().build_nested_field(
-            field_name, relation_info, nested_depth
+        field_class = get_nested_serializer_class(
+            relation_info.related_model, nested_depth
         )
-        field_class = NestedSerializer
+        field_kwargs = get_nested_relation_kwargs(relation_info)
         return field_class, field_kwargs
 
 
@@ -305,3 +289,32 @@ class RalphAPISerializer(
     metaclass=RalphAPISerializerMetaclass
 ):
     pass
+
+
+@lru_cache(maxsize=None)
+def get_nested_serializer_class(model, nested_depth):
+    """
+    Return serializer (inheriting from `RalphAPISerializer`) used for nested
+    relation to `model`.
+    """
+    class NestedMeta:
+        model = None
+        depth = nested_depth - 1
+        # don't register this serializer as main model serializer
+        exclude_from_registry = True
+        exclude = []
+
+    NestedMeta.model = model
+    # exclude some fields from nested serializer
+    for field in NESTED_SERIALIZER_FIELDS_BLACKLIST:
+        try:
+            model._meta.get_field(field)
+        except exceptions.FieldDoesNotExist:
+            pass
+        else:
+            NestedMeta.exclude.append(field)
+
+    class NestedSerializer(RalphAPISerializer):
+        Meta = NestedMeta
+
+    return NestedSerializer
@@ -1,16 +1,22 @@
 # -*- coding: utf-8 -*-
 from datetime import date
 from decimal import Decimal
+from unittest.mock import patch
 from urllib.parse import urlencode
 
 from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection
 from django.http import QueryDict
+from django.test.utils import CaptureQueriesContext
 from rest_framework.test import APIClient, APIRequestFactory
 
+from ralph.admin.helpers import get_field_by_relation_path
 from ralph.api.filters import (
     ExtendedFiltersBackend,
     FALSE_VALUES,
     LookupFilterBackend,
+    PolymorphicDescendantsFilterBackend,
     TRUE_VALUES
 )
 from ralph.api.tests.api import (
@@ -19,8 +25,14 @@ from ralph.api.tests.api import (
     ManufacturerViewSet,
     TestManufacturer
 )
+from ralph.lib.polymorphic.tests.models import (
+    PolymorphicModelBaseTest,
+    PolymorphicModelTest,
+    PolymorphicModelTest2
+)
 from ralph.tests import RalphTestCase
 from ralph.tests.factories import TestManufacturerFactory
+from ralph.tests.mixins import BenchmarkMixin
 
 
 class TestExtendedFiltersBackend(RalphTestCase):
@@ -220,3 +232,150 @@ class TestLookupFilterBackend(RalphTestCase):
             self.assertEqual(len(self.lookup_filter.filter_queryset(
                 request, Bar.objects.all(), bvs)
             ), 3)
+
+
+class TestLookupFilterBackendCache(BenchmarkMixin, RalphTestCase):
+    iterations = 500
+    filters = {
+        'name__icontains': 'bar',
+        'name__startswith': 'B',
+        'date__gte': '2010-01-01',
+        'date__isnull': 'false',
+        'price__gte': 1,
+        'price__lte': 100,
+        'count__gt': 0,
+        'count__in': 1,
+        'unknown__startswith': 'x',
+        'name__range': 10,
+    }
+
+    def setUp(self):
+        super().setUp()
+        self.request_factory = APIRequestFactory()
+        self.request = self.request_factory.get('/api/bar')
+        self.request.query_params = QueryDict(urlencode(self.filters))
+        self.lookup_filter = LookupFilterBackend()
+        self.view = BarViewSet()
+        self.view.filter_fields = [
+            'name', 'date', 'price', 'count', 'unknown'
+        ]
+
+    def _validate(self):
+        return self.lookup_filter._validate_query_lookups(
+            Bar, self.request, self.view.filter_fields, {}
+        )
+
+    def test_field_lookups_are_resolved_once(self):
+        LookupFilterBackend._get_field_lookups.cache_clear()
+        with patch(
+            'ralph.api.filters.get_field_by_relation_path',
+            wraps=get_field_by_relation_path
+        ) as get_field_mock:
+            results = [self._validate() for _ in range(3)]
+        # once for every field path
+        self.assertEqual(get_field_mock.call_count, 5)
+        self.assertEqual(results[0], results[2])
+        _, kw_lookups = results[0]
+        self.assertCountEqual(kw_lookups.keys(), [
+            'name__icontains', 'name__startswith', 'date__gte',
+            'date__isnull', 'price__gte', 'price__lte', 'count__gt',
+            'count__in',
+        ])
+        self.assertIs(kw_lookups['date__isnull'], False)
+
+    def test_many_filters_benchmark(self):
+        with self.benchmark('lookups without cache', self.iterations):
+            for _ in range(self.iterations):
+                LookupFilterBackend._get_field_lookups.cache_clear()
+                uncached_result = self._validate()
+        with self.benchmark('lookups with cache', self.iterations):
+            for _ in range(self.iterations):
+                cached_result = self._validate()
+        self.assertEqual(cached_result, uncached_result)
+
+
+class _PolymorphicTestViewSet(object):
+    filter_fields = []
+    extended_filter_fields = {}
+
+
+class _PolymorphicModelTestViewSet(object):
+    filter_fields = ['name']
+
+
+class _PolymorphicDescendantViewSet(object):
+    filter_fields = ['id']
+
+
+class TestPolymorphicDescendantsFilterBackend(RalphTestCase):
+    objects_count = 100000
+
+    def setUp(self):
+        super().setUp()
+        self.request_factory = APIRequestFactory()
+        self.view = _PolymorphicTestViewSet()
+        self.view._viewsets_registry = {
+            model: _PolymorphicDescendantViewSet
+            for model in PolymorphicModelBaseTest._polymorphic_descendants
+        }
+        self.view._viewsets_registry[PolymorphicModelTest] = (
+            _PolymorphicModelTestViewSet
+        )
+        self.filter_backend = PolymorphicDescendantsFilterBackend()
+
+    def _create_objects(self, model, names):
+        """
+        Create (fast) many objects of polymorphic descendant `model`.
+        """
+        content_type = ContentType.objects.get_for_model(model)
+        PolymorphicModelBaseTest.objects.bulk_create(
+            (
+                PolymorphicModelBaseTest(name=name, content_type=content_type)
+                for name in names
+            ),
+            batch_size=10000
+        )
+        # descendant rows are inserted by single query (bulk_create is not
+        # supported for multi-table inheritance)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'INSERT INTO {child} ({ptr}) SELECT id FROM {base} '
+                'WHERE content_type_id = %s'.format(
+                    child=model._meta.db_table,
+                    ptr=model._meta.pk.column,
+                    base=PolymorphicModelBaseTest._meta.db_table,
+                ),
+                [content_type.pk]
+            )
+
+    def _filter(self, **params):
+        request = self.request_factory.get('/')
+        request.query_params = QueryDict(urlencode(params))
+        return self.filter_backend.filter_queryset(
+            request, PolymorphicModelBaseTest.polymorphic_objects.all(),
+            self.view
+        )
+
+    def test_filter_by_descendant_lookups(self):
+        self._create_objects(PolymorphicModelTest, ['abc', 'abd', 'xyz'])
+        self._create_objects(PolymorphicModelTest2, ['abe'])
+        queryset = self._filter(name__startswith='ab')
+        # name is not filter field of PolymorphicModelTest2
+        self.assertCountEqual(
+            [obj.name for obj in queryset], ['abc', 'abd']
+        )
+        self.assertEqual(self._filter().count(), 4)
+
+    def test_filter_is_single_query_without_ids_list(self):
+        self._create_objects(
+            PolymorphicModelTest,
+            ('host{}'.format(i) for i in range(self.objects_count))
+        )
+        with CaptureQueriesContext(connection) as queries:
+            queryset = self._filter(name__startswith='host')
+        # filtering is lazy
+        self.assertEqual(len(queries), 0)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(queryset.count(), self.objects_count)
+        self.assertEqual(len(queries), 1)
+        self.assertLess(len(queries[0]['sql']), 1000)
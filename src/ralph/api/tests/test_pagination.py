@@ -0,0 +1,226 @@
+# -*- coding: utf-8 -*-
+import datetime
+
+from ddt import data, ddt
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ralph.api.pagination import RalphPagination
+from ralph.api.tests._base import RalphAPITestCase
+from ralph.tests.mixins import BenchmarkMixin
+from ralph.tests.models import Bar, Car, Foo, TestManufacturer
+
+
+@ddt
+class RalphPaginationTestCase(RalphAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.foos = Foo.objects.bulk_create([
+            Foo(bar='bar{}'.format(i % 3)) for i in range(10)
+        ])
+        self.foos_url = reverse('test-ralph-api:foo-list')
+        self.bars_url = reverse('test-ralph-api:bar-list')
+
+    def _get(self, url, params=None):
+        response = self.client.get(url, params, format='json')
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.data
+
+    def _get_all_pages(self, url, params):
+        """
+        Follow next links and return ids from every page.
+        """
+        pages = []
+        data = self._get(url, params)
+        while True:
+            pages.append([item['id'] for item in data['results']])
+            if not data['next']:
+                return pages, data
+            data = self._get(data['next'])
+
+    def _get_ids(self, url, params):
+        # cursor pagination adds primary key to ordering
+        ordering = params.get('ordering')
+        params = dict(
+            params, limit=100,
+            ordering='{},id'.format(ordering) if ordering else 'id'
+        )
+        return [item['id'] for item in self._get(url, params)['results']]
+
+    @data(
+        {},
+        {'ordering': 'bar'},
+        {'ordering': '-bar'},
+        {'ordering': '-bar,-id'},
+        {'ordering': 'bar', 'bar__startswith': 'bar1'},
+    )
+    def test_cursor_pagination_returns_all_objects_in_order(self, params):
+        expected_ids = self._get_ids(self.foos_url, params)
+        pages, _ = self._get_all_pages(
+            self.foos_url, dict(params, cursor='', limit=3)
+        )
+        self.assertTrue(all(len(page) <= 3 for page in pages))
+        self.assertEqual(sum(pages, []), expected_ids)
+
+    def test_cursor_pagination_first_page_is_the_same_as_regular(self):
+        regular = self._get(self.foos_url, {'limit': 4})
+        data = self._get(self.foos_url, {'limit': 4, 'cursor': ''})
+        self.assertEqual(list(data.keys()), list(regular.keys()))
+        self.assertEqual(data['count'], 10)
+        self.assertEqual(data['results'], regular['results'])
+        self.assertIsNone(data['previous'])
+        self.assertIn('cursor=', data['next'])
+
+    def test_cursor_pagination_previous_links(self):
+        pages, data = self._get_all_pages(
+            self.foos_url, {'cursor': '', 'limit': 3, 'ordering': '-bar'}
+        )
+        previous_pages = []
+        while data['previous']:
+            data = self._get(data['previous'])
+            previous_pages.insert(
+                0, [item['id'] for item in data['results']]
+            )
+        self.assertEqual(previous_pages, pages[:-1])
+
+    def test_cursor_pagination_with_null_values(self):
+        Bar.objects.bulk_create([
+            Bar(name=str(i), date=None if i % 2 else datetime.date(2020, 1, i))
+            for i in range(1, 10)
+        ])
+        for ordering in ('date', '-date'):
+            expected_ids = self._get_ids(self.bars_url, {'ordering': ordering})
+            pages, _ = self._get_all_pages(
+                self.bars_url, {'cursor': '', 'limit': 2, 'ordering': ordering}
+            )
+            self.assertEqual(sum(pages, []), expected_ids)
+
+    def test_cursor_pagination_orders_nulls_explicitly(self):
+        # NULLs placement is database specific (ex. last in ascending order
+        # on PostgreSQL), so it has to match keyset condition explicitly
+        with CaptureQueriesContext(connection) as queries:
+            self._get(
+                self.bars_url, {'cursor': '', 'limit': 2, 'ordering': 'date'}
+            )
+        order_by = [
+            query['sql'].split('ORDER BY')[1] for query in queries
+            if 'ORDER BY' in query['sql']
+        ]
+        self.assertTrue(order_by)
+        self.assertTrue(all('NULL' in clause for clause in order_by))
+
+    def test_cursor_pagination_keeps_datetime_precision(self):
+        created = datetime.datetime(2020, 1, 1, 10, 0, 0, 123456)
+        for i in range(5):
+            bar = Bar.objects.create(name=str(i))
+            # the same second, different microseconds
+            Bar.objects.filter(pk=bar.pk).update(
+                created=created + datetime.timedelta(microseconds=i)
+            )
+        expected_ids = self._get_ids(self.bars_url, {'ordering': '-created'})
+        pages, _ = self._get_all_pages(
+            self.bars_url, {'cursor': '', 'limit': 1, 'ordering': '-created'}
+        )
+        self.assertEqual(sum(pages, []), expected_ids)
+
+    def test_skip_count_with_limit_offset(self):
+        data = self._get(
+            self.foos_url, {'limit': 4, 'offset': 4, '_skip_count': '1'}
+        )
+        self.assertIsNone(data['count'])
+        self.assertEqual(len(data['results']), 4)
+        self.assertIn('offset=8', data['next'])
+        data = self._get(data['next'])
+        self.assertEqual(len(data['results']), 2)
+        self.assertIsNone(data['next'])
+        self.assertIn('offset=4', data['previous'])
+
+    def test_skip_count_with_cursor(self):
+        data = self._get(
+            self.foos_url, {'limit': 5, 'cursor': '', '_skip_count': '1'}
+        )
+        self.assertIsNone(data['count'])
+        data = self._get(data['next'])
+        self.assertEqual(len(data['results']), 5)
+        self.assertIsNone(data['next'])
+
+    def test_count_is_not_fetched_when_skipped(self):
+        with CaptureQueriesContext(connection) as queries:
+            self._get(
+                self.foos_url, {'limit': 5, 'cursor': '', '_skip_count': '1'}
+            )
+        self.assertFalse(any(
+            'COUNT(' in query['sql'].upper()
+            for query in queries.captured_queries
+        ))
+
+    def test_invalid_cursor(self):
+        # cursor with more values than ordering fields
+        wrong_position = RalphPagination().encode_cursor([1, 2, 3], False)
+        for cursor in ('abc', wrong_position):
+            response = self.client.get(
+                self.foos_url, {'cursor': cursor}, format='json'
+            )
+            self.assertEqual(response.status_code, 404)
+
+    def test_ordering_by_relation_is_not_supported(self):
+        Car.objects.create(
+            name='car', year=2015,
+            manufacturer=TestManufacturer.objects.create(name='m', country='c')
+        )
+        response = self.client.get(
+            reverse('test-ralph-api:car-list'),
+            {'cursor': '', 'ordering': 'manufacturer'},
+            format='json'
+        )
+        self.assertEqual(response.status_code, 400)
+
+
+class RalphPaginationBenchmarkTestCase(BenchmarkMixin, RalphAPITestCase):
+    objects_count = 10000
+    limit = 10
+    page = 1000
+
+    def setUp(self):
+        super().setUp()
+        Foo.objects.bulk_create(
+            (Foo(bar='bar{}'.format(i)) for i in range(self.objects_count)),
+            batch_size=5000
+        )
+        self.url = reverse('test-ralph-api:foo-list')
+
+    def _get_page(self, name, params):
+        with CaptureQueriesContext(connection) as queries:
+            with self.benchmark(name):
+                response = self.client.get(self.url, params, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), self.limit)
+        return response.data, [q['sql'].upper() for q in queries]
+
+    def test_first_and_last_page(self):
+        offset = (self.page - 1) * self.limit
+        self._get_page('limit offset page 1', {'limit': self.limit})
+        offset_data, _ = self._get_page(
+            'limit offset page {}'.format(self.page),
+            {'limit': self.limit, 'offset': offset}
+        )
+        self._get_page(
+            'cursor page 1',
+            {'limit': self.limit, 'cursor': '', '_skip_count': '1'}
+        )
+        # cursor pointing at the last object of the previous page
+        last_pk = Foo.objects.order_by('pk').values_list(
+            'pk', flat=True
+        )[offset - 1]
+        cursor_data, queries = self._get_page(
+            'cursor page {}'.format(self.page), {
+                'limit': self.limit, '_skip_count': '1',
+                'cursor': RalphPagination().encode_cursor([last_pk], False),
+            }
+        )
+        self.assertEqual(cursor_data['results'], offset_data['results'])
+        foo_queries = [q for q in queries if 'TESTS_FOO' in q]
+        self.assertTrue(foo_queries)
+        self.assertFalse(any('OFFSET' in q for q in foo_queries))
+        self.assertFalse(any('COUNT(' in q for q in foo_queries))
@@ -8,11 +8,19 @@ from reversion.models import Version
 
 from ralph.accounts.tests.factories import RegionFactory
 from ralph.api.relations import RalphHyperlinkedRelatedField, RalphRelatedField
+from ralph.api.serializers import get_nested_serializer_class
 from ralph.api.tests._base import RalphAPITestCase
-from ralph.api.tests.api import CarSerializer, CarSerializer2, FooSerializer
+from ralph.api.tests.api import (
+    CarSerializer,
+    CarSerializer2,
+    CarViewSet,
+    FooSerializer
+)
+from ralph.api.viewsets import get_save_serializer_class
 from ralph.back_office.tests.factories import BackOfficeAssetFactory
 from ralph.licences.models import BaseObjectLicence
 from ralph.licences.tests.factories import LicenceFactory
+from ralph.tests.mixins import BenchmarkMixin
 from ralph.tests.models import Car, Foo, TestManufacturer
 
 
@@ -94,6 +102,21 @@ class TestRalphSerializer(RalphAPITestCase):
         self.assertIs(fields['year'].context['request'], request)
         self.assertIs(fields['manufacturer'].context['request'], request)
 
+    def test_nested_serializer_class_is_reused(self):
+        request = self.request_factory.get('/api/cars')
+        nested_classes = {
+            type(
+                CarSerializer(
+                    instance=self.car, context={'request': request}
+                ).fields['manufacturer']
+            )
+            for _ in range(3)
+        }
+        self.assertEqual(len(nested_classes), 1)
+        nested_class = nested_classes.pop()
+        self.assertEqual(nested_class.Meta.model, TestManufacturer)
+        self.assertEqual(nested_class.Meta.depth, 0)
+
     def test_reversion_history_save(self):
         response = self.client.post(
             '/test-ralph-api/foos/', data={'bar': 'bar_name'}
@@ -129,3 +152,45 @@ class TestRalphSerializer(RalphAPITestCase):
         self.assertIn(
             '"licence": {}'.format(licence.id), history[0].serialized_data
         )
+
+
+class TestSerializerClassesBenchmark(BenchmarkMixin, RalphAPITestCase):
+    iterations = 200
+
+    def setUp(self):
+        super().setUp()
+        self.request_factory = APIRequestFactory()
+        self.car = Car(
+            manufacturer=TestManufacturer(name='Tesla', country='USA'),
+            name='S', year=2012
+        )
+
+    def _build_serializers(self):
+        """
+        Build serializers as in single GET and single POST request.
+        """
+        get_request = self.request_factory.get('/api/cars')
+        CarSerializer(
+            instance=self.car, context={'request': get_request}
+        ).fields
+        viewset = CarViewSet()
+        viewset.request = self.request_factory.post('/api/cars')
+        serializer_class = viewset.get_serializer_class()
+        serializer_class(instance=self.car, context={'request': None}).fields
+        return serializer_class
+
+    def _clear_caches(self):
+        get_save_serializer_class.cache_clear()
+        get_nested_serializer_class.cache_clear()
+
+    def test_serializers_building(self):
+        with self.benchmark('serializers without cache', self.iterations):
+            for _ in range(self.iterations):
+                self._clear_caches()
+                self._build_serializers()
+        with self.benchmark('serializers with cache', self.iterations):
+            classes = {
+                self._build_serializers() for _ in range(self.iterations)
+            }
+        self.assertEqual(len(classes), 1)
+        self.assertEqual(get_save_serializer_class.cache_info().currsize, 1)
@@ -1,22 +1,35 @@
 # -*- coding: utf-8 -*-
+import hashlib
+import json
+import tracemalloc
 from datetime import date
 from decimal import Decimal
+from unittest.mock import patch
 
+from ddt import data, ddt, unpack
 from django.contrib.auth import get_user_model
+from django.db import connection
+from django.db.models.functions import Length
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
 from rest_framework import relations
 from rest_framework.test import APIClient, APIRequestFactory
 
 from ralph.api.serializers import ReversedChoiceField
+from ralph.api.tests._base import RalphAPITestCase
 from ralph.api.tests.api import (
     Car,
     CarSerializer,
     CarViewSet,
+    FooViewSet,
     ManufacturerSerializer2,
     ManufacturerViewSet
 )
 from ralph.api.viewsets import RalphAPIViewSet
 from ralph.tests import RalphTestCase
 from ralph.tests.factories import TestManufacturerFactory
+from ralph.tests.models import Foo
 
 
 class ViewsetWithoutRalphPermission(RalphAPIViewSet):
@@ -73,6 +86,15 @@ class TestRalphViewset(RalphTestCase):
             relations.PrimaryKeyRelatedField
         )
 
+    def test_get_serializer_class_should_reuse_dynamic_class(self):
+        classes = []
+        for method in ('post', 'put', 'patch'):
+            cvs = CarViewSet()
+            cvs.request = getattr(self.request_factory, method)('/')
+            classes.append(cvs.get_serializer_class())
+        self.assertEqual(len(set(classes)), 1)
+        self.assertEqual(classes[0].Meta.model, Car)
+
     def test_get_serializer_class_should_return_defined_when_not_safe_request_and_save_serializer_class_defined(self):  # noqa
         request = self.request_factory.patch('/')
         mvs = ManufacturerViewSet()
@@ -93,3 +115,159 @@ class TestAdminSearchFieldsMixin(RalphTestCase):
             cvs.filter_fields,
             ['manufacturer__name', 'name', 'foos__bar', 'year']
         )
+
+
+@ddt
+@override_settings(API_STREAMING_CHUNK_SIZE=3)
+class TestStreamingList(RalphAPITestCase):
+    def setUp(self):
+        super().setUp()
+        Foo.objects.bulk_create([
+            Foo(bar='bar{}'.format(i)) for i in range(10)
+        ])
+        self.url = reverse('test-ralph-api:foo-list')
+
+    def _get_streamed_content(self, response):
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content)
+
+    @data(
+        {},
+        {'limit': 4},
+        {'limit': 6, 'offset': 3},
+        {'limit': 3, 'offset': 8},
+        {'limit': 5, 'offset': 20},
+        {'limit': 100},
+        {'bar': 'bar3'},
+        {'ordering': '-bar', 'limit': 7},
+        {'bar__startswith': 'bar1', 'limit': 1},
+    )
+    def test_streamed_response_should_be_the_same_as_regular(self, params):
+        response = self.client.get(self.url, params, format='json')
+        streamed_response = self.client.get(
+            self.url, dict(params, _stream='1'), format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(streamed_response.status_code, 200)
+        self.assertEqual(
+            streamed_response['Content-Type'], response['Content-Type']
+        )
+        self.assertEqual(
+            self._get_streamed_content(streamed_response), response.content
+        )
+
+    def test_streamed_response_without_pagination(self):
+        with patch.object(FooViewSet, 'pagination_class', None):
+            response = self.client.get(self.url, format='json')
+            streamed_response = self.client.get(
+                self.url, {'_stream': '1'}, format='json'
+            )
+        self.assertEqual(
+            self._get_streamed_content(streamed_response), response.content
+        )
+
+    def test_regular_response_when_streaming_not_requested(self):
+        response = self.client.get(self.url, {'_stream': '0'}, format='json')
+        self.assertFalse(response.streaming)
+
+    def test_regular_response_when_not_json_requested(self):
+        response = self.client.get(self.url, {'_stream': '1', 'format': 'api'})
+        self.assertFalse(response.streaming)
+
+    def test_regular_response_when_indent_requested(self):
+        response = self.client.get(
+            self.url, {'_stream': '1'},
+            HTTP_ACCEPT='application/json; indent=4'
+        )
+        self.assertFalse(response.streaming)
+
+    def test_objects_are_fetched_in_chunks(self):
+        with self.assertNumQueries(4):
+            # 4 chunks of (at most) 3 objects
+            chunks = list(FooViewSet()._get_chunks(
+                Foo.objects.order_by('pk'), 0, None
+            ))
+        self.assertEqual([len(chunk) for chunk in chunks], [3, 3, 3, 1])
+
+    def test_objects_with_the_same_ordering_value_are_streamed_once(self):
+        # objects with the same `bar` span chunk boundaries
+        Foo.objects.update(bar='bar')
+        response = self.client.get(
+            self.url, {'ordering': 'bar', '_stream': '1'}, format='json'
+        )
+        content = json.loads(self._get_streamed_content(response).decode())
+        self.assertEqual(
+            [foo['id'] for foo in content['results']],
+            list(Foo.objects.order_by('pk').values_list('pk', flat=True))
+        )
+
+    @data(
+        (0, None, 10),
+        (2, 9, 7),
+    )
+    @unpack
+    def test_chunks_are_fetched_by_keyset(self, start, stop, count):
+        Foo.objects.update(bar='bar')
+        with CaptureQueriesContext(connection) as queries:
+            chunks = list(FooViewSet()._get_chunks(
+                Foo.objects.order_by('-bar'), start, stop
+            ))
+        objects = [foo for chunk in chunks for foo in chunk]
+        self.assertEqual(
+            objects, list(Foo.objects.order_by('pk')[start:stop])
+        )
+        self.assertEqual(len(objects), count)
+        # only the first chunk uses (requested) offset
+        for query in queries.captured_queries[1:]:
+            self.assertNotIn('OFFSET', query['sql'].upper())
+
+    def test_chunks_with_unsupported_ordering_are_ordered_by_pk(self):
+        Foo.objects.update(bar='bar')
+        queryset = Foo.objects.annotate(
+            bar_length=Length('bar')
+        ).order_by(Length('bar'))
+        chunks = list(FooViewSet()._get_chunks(queryset, 0, None))
+        self.assertEqual(
+            [foo.pk for chunk in chunks for foo in chunk],
+            list(Foo.objects.order_by('pk').values_list('pk', flat=True))
+        )
+
+
+class TestStreamingListMemory(RalphAPITestCase):
+    objects_count = 50000
+    memory_ceiling = 16 * 1024 * 1024
+
+    def setUp(self):
+        super().setUp()
+        Foo.objects.bulk_create(
+            (Foo(bar='bar{}'.format(i)) for i in range(self.objects_count)),
+            batch_size=5000
+        )
+        self.url = reverse('test-ralph-api:foo-list')
+
+    def _get(self, params):
+        """
+        Return digest of the response content and peak memory allocated
+        during request (and content consumption).
+        """
+        content_hash = hashlib.md5()
+        tracemalloc.start()
+        try:
+            response = self.client.get(self.url, params, format='json')
+            if response.streaming:
+                for part in response.streaming_content:
+                    content_hash.update(part)
+            else:
+                content_hash.update(response.content)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        return content_hash.hexdigest(), peak
+
+    def test_streamed_response_memory_usage_is_bounded(self):
+        params = {'limit': self.objects_count}
+        regular_hash, regular_peak = self._get(params)
+        streamed_hash, streamed_peak = self._get(dict(params, _stream='1'))
+        self.assertEqual(streamed_hash, regular_hash)
+        self.assertLess(streamed_peak, self.memory_ceiling)
+        self.assertLess(streamed_peak, regular_peak)
@@ -1,9 +1,14 @@
 # -*- coding: utf-8 -*-
 import inspect
+from functools import lru_cache
 
+from django.conf import settings
 from django.contrib.admin import SimpleListFilter
+from django.http import StreamingHttpResponse
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters, permissions, relations, viewsets
+from rest_framework.pagination import LimitOffsetPagination
+from rest_framework.renderers import JSONRenderer
 
 from ralph.admin.sites import ralph_site
 from ralph.api.filters import (
@@ -12,7 +17,15 @@ from ralph.api.filters import (
     ImportedIdFilterBackend,
     LookupFilterBackend,
     PolymorphicDescendantsFilterBackend,
-    TagsFilterBackend
+    TagsFilterBackend,
+    TRUE_VALUES
+)
+from ralph.api.pagination import (
+    get_keyset_condition,
+    get_keyset_order_by,
+    get_keyset_ordering,
+    get_keyset_position,
+    RalphPagination
 )
 from ralph.api.serializers import RalphAPISaveSerializer, ReversedChoiceField
 from ralph.api.utils import QuerysetRelatedMixin
@@ -60,7 +73,135 @@ class AdminSearchFieldsMixin(object):
         setattr(self, 'filter_fields', filter_fields)
 
 
-class RalphAPIViewSetMixin(QuerysetRelatedMixin, AdminSearchFieldsMixin):
+class StreamingListMixin(object):
+    """
+    Allow to stream JSON response of list endpoint (opt-in, by passing
+    `_stream=1` in query params).
+
+    Objects are fetched, serialized and rendered in chunks of
+    `API_STREAMING_CHUNK_SIZE` objects, so memory usage doesn't depend on
+    the number of returned objects (ex. `?limit=5000`). Streamed response has
+    exactly the same content (including pagination metadata) as the regular
+    one.
+
+    Streaming is supported only for (not indented) JSON responses and
+    regular limit offset pagination - in other cases (ex. cursor pagination)
+    regular response is returned.
+    """
+    stream_query_param = '_stream'
+
+    def list(self, request, *args, **kwargs):
+        if self._should_stream(request):
+            return self._stream_list(request)
+        return super().list(request, *args, **kwargs)
+
+    def _should_stream(self, request):
+        value = request.query_params.get(self.stream_query_param)
+        if value not in TRUE_VALUES:
+            return False
+        renderer = request.accepted_renderer
+        if not isinstance(renderer, JSONRenderer) or renderer.get_indent(
+            request.accepted_media_type, self.get_renderer_context()
+        ):
+            return False
+        paginator = self.paginator
+        if isinstance(paginator, RalphPagination):
+            return paginator.is_limit_offset_request(request)
+        return paginator is None or isinstance(
+            paginator, LimitOffsetPagination
+        )
+
+    def _stream_list(self, request):
+        queryset = self.filter_queryset(self.get_queryset())
+        renderer = request.accepted_renderer
+        renderer_context = self.get_renderer_context()
+
+        def render(data):
+            return renderer.render(
+                data, request.accepted_media_type, renderer_context
+            )
+
+        paginator = self.paginator
+        limit = paginator.get_limit(request) if paginator else None
+        if limit is None:
+            start, stop = 0, None
+            envelope = render([])
+        else:
+            # set the same state as `paginate_queryset` to generate links
+            paginator.limit = limit
+            paginator.count = paginator.get_count(queryset)
+            paginator.offset = paginator.get_offset(request)
+            paginator.request = request
+            start, stop = paginator.offset, paginator.offset + limit
+            envelope = render(paginator.get_paginated_response([]).data)
+        # results are the last element of the envelope (`[]` or
+        # `{..., "results": []}`) - objects are streamed between brackets
+        results_index = envelope.rindex(b'[]') + 1
+        separator = b',' if renderer.compact else b', '
+
+        def stream():
+            yield envelope[:results_index]
+            for index, chunk in enumerate(
+                self._get_chunks(queryset, start, stop)
+            ):
+                serializer = self.get_serializer(chunk, many=True)
+                rendered = separator.join(
+                    render(item) for item in serializer.data
+                )
+                yield separator + rendered if index else rendered
+            yield envelope[results_index:]
+
+        return StreamingHttpResponse(
+            stream(), content_type=renderer.media_type
+        )
+
+    def _get_chunks(self, queryset, start, stop):
+        """
+        Yield objects of queryset (from `start` to `stop`) in chunks of
+        `settings.API_STREAMING_CHUNK_SIZE`.
+
+        Primary key is added to the ordering to make it unique (otherwise
+        objects with the same value of ordering field could be returned in
+        different order by every query and duplicated or skipped between
+        chunks). Every chunk (except the first one) is fetched using keyset
+        condition (objects after the last one of the previous chunk) - when
+        queryset ordering doesn't allow it, `OFFSET` is used instead.
+        """
+        chunk_size = settings.API_STREAMING_CHUNK_SIZE
+        try:
+            ordering = get_keyset_ordering(queryset)
+        except ValueError:
+            ordering = None
+        if ordering is None:
+            fields = list(queryset.query.order_by)
+            if not fields and queryset.query.default_ordering:
+                fields = list(queryset.model._meta.ordering)
+            queryset = queryset.order_by(*fields, 'pk')
+        else:
+            queryset = queryset.order_by(*get_keyset_order_by(ordering))
+        chunk_queryset = queryset
+        while stop is None or start < stop:
+            end = start + chunk_size
+            if stop is not None:
+                end = min(end, stop)
+            chunk = list(chunk_queryset[start:end])
+            if chunk:
+                yield chunk
+            if len(chunk) < end - start:
+                break
+            if ordering is None:
+                start = end
+                continue
+            # next chunk starts right after the last object
+            chunk_queryset = queryset.filter(get_keyset_condition(
+                ordering, get_keyset_position(ordering, chunk[-1])
+            ))
+            start, stop = 0, None if stop is None else stop - end
+
+
+class RalphAPIViewSetMixin(
+    StreamingListMixin, QuerysetRelatedMixin, AdminSearchFieldsMixin
+):
     """
     Ralph API default viewset. Provides object-level permissions checking and
     model permissions checking (using Django-admin permissions).
@@ -108,25 +249,35 @@ class RalphAPIViewSetMixin(QuerysetRelatedMixin, AdminSearchFieldsMixin):
         if self.request.method not in permissions.SAFE_METHODS:
             if self.save_serializer_class:
                 return self.save_serializer_class
-
-            # create default class for save (POST, PUT etc.) serialization
-            # where every related field is serialized by it's primary key
-            class Meta(base_serializer.Meta):
-                model = self.queryset.model
-                depth = 0
-
-            return type(
-                '{}SaveSerializer'.format(Meta.model.__name__),
-                (RalphAPISaveSerializer,),
-                {
-                    'Meta': Meta,
-                    'serializer_choice_field': ReversedChoiceField,
-                    'serializer_related_field': relations.PrimaryKeyRelatedField
-                }
+            return get_save_serializer_class(
+                base_serializer, self.queryset.model
             )
         return base_serializer
 
 
+@lru_cache(maxsize=None)
+def get_save_serializer_class(base_serializer, model):
+    """
+    Create default class for save (POST, PUT etc.) serialization where every
+    related field is serialized by it's primary key.
+
+    Class is created once for every base serializer and model.
+    """
+    class Meta(base_serializer.Meta):
+        depth = 0
+
+    Meta.model = model
+    return type(
+        '{}SaveSerializer'.format(model.__name__),
+        (RalphAPISaveSerializer,),
+        {
+            'Meta': Meta,
+            'serializer_choice_field': ReversedChoiceField,
+            'serializer_related_field': relations.PrimaryKeyRelatedField
+        }
+    )
+
+
 _viewsets_registry = {}
 
 
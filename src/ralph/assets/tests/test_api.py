@@ -2,6 +2,8 @@
 from urllib.parse import urlencode
 
 from ddt import data, ddt, unpack
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework import status
 
@@ -47,6 +49,7 @@ from ralph.data_center.tests.factories import (
 from ralph.domains.models import Domain
 from ralph.domains.tests.factories import DomainFactory
 from ralph.lib.custom_fields.models import CustomField
+from ralph.lib.polymorphic.models import MAX_TABLES_PER_QUERY
 from ralph.licences.models import Licence
 from ralph.licences.tests.factories import LicenceFactory
 from ralph.networks.tests.factories import IPAddressFactory
@@ -622,6 +625,18 @@ class BaseObjectAPITests(RalphAPITestCase):
         ]
         self.assertCountEqual(barcodes, set(['12345', '12543']))
 
+    def test_get_base_objects_list_streamed(self):
+        url = reverse('baseobject-list')
+        response = self.client.get(url, format='json')
+        with self.settings(API_STREAMING_CHUNK_SIZE=1):
+            streamed_response = self.client.get(
+                url, {'_stream': '1'}, format='json'
+            )
+        self.assertTrue(streamed_response.streaming)
+        self.assertEqual(
+            b''.join(streamed_response.streaming_content), response.content
+        )
+
     def test_get_base_objects_list_different_type_with_custom_fields(self):
         CustomField.objects.create(name='test_field')
         self.dc_asset.update_custom_field('test_field', 'abc')
@@ -863,6 +878,21 @@ class BaseObjectAPITests(RalphAPITestCase):
                 )
         self.assertEqual(count, len(BASE_OBJECTS_FACTORIES))
 
+    def test_get_base_objects_list_joined_tables_are_limited(self):
+        for factory in BASE_OBJECTS_FACTORIES.values():
+            factory()
+        url = '{}?{}'.format(reverse('baseobject-list'), urlencode(
+            {'limit': 100}
+        ))
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        for query in queries.captured_queries:
+            tables_count = query['sql'].upper().count(' JOIN ') + 1
+            # MySQL refuses to join more than 61 tables in a single query
+            self.assertLessEqual(tables_count, MAX_TABLES_PER_QUERY)
+            self.assertLess(tables_count, 61)
+
     def test_filter_by_configurationclass_path(self):
         url = '{}?{}'.format(
             reverse('baseobject-list'), urlencode(
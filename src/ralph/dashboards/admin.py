@@ -100,7 +100,7 @@ class GraphAdmin(RalphAdmin):
         return readonly_fields
 
     def get_preview(self, obj):
-        return obj.render(name='preview')
+        return obj.render(name='preview', refresh=True)
 
     get_preview.short_description = _('Graph')
 
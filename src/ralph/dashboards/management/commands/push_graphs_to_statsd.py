@@ -1,9 +1,12 @@
 # -*- coding: utf-8 -*-
 import logging
 import textwrap
+import time
+from concurrent.futures import ThreadPoolExecutor
 
 from django.conf import settings
 from django.core.management.base import BaseCommand
+from django.db import connection
 from django.utils.text import slugify
 
 from ralph.dashboards.models import Graph
@@ -17,16 +20,71 @@ def normalize(s):
     return s.replace('-', '_')
 
 
+def get_graph_data(graph):
+    """
+    Return `(graph, data, elapsed time)` (data is None when graph could not
+    be computed).
+    """
+    start = time.perf_counter()
+    try:
+        data = graph.get_data()
+    except Exception:
+        logger.exception('Error while computing graph %s', graph.name)
+        data = None
+    return graph, data, time.perf_counter() - start
+
+
+def _get_graph_data_in_thread(graph):
+    try:
+        return get_graph_data(graph)
+    finally:
+        # every thread uses its own database connection
+        connection.close()
+
+
 class Command(BaseCommand):
     """Push to statsd data generated by graphs."""
     help = textwrap.dedent(__doc__).strip()
 
-    def handle(self, *args, **kwargs):
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=settings.STATSD_GRAPHS_WORKERS,
+            help='Number of graphs computed concurrently.',
+        )
+
+    def iter_graphs_data(self, graphs, workers):
+        if workers <= 1:
+            return map(get_graph_data, graphs)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(_get_graph_data_in_thread, graphs))
+
+    def handle(self, *args, **options):
         statsd = build_statsd_client(prefix=settings.STATSD_GRAPHS_PREFIX)
-        graphs = Graph.objects.filter(push_to_statsd=True)
-        for graph in graphs:
-            graph_data = graph.get_data()
-            graph_name = normalize(graph.name)
-            for label, value in zip(graph_data['labels'], graph_data['series']):
-                path = '.'.join((graph_name, normalize(label)))
-                statsd.gauge(path, value)
+        graphs = list(Graph.objects.filter(push_to_statsd=True))
+        start = time.perf_counter()
+        # metrics are sent in batches (as many as fit in single packet)
+        with statsd.pipeline() as pipe:
+            for graph, graph_data, elapsed in self.iter_graphs_data(
+                graphs, options['workers']
+            ):
+                logger.info(
+                    'Graph %s computed in %.3fs', graph.name, elapsed
+                )
+                if options['verbosity'] > 1:
+                    self.stdout.write(
+                        '{}: {:.3f}s'.format(graph.name, elapsed)
+                    )
+                if graph_data is None:
+                    continue
+                graph_name = normalize(graph.name)
+                for label, value in zip(
+                    graph_data['labels'], graph_data['series']
+                ):
+                    path = '.'.join((graph_name, normalize(label)))
+                    pipe.gauge(path, value)
+        logger.info(
+            '%d graphs pushed to statsd in %.3fs',
+            len(graphs), time.perf_counter() - start
+        )
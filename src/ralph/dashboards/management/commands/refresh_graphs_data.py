@@ -0,0 +1,23 @@
+# -*- coding: utf-8 -*-
+import logging
+import textwrap
+
+from django.core.management.base import BaseCommand
+
+from ralph.dashboards.models import Graph
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    """Compute and store data of active graphs (run it periodically)."""
+    help = textwrap.dedent(__doc__).strip()
+
+    def handle(self, *args, **kwargs):
+        for graph in Graph.objects.filter(active=True):
+            try:
+                graph.refresh_data()
+            except Exception:
+                logger.exception(
+                    'Error while refreshing data of graph %s', graph.name
+                )
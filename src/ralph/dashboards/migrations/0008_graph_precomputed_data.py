@@ -0,0 +1,24 @@
+# Generated by Django 2.0.13 on 2026-10-17 12:00
+
+from django.db import migrations, models
+import django_extensions.db.fields.json
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboards', '0007_auto_20240723_1148'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='graph',
+            name='precomputed_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='graph',
+            name='precomputed_data',
+            field=django_extensions.db.fields.json.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
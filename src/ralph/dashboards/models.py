@@ -1,10 +1,14 @@
+import copy
+from datetime import timedelta
 from functools import partial
 
 from dj.choices import Choices
+from django.conf import settings
 from django.contrib.contenttypes.models import ContentType
 from django.db import connection, models
 from django.db.models import Case, Count, IntegerField, Max, Q, Sum, Value, When
 from django.db.models.functions import Coalesce
+from django.utils import timezone
 from django_extensions.db.fields.json import JSONField
 
 from ralph.dashboards.filter_parser import FilterParser
@@ -195,6 +199,17 @@ class Graph(AdminAbsoluteUrlMixin, NamedMixin, TimeStampMixin, models.Model):
         default=False,
         help_text='Push graph\'s data to statsd.'
     )
+    # data computed periodically by `refresh_graphs_data` command
+    precomputed_data = JSONField(blank=True, editable=False)
+    precomputed_at = models.DateTimeField(
+        null=True, blank=True, editable=False
+    )
+
+    def save(self, *args, **kwargs):
+        # precomputed data is not valid after change of graph's params
+        self.precomputed_data = {}
+        self.precomputed_at = None
+        super().save(*args, **kwargs)
 
     @property
     def changelist_model(self):
@@ -333,12 +348,43 @@ class Graph(AdminAbsoluteUrlMixin, NamedMixin, TimeStampMixin, models.Model):
             'series': [int(q['series']) for q in queryset],
         }
 
-    def render(self, **context):
+    def refresh_data(self):
+        """
+        Compute data of the graph and store it with time of computation.
+        """
+        self.precomputed_data = self.get_data()
+        self.precomputed_at = timezone.now()
+        # graph itself is not modified (`save` would drop stored data)
+        Graph.objects.filter(pk=self.pk).update(
+            precomputed_data=self.precomputed_data,
+            precomputed_at=self.precomputed_at,
+        )
+        return self.precomputed_data
+
+    @property
+    def is_precomputed_data_fresh(self):
+        return self.precomputed_at is not None and (
+            timezone.now() - self.precomputed_at <=
+            timedelta(seconds=settings.GRAPH_DATA_MAX_AGE)
+        )
+
+    def get_precomputed_data(self, refresh=False):
+        """
+        Return stored data of the graph. Data is computed live (and stored)
+        when it's missing, older than `GRAPH_DATA_MAX_AGE` seconds or when
+        `refresh` is True.
+        """
+        if refresh or not self.is_precomputed_data_fresh:
+            self.refresh_data()
+        # renderers modify data in place
+        return copy.deepcopy(self.precomputed_data)
+
+    def render(self, refresh=False, **context):
         chart_type = ChartType.from_id(self.chart_type)
         renderer = getattr(chart_type, 'renderer', None)
         if not renderer:
             raise RuntimeError('Wrong renderer.')
-        return renderer(self).render(context)
+        return renderer(self).render(context, refresh=refresh)
 
     def get_queryset_for_filter(self, queryset, filters):
         filter_key = self.changelist_filter_key
@@ -126,13 +126,13 @@ class ChartistGraphRenderer(object):
             logger.error(e)
         return data
 
-    def render(self, context):
+    def render(self, context, refresh=False):
         if not context:
             context = {}
         error = None
         data = {}
         try:
-            data = self.obj.get_data()
+            data = self.obj.get_precomputed_data(refresh=refresh)
             data = self.post_data_hook(data)
         except Exception as e:
             error = str(e)
@@ -0,0 +1,126 @@
+import socket
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.test import override_settings, TestCase, TransactionTestCase
+
+from ralph.dashboards.models import AggregateType
+from ralph.dashboards.tests.factories import GraphFactory
+from ralph.data_center.tests.factories import DataCenterAssetFullFactory
+from ralph.lib.metrics import build_statsd_client
+from ralph.tests.mixins import BenchmarkMixin
+
+
+class StatsdCollector(object):
+    """
+    Collect metrics sent to statsd (over UDP) on local port.
+    """
+    def __init__(self):
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.socket.bind(('127.0.0.1', 0))
+        self.socket.settimeout(0.5)
+        self.port = self.socket.getsockname()[1]
+
+    def build_client(self, **kwargs):
+        return build_statsd_client(host='127.0.0.1', port=self.port, **kwargs)
+
+    def receive(self):
+        """
+        Return list of received packets (as lists of metrics).
+        """
+        packets = []
+        while True:
+            try:
+                packet = self.socket.recv(65535)
+            except socket.timeout:
+                return packets
+            packets.append(packet.decode().split('\n'))
+
+    def close(self):
+        self.socket.close()
+
+
+@override_settings(STATSD_GRAPHS_PREFIX='ralph.graphs')
+class PushGraphsToStatsdMixin(BenchmarkMixin):
+    graphs_count = 36
+    services = ['ServiceA', 'ServiceB', 'ServiceC']
+
+    def setUp(self):
+        super().setUp()
+        for i, service in enumerate(self.services, start=1):
+            DataCenterAssetFullFactory.create_batch(
+                i, service_env__service__name=service,
+            )
+        self.graphs = GraphFactory.create_batch(
+            self.graphs_count,
+            push_to_statsd=True,
+            aggregate_type=AggregateType.aggregate_count.id,
+            params={
+                'series': 'id',
+                'labels': 'service_env__service__name',
+            },
+        )
+        GraphFactory(
+            push_to_statsd=False,
+            aggregate_type=AggregateType.aggregate_count.id,
+            params={'series': 'id', 'labels': 'hostname'},
+        )
+        self.collector = StatsdCollector()
+        self.addCleanup(self.collector.close)
+        patcher = patch(
+            'ralph.dashboards.management.commands.push_graphs_to_statsd.'
+            'build_statsd_client',
+            side_effect=self.collector.build_client
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def get_expected_metrics(self):
+        return sorted(
+            'ralph.graphs.graph_{}.{}:{}|g'.format(
+                graph.name.split()[-1], service.lower(), i
+            )
+            for graph in self.graphs
+            for i, service in enumerate(self.services, start=1)
+        )
+
+    def _push(self, workers):
+        stdout = StringIO()
+        with self.benchmark(
+            'push {} graphs with {} workers'.format(
+                self.graphs_count, workers
+            ),
+            operations=self.graphs_count
+        ):
+            call_command(
+                'push_graphs_to_statsd', workers=workers, verbosity=2,
+                stdout=stdout
+            )
+        packets = self.collector.receive()
+        metrics = sorted(sum(packets, []))
+        self.assertEqual(metrics, self.get_expected_metrics())
+        # metrics are sent in batches
+        self.assertLess(len(packets), len(metrics))
+        # time of every graph is reported
+        self.assertEqual(
+            len(stdout.getvalue().splitlines()), self.graphs_count
+        )
+
+
+class PushGraphsToStatsdTestCase(PushGraphsToStatsdMixin, TestCase):
+    def test_push_graphs(self):
+        self._push(workers=1)
+
+    def test_graph_with_error_is_skipped(self):
+        broken_graph = self.graphs.pop()
+        broken_graph.params = {'series': 'id', 'labels': 'not_existing'}
+        broken_graph.save()
+        self._push(workers=1)
+
+
+class PushGraphsToStatsdConcurrentlyTestCase(
+    PushGraphsToStatsdMixin, TransactionTestCase
+):
+    def test_push_graphs(self):
+        self._push(workers=8)
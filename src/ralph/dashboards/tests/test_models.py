@@ -1,10 +1,13 @@
+import datetime
+
 from django.contrib.contenttypes.models import ContentType
-from django.test import TestCase
+from django.core.management import call_command
+from django.test import override_settings, TestCase
 
 from ralph.assets.models import ServiceEnvironment
 from ralph.assets.tests.factories import ServiceEnvironmentFactory
 from ralph.configuration_management.models import SCMCheckResult
-from ralph.dashboards.models import AggregateType
+from ralph.dashboards.models import AggregateType, Graph
 from ralph.dashboards.tests.factories import GraphFactory
 from ralph.data_center.models import DataCenterAsset
 from ralph.data_center.tests.factories import DataCenterAssetFullFactory
@@ -127,3 +130,83 @@ class GraphQuerysetForFilterTestCase(TestCase):
             )),
             [('ServiceA', False)] * 3
         )
+
+
+@override_settings(GRAPH_DATA_MAX_AGE=60)
+class GraphPrecomputedDataTestCase(TestCase):
+    def setUp(self):
+        DataCenterAssetFullFactory.create_batch(
+            2, service_env__service__name='ServiceA',
+        )
+        self.graph = GraphFactory(
+            aggregate_type=AggregateType.aggregate_count.id,
+            params={
+                'series': 'id',
+                'labels': 'service_env__service__name',
+            },
+        )
+
+    def _add_asset(self):
+        DataCenterAssetFullFactory(service_env__service__name='ServiceB')
+
+    def test_data_is_stored_when_missing(self):
+        self.assertIsNone(self.graph.precomputed_at)
+        data = self.graph.get_precomputed_data()
+        self.assertEqual(data, {'labels': ['ServiceA'], 'series': [2]})
+        graph = Graph.objects.get(pk=self.graph.pk)
+        self.assertEqual(graph.precomputed_data, data)
+        self.assertIsNotNone(graph.precomputed_at)
+
+    def test_stored_data_is_used_when_fresh(self):
+        self.graph.refresh_data()
+        self._add_asset()
+        graph = Graph.objects.get(pk=self.graph.pk)
+        with self.assertNumQueries(0):
+            data = graph.get_precomputed_data()
+        self.assertEqual(data, {'labels': ['ServiceA'], 'series': [2]})
+
+    def test_stale_data_is_computed_again(self):
+        self.graph.refresh_data()
+        self._add_asset()
+        Graph.objects.filter(pk=self.graph.pk).update(
+            precomputed_at=datetime.datetime.now() - datetime.timedelta(
+                seconds=61
+            )
+        )
+        graph = Graph.objects.get(pk=self.graph.pk)
+        self.assertEqual(graph.get_precomputed_data()['series'], [2, 1])
+
+    def test_refresh_computes_data_live(self):
+        self.graph.refresh_data()
+        self._add_asset()
+        graph = Graph.objects.get(pk=self.graph.pk)
+        self.assertEqual(
+            graph.get_precomputed_data(refresh=True)['series'], [2, 1]
+        )
+        self.assertEqual(
+            Graph.objects.get(pk=self.graph.pk).precomputed_data['series'],
+            [2, 1]
+        )
+
+    def test_stored_data_is_dropped_when_graph_is_changed(self):
+        self.graph.refresh_data()
+        self.graph.params['labels'] = 'hostname'
+        self.graph.save()
+        graph = Graph.objects.get(pk=self.graph.pk)
+        self.assertIsNone(graph.precomputed_at)
+        self.assertEqual(graph.precomputed_data, {})
+
+    def test_refresh_graphs_data_command(self):
+        inactive_graph = GraphFactory(
+            active=False,
+            aggregate_type=AggregateType.aggregate_count.id,
+            params={'series': 'id', 'labels': 'hostname'},
+        )
+        call_command('refresh_graphs_data')
+        self.assertEqual(
+            Graph.objects.get(pk=self.graph.pk).precomputed_data,
+            {'labels': ['ServiceA'], 'series': [2]}
+        )
+        self.assertIsNone(
+            Graph.objects.get(pk=inactive_graph.pk).precomputed_at
+        )
@@ -0,0 +1,60 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ralph.dashboards.models import AggregateType, Graph
+from ralph.dashboards.tests.factories import DashboardFactory, GraphFactory
+from ralph.data_center.models import DataCenterAsset
+from ralph.data_center.tests.factories import DataCenterAssetFullFactory
+from ralph.tests.mixins import BenchmarkMixin
+
+
+class DashboardViewTestCase(BenchmarkMixin, TestCase):
+    graphs_count = 20
+
+    def setUp(self):
+        DataCenterAssetFullFactory.create_batch(
+            3, service_env__service__name='ServiceA',
+        )
+        self.dashboard = DashboardFactory()
+        self.dashboard.graphs.add(*GraphFactory.create_batch(
+            self.graphs_count,
+            aggregate_type=AggregateType.aggregate_count.id,
+            params={
+                'series': 'id',
+                'labels': 'service_env__service__name',
+            },
+        ))
+        self.url = reverse('dashboard_view', args=(self.dashboard.pk,))
+        self.assets_table = DataCenterAsset._meta.db_table
+
+    def _get(self, name, params=None):
+        with CaptureQueriesContext(connection) as queries:
+            with self.benchmark(name):
+                response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        assets_queries = [
+            query for query in queries.captured_queries
+            if self.assets_table in query['sql']
+        ]
+        return response, assets_queries
+
+    def test_dashboard_is_rendered_from_precomputed_data(self):
+        for graph in Graph.objects.all():
+            graph.refresh_data()
+        response, assets_queries = self._get('dashboard with stored data')
+        self.assertEqual(assets_queries, [])
+        self.assertContains(response, 'Data from', count=self.graphs_count)
+
+    def test_missing_data_is_computed_once(self):
+        _, assets_queries = self._get('dashboard without stored data')
+        self.assertEqual(len(assets_queries), self.graphs_count)
+        _, assets_queries = self._get('dashboard with stored data')
+        self.assertEqual(assets_queries, [])
+
+    def test_refresh_computes_data_live(self):
+        for graph in Graph.objects.all():
+            graph.refresh_data()
+        _, assets_queries = self._get('dashboard refresh', {'refresh': '1'})
+        self.assertEqual(len(assets_queries), self.graphs_count)
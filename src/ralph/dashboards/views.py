@@ -1,10 +1,16 @@
 from django.views.generic import TemplateView
 
+from ralph.api.filters import TRUE_VALUES
 from ralph.dashboards.models import Dashboard
 
 
 class DashboardView(TemplateView):
+    """
+    Dashboard rendered from precomputed data of graphs (pass `refresh=1` in
+    query params to compute data of all graphs live).
+    """
     template_name = 'dashboard/dashboard.html'
+    refresh_query_param = 'refresh'
 
     def dispatch(self, request, dashboard_id, *args, **kwargs):
         self.dashboard = Dashboard.objects.get(id=dashboard_id, active=True)
@@ -13,14 +19,18 @@ class DashboardView(TemplateView):
     def get(self, request, *args, **kwargs):
         kwargs['graphs'] = []
         rendered_graphs = ''
+        refresh = request.GET.get(self.refresh_query_param) in TRUE_VALUES
         for graph in self.dashboard.graphs.filter(active=True).order_by('pk'):
             rendered_graphs += graph.render(
                 name='dashboard_{}_graph_{}'.format(
                     self.dashboard.id, graph.id
-                )
+                ),
+                refresh=refresh,
             )
         kwargs['name'] = self.dashboard.name
         kwargs['interval'] = self.dashboard.interval
         kwargs['description'] = self.dashboard.description
         kwargs['rendered_graphs'] = rendered_graphs
+        kwargs['path'] = request.path
+        kwargs['refresh_query_param'] = self.refresh_query_param
         return super().get(request, *args, **kwargs)
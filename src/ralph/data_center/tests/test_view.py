@@ -54,7 +54,8 @@ class DCHostViewTest(ClientMixin, TestCase):
         VirtualServerFullFactory.create_batch(5)
         CloudHostFullFactory.create_batch(4)
         ClusterFactory.create_batch(4)
-        with self.assertNumQueries(21):
+        # all 4 descendant types are fetched in a single query
+        with self.assertNumQueries(18):
             result = self.client.get(
                 reverse('admin:data_center_dchost_changelist'),
             )
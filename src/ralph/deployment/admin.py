@@ -1,3 +1,4 @@
+from django.db.models import Count
 from django.utils.translation import ugettext_lazy as _
 
 from ralph.admin.decorators import register
@@ -74,10 +75,21 @@ class PrebootAdmin(RalphAdmin):
             )
         }),
     )
-    list_display = ['name', 'description', 'used_counter']
+    list_display = ['name', 'description', '_get_used_counter']
     search_fields = ['name', 'description']
     list_filter = ['name']
 
+    def get_queryset(self, request):
+        # usages not aggregated yet (see `PrebootUsage.aggregate`)
+        return super().get_queryset(request).annotate(
+            pending_usages=Count('usages')
+        )
+
+    def _get_used_counter(self, obj):
+        return obj.used_counter + getattr(obj, 'pending_usages', 0)
+    _get_used_counter.short_description = _('used counter')
+    _get_used_counter.admin_order_field = 'used_counter'
+
 
 @register(Deployment)
 class DeploymentAdmin(RalphAdmin):
@@ -1,3 +1,5 @@
+from django.db.models.signals import post_delete, post_save
+
 from ralph.apps import RalphAppConfig
 
 
@@ -7,3 +9,22 @@ class DeploymentConfig(RalphAppConfig):
 
     def get_load_modules_when_ready(self):
         return super().get_load_modules_when_ready() + ['deployment']
+
+    def ready(self):
+        super().ready()
+        from ralph.deployment import cache
+        from ralph.lib.transitions.models import TransitionJob
+        from ralph.networks.models.networks import IPAddress
+        # receivers have to be connected to proxy models too, since signals
+        # are sent with class of saved instance
+        receivers = [
+            (
+                cache.invalidate_on_deployment_change,
+                [TransitionJob, self.get_model('Deployment')]
+            ),
+            (cache.invalidate_on_ip_change, [IPAddress]),
+        ]
+        for receiver, senders in receivers:
+            for sender in senders:
+                for signal in (post_save, post_delete):
+                    signal.connect(receiver=receiver, sender=sender)
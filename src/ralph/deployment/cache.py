@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+"""
+Short-lived cache of deployment lookups done by PXE endpoints.
+
+Every file fetched by the installer during one boot resolves the same IP to
+the deployment (through ethernet and asset) and the deployment to its
+preboot. Both mappings are cached for `DEPLOYMENT_CACHE_TIMEOUT` seconds and
+invalidated (after transaction commit) when the deployment is started,
+frozen or finished and when IP address is changed.
+"""
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+CACHE_KEY_PREFIX = 'deployment'
+
+
+def is_enabled():
+    return settings.USE_CACHE
+
+
+def _get_ip_key(ip):
+    return '{}:ip:{}'.format(CACHE_KEY_PREFIX, ip)
+
+
+def _get_preboot_key(deployment_id):
+    return '{}:preboot:{}'.format(CACHE_KEY_PREFIX, deployment_id)
+
+
+def _get(key):
+    if not is_enabled():
+        return None
+    try:
+        return cache.get(key)
+    except Exception:
+        logger.exception('Error while fetching %s from cache', key)
+        return None
+
+
+def _set(key, value):
+    if not is_enabled():
+        return
+    try:
+        cache.set(key, value, settings.DEPLOYMENT_CACHE_TIMEOUT)
+    except Exception:
+        logger.exception('Error while storing %s in cache', key)
+
+
+def get_deployment_id_for_ip(ip):
+    return _get(_get_ip_key(ip))
+
+
+def set_deployment_id_for_ip(ip, deployment_id):
+    _set(_get_ip_key(ip), str(deployment_id))
+
+
+def get_preboot(deployment_id):
+    return _get(_get_preboot_key(deployment_id))
+
+
+def set_preboot(deployment_id, preboot):
+    _set(_get_preboot_key(deployment_id), preboot)
+
+
+def invalidate(ips=(), deployment_ids=()):
+    """
+    Remove cached lookups of IPs and deployments when transaction is
+    committed.
+    """
+    if not is_enabled():
+        return
+    keys = [_get_ip_key(ip) for ip in ips if ip] + [
+        _get_preboot_key(deployment_id) for deployment_id in deployment_ids
+    ]
+    if not keys:
+        return
+
+    def delete():
+        try:
+            cache.delete_many(keys)
+        except Exception:
+            logger.exception('Error while removing deployment lookups')
+
+    transaction.on_commit(delete)
+
+
+def invalidate_on_deployment_change(sender, instance, **kwargs):
+    """
+    Remove cached lookups of deployment and IPs of deployed object.
+    """
+    from ralph.networks.models.networks import IPAddress
+    if not is_enabled():
+        return
+    ips = IPAddress.objects.filter(
+        ethernet__base_object_id=instance.object_id
+    ).values_list('address', flat=True)
+    invalidate(list(ips), [instance.pk])
+
+
+def invalidate_on_ip_change(sender, instance, **kwargs):
+    invalidate({
+        instance.address, instance._previous_state.get('address')
+    })
@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+import logging
+
+from django.core.management.base import BaseCommand
+
+from ralph.deployment.models import PrebootUsage
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = (
+        'Add recorded usages of preboots to their `used_counter` '
+        '(run it periodically, ex. from cron)'
+    )
+
+    def handle(self, *args, **options):
+        aggregated = PrebootUsage.aggregate()
+        logger.info('%d preboot usages aggregated', aggregated)
+        self.stdout.write('Preboot usages aggregated: {}'.format(aggregated))
@@ -0,0 +1,21 @@
+# Generated by Django 2.0.13 on 2026-10-17 12:00
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('deployment', '0009_auto_20240924_1133'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PrebootUsage',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('preboot', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='usages', to='deployment.Preboot')),
+            ],
+        ),
+    ]
@@ -1,9 +1,10 @@
 import logging
 import os
+from collections import Counter
 
 from dj.choices import Choices
 from django.conf import settings
-from django.db import models
+from django.db import models, transaction
 from django.db.models import F, Q
 from django.db.models.manager import Manager
 from django.utils import timezone
@@ -11,6 +12,7 @@ from django.utils.text import slugify
 from django.utils.translation import ugettext_lazy as _
 
 from ralph.assets.models import Ethernet
+from ralph.deployment import cache
 from ralph.lib.external_services.models import JobQuerySet
 from ralph.lib.mixins.fields import NUMP
 from ralph.lib.mixins.models import AdminAbsoluteUrlMixin, NamedMixin
@@ -172,8 +174,15 @@ class Preboot(AdminAbsoluteUrlMixin, NamedMixin):
         ordering = ('name',)
 
     def increment_used_counter(self):
-        self.used_counter = F('used_counter') + 1
-        self.save()
+        """
+        Record usage of the preboot.
+
+        Every usage is inserted as a separate row (instead of updating
+        preboot row, which would be locked by every deployment using this
+        preboot) and added to `used_counter` by `PrebootUsage.aggregate`
+        (see `aggregate_preboot_usages` command).
+        """
+        PrebootUsage.objects.create(preboot_id=self.pk)
 
     def _get_item(self, model_name, item_type):
         item = None
@@ -200,6 +209,50 @@ class Preboot(AdminAbsoluteUrlMixin, NamedMixin):
             return item.configuration
 
 
+class PrebootUsage(models.Model):
+    """
+    Single (not aggregated yet) usage of the preboot.
+    """
+    preboot = models.ForeignKey(
+        Preboot, on_delete=models.CASCADE, related_name='usages'
+    )
+
+    # number of usages aggregated in single transaction
+    aggregate_chunk_size = 10000
+
+    @classmethod
+    def aggregate(cls):
+        """
+        Add usages to `used_counter` of preboots and remove them.
+
+        Usages are locked (by primary key, so new usages could be inserted
+        in the meantime) while aggregated, so every usage is counted exactly
+        once, even when aggregation runs concurrently. Return number of
+        aggregated usages.
+        """
+        aggregated = 0
+        while True:
+            pks = list(cls.objects.order_by('pk').values_list(
+                'pk', flat=True
+            )[:cls.aggregate_chunk_size])
+            with transaction.atomic():
+                # usages removed by concurrent aggregation are skipped here
+                usages = list(
+                    cls.objects.select_for_update().filter(
+                        pk__in=pks
+                    ).values_list('pk', 'preboot_id')
+                )
+                counts = Counter(preboot_id for _, preboot_id in usages)
+                for preboot_id, count in sorted(counts.items()):
+                    Preboot.objects.filter(pk=preboot_id).update(
+                        used_counter=F('used_counter') + count
+                    )
+                cls.objects.filter(pk__in=[pk for pk, _ in usages]).delete()
+            aggregated += len(usages)
+            if len(pks) < cls.aggregate_chunk_size:
+                return aggregated
+
+
 class DeploymentManager(Manager.from_queryset(JobQuerySet)):
     def get_queryset(self):
         from ralph.deployment.deployment import deploy
@@ -217,11 +270,23 @@ class Deployment(AdminAbsoluteUrlMixin, TransitionJob):
 
     @classmethod
     def get_deployment_for_ip(cls, ip):
+        """
+        Return active deployment of object owning IP (id of the deployment
+        is cached for a short time, see `ralph.deployment.cache`).
+        """
+        deployment_id = cache.get_deployment_id_for_ip(ip)
+        if deployment_id is not None:
+            try:
+                return cls.objects.active().get(id=deployment_id)
+            except cls.DoesNotExist:
+                pass
         base_object = Ethernet.objects.get(ipaddress__address=ip).base_object
-        return cls.objects.active().get(
+        deployment = cls.objects.active().get(
             content_type_id=base_object.content_type_id,
             object_id=base_object.id
         )
+        cache.set_deployment_id_for_ip(ip, deployment.id)
+        return deployment
 
     @property
     def preboot(self):
@@ -1,8 +1,15 @@
 import factory
+from django.contrib.contenttypes.models import ContentType
 from factory.django import DjangoModelFactory
 
 from ralph.data_center.tests.factories import DataCenterAssetFullFactory
 from ralph.deployment.models import Deployment, Preboot, PrebootConfiguration
+from ralph.lib.external_services.models import JobStatus
+from ralph.lib.transitions.models import Action
+from ralph.lib.transitions.tests.factories import (
+    TransitionFactory,
+    TransitionModelFactory
+)
 
 
 class PrebootFactory(DjangoModelFactory):
@@ -24,3 +31,26 @@ class PrebootConfigurationFactory(DjangoModelFactory):
 def _get_deployment():
     obj = DataCenterAssetFullFactory()
     return Deployment(obj=obj)
+
+
+def _create_deployment(obj, preboot, status=JobStatus.FROZEN):
+    """
+    Create (active by default) deployment of `obj` using `preboot`.
+    """
+    transition = TransitionFactory(
+        name='deploy',
+        model=TransitionModelFactory(
+            content_type=ContentType.objects.get_for_model(obj)
+        ),
+    )
+    action, _ = Action.objects.get_or_create(name='deploy')
+    transition.actions.add(action)
+    return Deployment.objects.create(
+        obj=obj,
+        transition=transition,
+        service_name='ASYNC',
+        status=status,
+        _dumped_params=Deployment.prepare_params(
+            data={'deploy__preboot': preboot.pk}
+        ),
+    )
@@ -0,0 +1,126 @@
+import threading
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import RequestFactory, TestCase, TransactionTestCase
+
+from ralph.admin.sites import ralph_site
+from ralph.deployment.admin import PrebootAdmin
+from ralph.deployment.models import Preboot, PrebootUsage
+from ralph.deployment.tests.factories import PrebootFactory
+from ralph.tests.mixins import BenchmarkMixin
+
+
+class PrebootUsageTest(TestCase):
+    def setUp(self):
+        self.preboot, self.preboot_2 = PrebootFactory.create_batch(2)
+
+    def test_increment_used_counter_records_usage(self):
+        self.preboot.increment_used_counter()
+        self.preboot.increment_used_counter()
+        self.preboot.refresh_from_db()
+        self.assertEqual(self.preboot.used_counter, 0)
+        self.assertEqual(self.preboot.usages.count(), 2)
+
+    def test_aggregate(self):
+        for _ in range(3):
+            self.preboot.increment_used_counter()
+        self.preboot_2.increment_used_counter()
+        Preboot.objects.filter(pk=self.preboot.pk).update(used_counter=10)
+        self.assertEqual(PrebootUsage.aggregate(), 4)
+        self.preboot.refresh_from_db()
+        self.preboot_2.refresh_from_db()
+        self.assertEqual(self.preboot.used_counter, 13)
+        self.assertEqual(self.preboot_2.used_counter, 1)
+        self.assertFalse(PrebootUsage.objects.exists())
+
+    @patch.object(PrebootUsage, 'aggregate_chunk_size', 10)
+    def test_aggregate_in_chunks(self):
+        PrebootUsage.objects.bulk_create([
+            PrebootUsage(preboot=self.preboot) for _ in range(25)
+        ])
+        self.assertEqual(PrebootUsage.aggregate(), 25)
+        self.preboot.refresh_from_db()
+        self.assertEqual(self.preboot.used_counter, 25)
+
+    def test_aggregate_preboot_usages_command(self):
+        self.preboot.increment_used_counter()
+        call_command('aggregate_preboot_usages')
+        self.preboot.refresh_from_db()
+        self.assertEqual(self.preboot.used_counter, 1)
+
+    def test_admin_used_counter_includes_pending_usages(self):
+        Preboot.objects.filter(pk=self.preboot.pk).update(used_counter=10)
+        self.preboot.increment_used_counter()
+        self.preboot.increment_used_counter()
+        admin = PrebootAdmin(Preboot, ralph_site)
+        preboots = admin.get_queryset(RequestFactory().get('/'))
+        self.assertEqual(
+            admin._get_used_counter(preboots.get(pk=self.preboot.pk)), 12
+        )
+        self.assertEqual(
+            admin._get_used_counter(preboots.get(pk=self.preboot_2.pk)), 0
+        )
+
+
+class PrebootUsageConcurrencyTest(BenchmarkMixin, TransactionTestCase):
+    threads_count = 8
+    usages_per_thread = 50
+
+    def setUp(self):
+        self.preboot = PrebootFactory()
+
+    def _run(self, target, errors):
+        try:
+            target()
+        except Exception as e:
+            errors.append(e)
+        finally:
+            connection.close()
+
+    def _use_preboot(self):
+        preboot = Preboot.objects.get(pk=self.preboot.pk)
+        for _ in range(self.usages_per_thread):
+            preboot.increment_used_counter()
+
+    def _aggregate_until_done(self, done):
+        while not done.is_set():
+            PrebootUsage.aggregate()
+
+    def test_concurrent_usages_are_not_lost(self):
+        errors = []
+        done = threading.Event()
+        threads = [
+            threading.Thread(
+                target=self._run, args=(self._use_preboot, errors)
+            )
+            for _ in range(self.threads_count)
+        ]
+        # usages are aggregated (concurrently) while recorded
+        aggregators = [
+            threading.Thread(
+                target=self._run,
+                args=(lambda: self._aggregate_until_done(done), errors)
+            )
+            for _ in range(2)
+        ]
+        usages = self.threads_count * self.usages_per_thread
+        with self.benchmark(
+            'increment_used_counter with {} threads'.format(
+                self.threads_count
+            ),
+            operations=usages,
+        ):
+            for thread in threads + aggregators:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        done.set()
+        for thread in aggregators:
+            thread.join()
+        PrebootUsage.aggregate()
+        self.assertEqual(errors, [])
+        self.preboot.refresh_from_db()
+        self.assertEqual(self.preboot.used_counter, usages)
+        self.assertFalse(PrebootUsage.objects.exists())
@@ -0,0 +1,276 @@
+from unittest import mock
+
+from django.core.cache import cache as django_cache
+from django.db import connection
+from django.test import override_settings, TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ralph.assets.tests.factories import EthernetFactory
+from ralph.data_center.tests.factories import DataCenterAssetFullFactory
+from ralph.deployment import cache, utils
+from ralph.deployment.models import PrebootFile, PrebootItemType
+from ralph.deployment.tests.factories import (
+    _create_deployment,
+    PrebootConfigurationFactory,
+    PrebootFactory
+)
+from ralph.lib.external_services.models import JobStatus
+from ralph.networks.models.networks import IPAddress
+from ralph.networks.tests.factories import IPAddressFactory
+from ralph.tests.mixins import BenchmarkMixin
+
+IPXE_CONFIGURATION = """#!ipxe
+kernel {{ kernel }}
+initrd {{ initrd }}
+imgargs kernel ks={{ kickstart }} ksdevice={{ mac }}
+boot
+"""
+KICKSTART_CONFIGURATION = """hostname {{ hostname }}
+url --url {{ deployment_base }}
+%post
+curl {{ done_url }}
+%end
+"""
+
+
+class DeploymentConfigurationMixin(object):
+    def setUp(self):
+        super().setUp()
+        utils.get_configuration_template.cache_clear()
+        utils._get_deployment_paths.cache_clear()
+        self.preboot = PrebootFactory()
+        self.ipxe = PrebootConfigurationFactory(
+            type=PrebootItemType.ipxe.id, configuration=IPXE_CONFIGURATION
+        )
+        self.kickstart = PrebootConfigurationFactory(
+            type=PrebootItemType.kickstart.id,
+            configuration=KICKSTART_CONFIGURATION
+        )
+        self.preboot.items.add(self.ipxe, self.kickstart)
+
+    def _create_deployments(self, count):
+        return [
+            _create_deployment(DataCenterAssetFullFactory(), self.preboot)
+            for _ in range(count)
+        ]
+
+    def _get(self, url_name, **kwargs):
+        response = self.client.get(reverse(url_name, kwargs=kwargs))
+        self.assertEqual(response.status_code, 200)
+        return response.content.decode()
+
+    def _boot(self, deployment):
+        """
+        Fetch configs as server booting using deployment does.
+        """
+        return (
+            self._get('deployment_ipxe', deployment_id=deployment.id),
+            self._get(
+                'deployment_config', deployment_id=deployment.id,
+                config_type='kickstart'
+            ),
+        )
+
+
+@override_settings(RALPH_INSTANCE='http://ralph.local')
+class DeploymentConfigurationTest(DeploymentConfigurationMixin, TestCase):
+    def test_configuration_is_rendered_for_every_deployment(self):
+        deployments = self._create_deployments(2)
+        for deployment in deployments:
+            ipxe, kickstart = self._boot(deployment)
+            self.assertIn(
+                'kernel http://ralph.local/deployment/{}/kernel\n'.format(
+                    deployment.id
+                ),
+                ipxe
+            )
+            self.assertIn(
+                'ks=http://ralph.local/deployment/{}/kickstart '.format(
+                    deployment.id
+                ),
+                ipxe
+            )
+            self.assertEqual(
+                kickstart,
+                'hostname {}\n'
+                'url --url http://ralph.local/deployment/{}/\n'
+                '%post\n'
+                'curl http://ralph.local/deployment/{}/mark_as_done\n'
+                '%end\n'.format(
+                    deployment.obj.hostname, deployment.id, deployment.id
+                )
+            )
+
+    def test_configuration_template_is_compiled_once(self):
+        deployments = self._create_deployments(3)
+        with mock.patch(
+            'ralph.deployment.utils.Template', wraps=utils.Template
+        ) as template_mock:
+            for deployment in deployments:
+                self._boot(deployment)
+        self.assertEqual(template_mock.call_count, 2)
+
+    def test_changed_configuration_is_compiled_again(self):
+        deployment = self._create_deployments(1)[0]
+        self._boot(deployment)
+        self.kickstart.configuration = 'new {{ hostname }}'
+        self.kickstart.save()
+        _, kickstart = self._boot(deployment)
+        self.assertEqual(kickstart, 'new {}'.format(deployment.obj.hostname))
+
+    def test_urls_are_reversed_once(self):
+        deployments = self._create_deployments(3)
+        with mock.patch(
+            'ralph.deployment.utils.reverse', wraps=utils.reverse
+        ) as reverse_mock:
+            for deployment in deployments:
+                self._boot(deployment)
+        self.assertEqual(reverse_mock.call_count, len(utils.DEPLOYMENT_URLS))
+
+
+class RackBootBenchmarkTest(
+    DeploymentConfigurationMixin, BenchmarkMixin, TestCase
+):
+    servers_count = 40
+
+    def test_rack_boot(self):
+        """
+        Simulate rack of servers booting at once (every server fetches its
+        iPXE config and kickstart).
+        """
+        deployments = self._create_deployments(self.servers_count)
+        with mock.patch(
+            'ralph.deployment.utils.Template', wraps=utils.Template
+        ) as template_mock:
+            with CaptureQueriesContext(connection) as queries:
+                with self.benchmark(
+                    'rack boot', operations=self.servers_count * 2
+                ):
+                    for deployment in deployments:
+                        self._boot(deployment)
+        self.assertEqual(template_mock.call_count, 2)
+        self.benchmark_logger.info(
+            'rack boot: %d queries', len(queries.captured_queries)
+        )
+
+
+class DeploymentLookupMixin(DeploymentConfigurationMixin):
+    ip = '10.20.30.40'
+
+    def setUp(self):
+        super().setUp()
+        django_cache.clear()
+        self.preboot.items.add(*[
+            PrebootFile.objects.create(
+                name=file_type, type=PrebootItemType.id_from_name(file_type),
+                file=file_type
+            ) for file_type in ('kernel', 'initrd')
+        ])
+        self.deployment = self._create_deployments(1)[0]
+        IPAddressFactory(
+            address=self.ip,
+            ethernet=EthernetFactory(base_object=self.deployment.obj)
+        )
+
+    def _boot_from_ip(self):
+        """
+        Fetch configs and files as server booting from IP does. Return
+        number of queries of every request.
+        """
+        deployment_id = self.deployment.id
+        requests = [
+            ('deployment_ipxe', {}),
+            ('deployment_files', {
+                'deployment_id': deployment_id, 'file_type': 'kernel'
+            }),
+            ('deployment_files', {
+                'deployment_id': deployment_id, 'file_type': 'initrd'
+            }),
+            ('deployment_config', {
+                'deployment_id': deployment_id, 'config_type': 'kickstart'
+            }),
+        ]
+        queries_counts = []
+        for url_name, kwargs in requests:
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(
+                    reverse(url_name, kwargs=kwargs), REMOTE_ADDR=self.ip
+                )
+            self.assertIn(response.status_code, (200, 302))
+            queries_counts.append(len(queries.captured_queries))
+        return queries_counts
+
+
+class DeploymentLookupCacheTest(
+    DeploymentLookupMixin, BenchmarkMixin, TestCase
+):
+    def _benchmark_boot(self, name, boots=10):
+        with self.benchmark(name, operations=boots):
+            for _ in range(boots):
+                queries_counts = self._boot_from_ip()
+        self.benchmark_logger.info(
+            '%s: queries per request: %s', name, queries_counts
+        )
+        return queries_counts
+
+    def test_boot_sequence_queries(self):
+        uncached = self._benchmark_boot('boot sequence without cache')
+        with override_settings(USE_CACHE=True):
+            cached = self._benchmark_boot('boot sequence with cache')
+        self.assertEqual(len(cached), len(uncached))
+        for cached_count, uncached_count in zip(cached, uncached):
+            self.assertLess(cached_count, uncached_count)
+
+    @override_settings(USE_CACHE=True)
+    def test_cached_deployment_of_ip(self):
+        self._boot_from_ip()
+        self.assertEqual(
+            cache.get_deployment_id_for_ip(self.ip), str(self.deployment.id)
+        )
+        self.assertEqual(
+            cache.get_preboot(self.deployment.id), self.preboot
+        )
+
+    @override_settings(USE_CACHE=True)
+    def test_inactive_cached_deployment_is_not_returned(self):
+        self._boot_from_ip()
+        type(self.deployment).objects.filter(pk=self.deployment.pk).update(
+            status=JobStatus.FINISHED
+        )
+        response = self.client.get(
+            reverse('deployment_ipxe'), REMOTE_ADDR=self.ip
+        )
+        self.assertEqual(response.status_code, 404)
+
+
+@override_settings(USE_CACHE=True)
+class DeploymentLookupCacheInvalidationTest(
+    DeploymentLookupMixin, TransactionTestCase
+):
+    def test_lookups_are_invalidated_when_deployment_is_finished(self):
+        self._boot_from_ip()
+        self.deployment.status = JobStatus.FINISHED
+        self.deployment.save()
+        self.assertIsNone(cache.get_deployment_id_for_ip(self.ip))
+        self.assertIsNone(cache.get_preboot(self.deployment.id))
+
+    def test_lookups_are_invalidated_when_deployment_is_started(self):
+        self._boot_from_ip()
+        self.deployment.status = JobStatus.FINISHED
+        self.deployment.save()
+        new_deployment = _create_deployment(
+            self.deployment.obj, self.preboot
+        )
+        self.assertIsNone(cache.get_deployment_id_for_ip(self.ip))
+        self._boot_from_ip()
+        self.assertEqual(
+            cache.get_deployment_id_for_ip(self.ip), str(new_deployment.id)
+        )
+
+    def test_lookup_is_invalidated_when_ip_is_changed(self):
+        self._boot_from_ip()
+        ip = IPAddress.objects.get(address=self.ip)
+        ip.address = '10.20.30.41'
+        ip.save()
+        self.assertIsNone(cache.get_deployment_id_for_ip(self.ip))
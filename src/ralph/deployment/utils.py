@@ -1,22 +1,81 @@
+from functools import lru_cache
 from urllib.parse import urljoin
 
 from django.conf import settings
 from django.template import Context, Template
-from django.urls import reverse
+from django.urls import get_script_prefix, get_urlconf, reverse
 
+# deployment id used to reverse URLs once (replaced by id of the deployment)
+DEPLOYMENT_ID_PLACEHOLDER = 'deployment-id-placeholder'
+# (context variable, URL name, URL kwargs other than deployment id)
+DEPLOYMENT_URLS = [
+    ('deployment_base', 'deployment_base', {}),
+    ('kickstart', 'deployment_config', {'config_type': 'kickstart'}),
+    ('preseed', 'deployment_config', {'config_type': 'preseed'}),
+    ('script', 'deployment_config', {'config_type': 'script'}),
+    ('meta_data', 'deployment_config', {'config_type': 'meta-data'}),
+    ('user_data', 'deployment_config', {'config_type': 'user-data'}),
+    ('initrd', 'deployment_files', {'file_type': 'initrd'}),
+    ('kernel', 'deployment_files', {'file_type': 'kernel'}),
+    ('netboot', 'deployment_files', {'file_type': 'netboot'}),
+    ('done_url', 'deployment_done', {}),
+]
+
+
+@lru_cache(maxsize=settings.DEPLOYMENT_TEMPLATES_CACHE_SIZE)
+def get_configuration_template(configuration):
+    """
+    Return compiled template of the configuration.
+
+    Templates are cached (per process) by the content of the configuration,
+    so every revision of the configuration is compiled only once.
+    """
+    return Template(configuration)
+
+
+@lru_cache(maxsize=None)
+def _get_deployment_paths(root_urlconf, urlconf, script_prefix):
+    """
+    Return paths of deployment URLs with placeholder instead of deployment
+    id (URL configuration and script prefix are part of the cache key).
+    """
+    return {
+        name: reverse(url_name, urlconf=urlconf, kwargs=dict(
+            deployment_id=DEPLOYMENT_ID_PLACEHOLDER, **kwargs
+        ))
+        for name, url_name, kwargs in DEPLOYMENT_URLS
+    }
+
+
+def _get_deployment_urls(deployment, disable_reverse=False):
+    ralph_instance = settings.RALPH_INSTANCE
+    if disable_reverse:
+        return {
+            name: urljoin(ralph_instance, '{}({})'.format(
+                url_name, ', '.join([str(value) for value in dict(
+                    deployment_id=deployment.id, **kwargs
+                ).values()])
+            ))
+            for name, url_name, kwargs in DEPLOYMENT_URLS
+        }
+    paths = _get_deployment_paths(
+        settings.ROOT_URLCONF, get_urlconf(), get_script_prefix()
+    )
+    deployment_id = str(deployment.id)
+    return {
+        name: urljoin(
+            ralph_instance,
+            path.replace(DEPLOYMENT_ID_PLACEHOLDER, deployment_id)
+        )
+        for name, path in paths.items()
+    }
 
-def _render_configuration(configuration, deployment, disable_reverse=False):
-    def url(name, kwargs):
-        if disable_reverse:
-            return '{}({})'.format(
-                name, ', '.join([str(value) for value in kwargs.values()])
-            )
-        return reverse(name, kwargs=kwargs)
 
-    template = Template(configuration)
+def _render_configuration(configuration, deployment, disable_reverse=False):
+    template = get_configuration_template(configuration)
     ralph_instance = settings.RALPH_INSTANCE
     ethernet = deployment.params.get('create_dhcp_entries__ethernet')
-    context = Context({
+    context = Context(dict({
         'configuration_path': str(deployment.obj.configuration_path),
         'configuration_class_name': (
             deployment.obj.configuration_path.class_name if
@@ -28,86 +87,6 @@ def _render_configuration(configuration, deployment, disable_reverse=False):
         ),
         'ralph_instance': ralph_instance,
         'deployment_id': deployment.id,
-        'deployment_base': urljoin(
-            ralph_instance,
-            url(
-                'deployment_base',
-                kwargs={
-                    'deployment_id': deployment.id
-                }
-            )
-        ),
-        'kickstart': urljoin(
-            ralph_instance,
-            url(
-                'deployment_config',
-                kwargs={
-                    'deployment_id': deployment.id,
-                    'config_type': 'kickstart',
-                }
-            ),
-        ),
-        'preseed': urljoin(
-            ralph_instance,
-            url(
-                'deployment_config',
-                kwargs={
-                    'deployment_id': deployment.id,
-                    'config_type': 'preseed',
-                }
-            ),
-        ),
-        'script': urljoin(
-            ralph_instance,
-            url(
-                'deployment_config',
-                kwargs={
-                    'deployment_id': deployment.id,
-                    'config_type': 'script',
-                }
-            ),
-        ),
-        'meta_data': urljoin(
-            ralph_instance,
-            url(
-                'deployment_config',
-                kwargs={
-                    'deployment_id': deployment.id,
-                    'config_type': 'meta-data',
-                }
-            ),
-        ),
-        'user_data': urljoin(
-            ralph_instance,
-            url(
-                'deployment_config',
-                kwargs={
-                    'deployment_id': deployment.id,
-                    'config_type': 'user-data',
-                }
-            ),
-        ),
-        'initrd': urljoin(
-            ralph_instance,
-            url(
-                'deployment_files',
-                kwargs={'deployment_id': deployment.id, 'file_type': 'initrd'}
-            )
-        ),
-        'kernel': urljoin(
-            ralph_instance,
-            url(
-                'deployment_files',
-                kwargs={'deployment_id': deployment.id, 'file_type': 'kernel'}
-            ),
-        ),
-        'netboot': urljoin(
-            ralph_instance,
-            url(
-                'deployment_files',
-                kwargs={'deployment_id': deployment.id, 'file_type': 'netboot'}
-            ),
-        ),
         'dc': deployment.obj.rack.server_room.data_center.name,
         'domain': (
             deployment.obj.network_environment.domain
@@ -119,13 +98,6 @@ def _render_configuration(configuration, deployment, disable_reverse=False):
             deployment.obj.service_env.service.uid if
             deployment.obj.service_env else None
         ),
-        'done_url': urljoin(
-            ralph_instance,
-            url(
-                'deployment_done',
-                kwargs={'deployment_id': deployment.id}
-            )
-        ),
         'mac': ethernet.mac if ethernet else None,
-    })
+    }, **_get_deployment_urls(deployment, disable_reverse)))
     return template.render(context)
@@ -4,6 +4,7 @@ from django.http import Http404, HttpResponse, HttpResponseRedirect
 
 from ralph.admin.helpers import get_client_ip
 from ralph.assets.models import Ethernet
+from ralph.deployment import cache
 from ralph.deployment.models import Deployment, Preboot
 from ralph.deployment.utils import _render_configuration
 
@@ -23,6 +24,9 @@ def get_object_or_404_with_message(model, msg, logger_args, **kwargs):
 
 def _get_preboot(deployment_id):
     error_msg = 'Deployment with UUID: %s doesn\'t exist'
+    preboot = cache.get_preboot(deployment_id)
+    if preboot is not None:
+        return preboot
     try:
         preboot_id = get_object_or_404_with_message(
             model=Deployment,
@@ -30,7 +34,9 @@ def _get_preboot(deployment_id):
             logger_args=[deployment_id],
             id=deployment_id
         ).preboot
-        return Preboot.objects.get(id=preboot_id)
+        preboot = Preboot.objects.get(id=preboot_id)
+        cache.set_preboot(deployment_id, preboot)
+        return preboot
     except ValueError:
         logger.warning('Incorrect UUID: %s', deployment_id)
         raise SuspiciousOperation('Malformed UUID')
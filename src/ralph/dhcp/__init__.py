@@ -0,0 +1 @@
+default_app_config = 'ralph.dhcp.apps.DHCPConfig'
@@ -0,0 +1,41 @@
+from django.db.models.signals import post_delete, post_save
+
+from ralph.apps import RalphAppConfig
+
+
+class DHCPConfig(RalphAppConfig):
+    name = 'ralph.dhcp'
+
+    def ready(self):
+        super().ready()
+        from ralph.assets.models.components import Ethernet
+        from ralph.deployment.models import Deployment
+        from ralph.dhcp import watermarks
+        from ralph.lib.transitions.models import TransitionJob
+        from ralph.networks.models.networks import (
+            IPAddress,
+            Network,
+            NetworkEnvironment
+        )
+        # receivers have to be connected to proxy models too, since signals
+        # are sent with class of saved instance
+        receivers = [
+            (
+                watermarks.touch_on_ip_change,
+                [IPAddress, self.get_model('DHCPEntry')]
+            ),
+            (watermarks.touch_on_ethernet_change, [Ethernet]),
+            (watermarks.touch_on_network_change, [Network]),
+            (
+                watermarks.touch_on_network_environment_change,
+                [NetworkEnvironment]
+            ),
+            (
+                watermarks.touch_on_deployment_change,
+                [TransitionJob, Deployment]
+            ),
+        ]
+        for receiver, senders in receivers:
+            for sender in senders:
+                for signal in (post_save, post_delete):
+                    signal.connect(receiver=receiver, sender=sender)
@@ -0,0 +1,222 @@
+# -*- coding: utf-8 -*-
+"""
+Incremental (and streamed) rendering of DHCP entries (see
+`dhcp/entries.conf`).
+
+Entries of every network are rendered separately (as a fragment) and cached
+under the key calculated from the state of the network and its IPs (and
+ethernets), so after any change only fragments of changed networks are
+rendered again. Every rendered entry is stored together with the sort key of
+its hostname (see `CollationKey`) and entries are fetched from the database
+ordered by this key, so fragments could be merged (in Python) in the same
+order.
+
+Streamed entries (see `iter_entries`) are not cached - they're fetched from
+the database in chunks and rendered one by one, so memory usage doesn't
+depend on the number of entries.
+"""
+import hashlib
+import heapq
+import logging
+from operator import itemgetter
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection
+from django.db.models import BinaryField, CharField, Count, Func, Max, Q
+from django.template import Context
+from django.template.base import render_value_in_context
+from django.utils.encoding import force_bytes
+
+from ralph.dhcp.models import DHCPEntry
+from ralph.networks.models.networks import IPAddress
+
+logger = logging.getLogger(__name__)
+
+CACHE_KEY_PREFIX = 'dhcp:entries'
+# the same as entry in `dhcp/entries.conf` template
+ENTRY_FORMAT = '\nhost {} {{fixed-address {}; hardware ethernet {}; }}'
+
+
+class CollationKey(Func):
+    """
+    Sort key of the text, ordered the same way in the database and in Python.
+
+    MySQL compares strings using collation rules (ex. case insensitive), so
+    the key is a weight string of the value there (compared bytewise in both
+    places). Other databases use the value itself, compared bytewise (binary
+    collation), which is the same as comparing Python strings (code points).
+    """
+    function = 'WEIGHT_STRING'
+
+    def __init__(self, expression, **extra):
+        if 'output_field' not in extra:
+            extra['output_field'] = (
+                BinaryField() if connection.vendor == 'mysql'
+                else CharField()
+            )
+        super().__init__(expression, **extra)
+
+    def as_sql(self, compiler, connection, **extra_context):
+        # SQLite compares strings bytewise by default (BINARY collation)
+        return compiler.compile(self.source_expressions[0])
+
+    def as_postgresql(self, compiler, connection, **extra_context):
+        sql, params = compiler.compile(self.source_expressions[0])
+        return '{} COLLATE "C"'.format(sql), params
+
+    def as_mysql(self, compiler, connection, **extra_context):
+        return super().as_sql(compiler, connection, **extra_context)
+
+
+def render_entry(hostname, address, mac, context):
+    """
+    Render single DHCP entry exactly as the template does.
+    """
+    return ENTRY_FORMAT.format(*(
+        render_value_in_context(value, context)
+        for value in (hostname, address, mac)
+    ))
+
+
+def iter_entries(networks, chunk_size):
+    """
+    Yield `(sort key, hostname, rendered entry)` of networks ordered by
+    the sort key of hostname, fetching entries from the database in chunks
+    (using keyset pagination).
+    """
+    context = Context()
+    queryset = DHCPEntry.objects.filter(
+        network__in=networks
+    ).annotate(
+        sort_key=CollationKey('hostname')
+    ).order_by('sort_key', 'pk').values_list(
+        'pk', 'sort_key', 'hostname', 'address', 'ethernet__mac'
+    )
+    chunk = queryset
+    while True:
+        entries = list(chunk[:chunk_size])
+        for _, sort_key, hostname, address, mac in entries:
+            yield sort_key, hostname, render_entry(
+                hostname, address, mac, context
+            )
+        if len(entries) < chunk_size:
+            return
+        last_pk, last_sort_key = entries[-1][:2]
+        chunk = queryset.filter(
+            Q(sort_key__gt=last_sort_key) |
+            Q(sort_key=last_sort_key, pk__gt=last_pk)
+        )
+
+
+class DHCPEntriesFragments(object):
+    """
+    Rendered DHCP entries of networks (one cached fragment per network).
+
+    Fragment is a list of `(sort key, hostname, rendered entry)` tuples
+    sorted by the key.
+    """
+    def __init__(self, networks):
+        self.networks = networks
+
+    @property
+    def enabled(self):
+        return settings.USE_CACHE
+
+    @property
+    def backend(self):
+        return caches[settings.DHCP_CACHE_ALIAS]
+
+    def get_networks_states(self, networks):
+        """
+        Return state of every network - any change of the network, its IPs
+        or their ethernets (including deletion) changes the state.
+        """
+        states = {network.pk: [network.modified] for network in networks}
+        ips = IPAddress.objects.filter(network__in=networks).values(
+            'network'
+        ).annotate(
+            ips_modified=Max('modified'),
+            ips_count=Count('id'),
+            ethernets_modified=Max('ethernet__modified'),
+            ethernets_count=Count('ethernet'),
+        ).order_by()
+        for row in ips:
+            states[row['network']].extend([
+                row['ips_modified'], row['ips_count'],
+                row['ethernets_modified'], row['ethernets_count'],
+            ])
+        return states
+
+    def get_key(self, network_id, state):
+        return '{}:{}:{}'.format(
+            CACHE_KEY_PREFIX,
+            network_id,
+            hashlib.md5(force_bytes(repr(state))).hexdigest(),
+        )
+
+    def render(self, network_ids):
+        """
+        Render fragments of networks with given ids.
+        """
+        fragments = {network_id: [] for network_id in network_ids}
+        context = Context()
+        entries = DHCPEntry.objects.filter(
+            network__in=network_ids
+        ).annotate(
+            sort_key=CollationKey('hostname')
+        ).order_by('sort_key', 'pk').values_list(
+            'network', 'sort_key', 'hostname', 'address', 'ethernet__mac'
+        )
+        for network_id, sort_key, hostname, address, mac in entries.iterator():
+            fragments[network_id].append((
+                sort_key, hostname,
+                render_entry(hostname, address, mac, context)
+            ))
+        return fragments
+
+    def get_fragments(self):
+        """
+        Return fragments of all networks (from cache if possible).
+        """
+        networks = list(self.networks)
+        keys = {
+            network_id: self.get_key(network_id, state)
+            for network_id, state in self.get_networks_states(networks).items()
+        }
+        cached = {}
+        if self.enabled:
+            try:
+                cached = self.backend.get_many(list(keys.values()))
+            except Exception:
+                logger.exception(
+                    'Error while fetching DHCP entries from cache'
+                )
+        missing = [
+            network_id for network_id, key in keys.items()
+            if key not in cached
+        ]
+        logger.debug(
+            'Rendering DHCP entries of %d of %d networks',
+            len(missing), len(keys)
+        )
+        rendered = self.render(missing) if missing else {}
+        if self.enabled and rendered:
+            try:
+                self.backend.set_many(
+                    {keys[network_id]: rendered[network_id]
+                     for network_id in missing},
+                    settings.DHCP_FRAGMENTS_CACHE_TIMEOUT
+                )
+            except Exception:
+                logger.exception('Error while storing DHCP entries in cache')
+        return [
+            rendered[network_id] if network_id in rendered else cached[key]
+            for network_id, key in keys.items()
+        ]
+
+    def __iter__(self):
+        """
+        Merge fragments of all networks ordered by hostname.
+        """
+        return heapq.merge(*self.get_fragments(), key=itemgetter(0))
@@ -1,17 +1,34 @@
+import datetime
+import hashlib
+import ipaddress
 import re
+import tracemalloc
+from unittest.mock import ANY, patch
 
 from ddt import data, ddt, unpack
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import Count
+from django.template import Context, Template
+from django.test import override_settings, TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.utils.http import http_date
 
-from ralph.assets.tests.factories import EthernetFactory
+from ralph.assets.models.components import Ethernet
+from ralph.assets.tests.factories import BaseObjectFactory, EthernetFactory
 from ralph.data_center.tests.factories import DataCenterAssetFactory
+from ralph.dhcp import watermarks
+from ralph.dhcp.fragments import CollationKey, DHCPEntriesFragments
 from ralph.dhcp.models import DHCPEntry
 from ralph.dhcp.views import DHCPEntriesView
-from ralph.networks.models.networks import Network
-from ralph.networks.tests.factories import IPAddressFactory, NetworkFactory
+from ralph.networks.models.networks import IPAddress, Network
+from ralph.networks.tests.factories import (
+    IPAddressFactory,
+    NetworkEnvironmentFactory,
+    NetworkFactory
+)
 
 
 @ddt
@@ -165,9 +182,439 @@ class DHCPEntriesViewTest(TestCase):
             hostname='host2.mydc.net', address='192.168.1.4',
             ethernet=ethernet3, dhcp_expose=True
         )
-        entries = self.view._get_dhcp_entries(
+        entries = list(self.view._get_dhcp_entries(
             Network.objects.filter(id__in=[network.id])
-        )
+        ))
         self.assertEqual(DHCPEntry.objects.count(), 3)
         self.assertEqual(len(entries), 1)
-        self.assertEqual(entries[0].pk, ip.pk)
+        self.assertIn(
+            'host {} {{fixed-address {};'.format(ip.hostname, ip.address),
+            entries[0]
+        )
+
+
+# template used to render DHCP entries before introducing fragments
+LEGACY_ENTRIES_TEMPLATE = (
+    '# DHCP config generated by Ralph last modified at {{ last_modified }}\n'
+    '{% for entry in entries %}\n'
+    'host {{ entry.hostname }} {fixed-address {{ entry.address }}; '
+    'hardware ethernet {{ entry.mac }}; }{% endfor %}\n'
+    '# End of autogenerated config\n'
+)
+
+
+class DHCPEntriesFragmentsTest(TestCase):
+    def setUp(self):
+        get_user_model().objects.create_superuser(
+            'test', 'test@test.test', 'test'
+        )
+        self.client.login(username='test', password='test')
+        self.network_1 = NetworkFactory(address='192.168.1.0/24')
+        self.env = self.network_1.network_environment
+        self.network_2 = NetworkFactory(
+            address='192.168.2.0/24', network_environment=self.env
+        )
+        hostnames = [
+            ('192.168.1.10', 'b.mydc.net'),
+            ('192.168.1.11', 'c&d.mydc.net'),
+            ('192.168.1.12', 'dup.mydc.net'),
+            ('192.168.1.13', 'Z_host.mydc.net'),
+            ('192.168.2.10', 'A.mydc.net'),
+            ('192.168.2.11', 'dup.mydc.net'),
+            ('192.168.2.12', 'e.mydc.net'),
+            ('192.168.2.13', 'zz.mydc.net'),
+        ]
+        self.ips = {
+            address: IPAddressFactory(
+                address=address, hostname=hostname, dhcp_expose=True
+            )
+            for address, hostname in hostnames
+        }
+        # not exposed in DHCP
+        IPAddressFactory(address='192.168.2.14', hostname='x.mydc.net')
+        self.url = '{}?env={}'.format(
+            reverse('dhcp_config_entries'), self.env
+        )
+        cache.clear()
+
+    def _get_legacy_config(self):
+        networks = Network.objects.filter(
+            network_environment=self.env, dhcp_broadcast=True
+        )
+        entries = DHCPEntry.objects.filter(
+            network__in=networks
+        ).order_by(CollationKey('hostname'), 'pk')
+        duplicated_hostnames = [e['hostname'] for e in entries.values(
+            'hostname'
+        ).annotate(c=Count('id')).filter(c__gt=1)]
+        return Template(LEGACY_ENTRIES_TEMPLATE).render(Context({
+            'last_modified': DHCPEntriesView().get_last_modified(networks),
+            'entries': entries.exclude(hostname__in=duplicated_hostnames),
+        }))
+
+    def _get_config(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        return response.content.decode()
+
+    def test_config_is_the_same_as_rendered_by_template(self):
+        config = self._get_legacy_config()
+        self.assertNotIn('dup.mydc.net', config)
+        self.assertIn('c&amp;d.mydc.net', config)
+        for use_cache in (False, True, True):
+            with override_settings(USE_CACHE=use_cache):
+                self.assertEqual(self._get_config(), config)
+
+    @override_settings(USE_CACHE=True)
+    def test_only_changed_networks_are_rendered(self):
+        with patch.object(
+            DHCPEntriesFragments, 'render', autospec=True,
+            side_effect=DHCPEntriesFragments.render
+        ) as render:
+            self._get_config()
+            self.assertCountEqual(
+                render.call_args[0][1], [self.network_1.pk, self.network_2.pk]
+            )
+            render.reset_mock()
+            self._get_config()
+            render.assert_not_called()
+
+            ip = self.ips['192.168.1.10']
+            ip.hostname = 'y.mydc.net'
+            ip.save()
+            self.assertEqual(self._get_config(), self._get_legacy_config())
+            self.assertEqual(render.call_args[0][1], [self.network_1.pk])
+
+    @override_settings(DHCP_STREAMING_CHUNK_SIZE=2)
+    def test_streamed_config_is_the_same_as_rendered_by_template(self):
+        response = self.client.get(self.url, {'_stream': '1'})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(
+            b''.join(response.streaming_content).decode(),
+            self._get_legacy_config()
+        )
+
+    @override_settings(USE_CACHE=True)
+    def test_deleted_entry_is_removed(self):
+        self._get_config()
+        self.ips['192.168.2.10'].ethernet.delete()
+        config = self._get_config()
+        self.assertNotIn('A.mydc.net', config)
+        self.assertEqual(config, self._get_legacy_config())
+
+
+@ddt
+class DHCPDuplicatedHostnamesTest(TestCase):
+    def setUp(self):
+        get_user_model().objects.create_superuser(
+            'test', 'test@test.test', 'test'
+        )
+        self.client.login(username='test', password='test')
+        self.networks = [NetworkFactory(address='192.168.1.0/24')]
+        self.env = self.networks[0].network_environment
+        self.networks.append(NetworkFactory(
+            address='192.168.2.0/24', network_environment=self.env
+        ))
+        self.url = '{}?env={}'.format(
+            reverse('dhcp_config_entries'), self.env
+        )
+
+    def _create_entries(self, hostnames):
+        for i, (network_index, hostname) in enumerate(hostnames, start=10):
+            IPAddressFactory(
+                address='192.168.{}.{}'.format(network_index + 1, i),
+                hostname=hostname, dhcp_expose=True
+            )
+
+    def _get_legacy_hostnames(self):
+        """
+        Return hostnames of entries left by the old (query based) filter.
+        """
+        entries = DHCPEntry.objects.filter(network__in=self.networks)
+        duplicated_hostnames = [e['hostname'] for e in entries.values(
+            'hostname'
+        ).annotate(c=Count('id')).filter(c__gt=1)]
+        return list(entries.exclude(
+            hostname__in=duplicated_hostnames
+        ).order_by(CollationKey('hostname'), 'pk').values_list(
+            'hostname', flat=True
+        ))
+
+    def _get_hostnames(self, params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        if response.streaming:
+            content = b''.join(response.streaming_content)
+        else:
+            content = response.content
+        return re.findall(r'^host (\S+) ', content.decode(), re.MULTILINE)
+
+    @unpack
+    @data(
+        ([(0, 'a.mydc.net'), (0, 'a.mydc.net'), (0, 'b.mydc.net')],),
+        ([(0, 'a.mydc.net'), (1, 'a.mydc.net'), (1, 'b.mydc.net')],),
+        ([(0, 'a.mydc.net'), (1, 'a.mydc.net'), (0, 'a.mydc.net')],),
+        ([(0, 'A.mydc.net'), (1, 'a.mydc.net'), (1, 'c.mydc.net')],),
+        ([(1, 'b.mydc.net'), (0, 'a.mydc.net'), (1, 'c.mydc.net')],),
+        ([
+            (0, 'a.mydc.net'), (1, 'b.mydc.net'), (0, 'b.mydc.net'),
+            (1, 'c.mydc.net'), (0, 'd.mydc.net'), (1, 'd.mydc.net'),
+            (0, 'e.mydc.net'),
+        ],),
+    )
+    @override_settings(DHCP_STREAMING_CHUNK_SIZE=2)
+    def test_duplicated_hostnames_are_excluded_as_before(self, hostnames):
+        self._create_entries(hostnames)
+        expected = self._get_legacy_hostnames()
+        self.assertEqual(self._get_hostnames({}), expected)
+        self.assertEqual(self._get_hostnames({'_stream': '1'}), expected)
+
+    @override_settings(DHCP_STREAMING_CHUNK_SIZE=2)
+    def test_entries_are_merged_in_order_of_sort_key(self):
+        # ordering of these differs between locale collations (ex. of
+        # PostgreSQL) and comparison of Python strings
+        self._create_entries([
+            (0, 'b.mydc.net'), (1, 'B.mydc.net'), (0, 'a-b.mydc.net'),
+            (1, 'ab.mydc.net'), (1, '\xe4.mydc.net'), (0, 'a.mydc.net'),
+            (1, 'b.mydc.net'),
+        ])
+        fragments = DHCPEntriesFragments(self.networks)
+        keys = [key for key, _, _ in fragments]
+        self.assertEqual(keys, sorted(keys))
+        expected = self._get_legacy_hostnames()
+        self.assertNotIn('b.mydc.net', expected)
+        self.assertEqual(self._get_hostnames({}), expected)
+        self.assertEqual(self._get_hostnames({'_stream': '1'}), expected)
+
+    def test_duplicates_are_detected_without_queries(self):
+        self._create_entries([
+            (0, 'a.mydc.net'), (1, 'a.mydc.net'), (1, 'b.mydc.net')
+        ])
+        with CaptureQueriesContext(connection) as queries:
+            self._get_hostnames({})
+        self.assertFalse(any(
+            'HAVING' in query['sql'].upper()
+            for query in queries.captured_queries
+        ))
+
+
+class DHCPEntriesStreamingMemoryTest(TestCase):
+    entries_count = 200000
+    memory_ceiling = 32 * 1024 * 1024
+
+    def setUp(self):
+        get_user_model().objects.create_superuser(
+            'test', 'test@test.test', 'test'
+        )
+        self.client.login(username='test', password='test')
+        network = NetworkFactory(address='10.0.0.0/13')
+        base_object = BaseObjectFactory()
+        Ethernet.objects.bulk_create(
+            (
+                Ethernet(
+                    base_object=base_object,
+                    label='eth{}'.format(i),
+                    mac='02:00:{:02x}:{:02x}:{:02x}:{:02x}'.format(
+                        *i.to_bytes(4, 'big')
+                    )
+                ) for i in range(self.entries_count)
+            ),
+            batch_size=5000
+        )
+        ethernets_ids = Ethernet.objects.filter(
+            base_object=base_object
+        ).order_by('pk').values_list('pk', flat=True)
+        first_ip = int(ipaddress.ip_address('10.0.0.10'))
+        IPAddress.objects.bulk_create(
+            (
+                IPAddress(
+                    address=str(ipaddress.ip_address(first_ip + i)),
+                    number=first_ip + i,
+                    # every 997th hostname is duplicated
+                    hostname='host{:06d}.mydc.net'.format(
+                        i - 1 if i % 997 == 0 else i
+                    ),
+                    network=network,
+                    ethernet_id=ethernet_id,
+                    dhcp_expose=True,
+                ) for i, ethernet_id in enumerate(ethernets_ids)
+            ),
+            batch_size=5000
+        )
+        self.url = '{}?env={}'.format(
+            reverse('dhcp_config_entries'), network.network_environment
+        )
+
+    def _get(self, params):
+        """
+        Return digest of the response content and peak memory allocated
+        during request (and content consumption).
+        """
+        content_hash = hashlib.md5()
+        tracemalloc.start()
+        try:
+            response = self.client.get(self.url, params)
+            if response.streaming:
+                for part in response.streaming_content:
+                    content_hash.update(part)
+            else:
+                content_hash.update(response.content)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        self.assertEqual(response.status_code, 200)
+        return content_hash.hexdigest(), peak
+
+    def test_streamed_response_memory_usage_is_bounded(self):
+        regular_hash, regular_peak = self._get({})
+        streamed_hash, streamed_peak = self._get({'_stream': '1'})
+        self.assertEqual(streamed_hash, regular_hash)
+        self.assertLess(streamed_peak, self.memory_ceiling)
+        self.assertLess(streamed_peak, regular_peak)
+
+
+@override_settings(USE_CACHE=True)
+class DHCPWatermarkTest(TransactionTestCase):
+    def setUp(self):
+        get_user_model().objects.create_superuser(
+            'test', 'test@test.test', 'test'
+        )
+        self.client.login(username='test', password='test')
+        self.network = NetworkFactory(address='192.168.1.0/24')
+        self.env = self.network.network_environment
+        self.ip = IPAddressFactory(
+            address='192.168.1.2', hostname='host1.mydc.net', dhcp_expose=True
+        )
+        self.other_env_network = NetworkFactory(
+            address='10.0.1.0/24',
+            network_environment=NetworkEnvironmentFactory(name='other')
+        )
+        self.other_env_ip = IPAddressFactory(address='10.0.1.2')
+        self.url = '{}?env={}'.format(
+            reverse('dhcp_config_entries'), self.env
+        )
+        cache.clear()
+        # watermark known before the change
+        self.known_date = datetime.datetime(2020, 1, 1)
+        cache.set(watermarks.GLOBAL_KEY, self.known_date, None)
+        watermarks.init_watermark(
+            watermarks.ENTRIES, [self.env.pk], self.known_date
+        )
+
+    def _get(self, url=None):
+        return self.client.get(
+            url or self.url,
+            HTTP_IF_MODIFIED_SINCE=http_date(self.known_date.timestamp())
+        )
+
+    def test_watermark_is_read_without_aggregates(self):
+        with patch.object(DHCPEntriesView, 'get_last_modified') as m:
+            response = self._get()
+        self.assertEqual(response.status_code, 304)
+        m.assert_not_called()
+
+    def test_missing_watermark_is_calculated_from_database(self):
+        cache.clear()
+        response = self._get()
+        self.assertEqual(response.status_code, 200)
+        last_modified = DHCPEntriesView().get_last_modified(
+            Network.objects.filter(network_environment=self.env)
+        )
+        self.assertEqual(
+            response['Last-Modified'], http_date(last_modified.timestamp())
+        )
+        self.assertEqual(
+            watermarks.get_watermark(watermarks.ENTRIES, [self.env.pk]),
+            last_modified
+        )
+        response = self.client.get(
+            self.url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_missing_global_watermark_is_calculated_from_database(self):
+        cache.delete(watermarks.GLOBAL_KEY)
+        self.assertIsNone(
+            watermarks.get_watermark(watermarks.ENTRIES, [self.env.pk])
+        )
+        with patch.object(
+            DHCPEntriesView, 'get_last_modified',
+            return_value=self.known_date
+        ) as get_last_modified_mock:
+            self._get()
+        get_last_modified_mock.assert_called_once_with(ANY)
+        self.assertEqual(
+            cache.get(watermarks.GLOBAL_KEY),
+            Network.objects.latest('modified').modified
+        )
+
+    def test_networks_watermark_is_not_used_for_entries(self):
+        cache.clear()
+        # entry changed after networks
+        entries_modified = datetime.datetime.now().replace(
+            microsecond=0
+        ) + datetime.timedelta(hours=1)
+        Ethernet.objects.filter(pk=self.ip.ethernet.pk).update(
+            modified=entries_modified
+        )
+        networks_response = self.client.get('{}?env={}'.format(
+            reverse('dhcp_config_networks'), self.env
+        ))
+        self.assertEqual(networks_response.status_code, 200)
+        response = self.client.get(
+            self.url,
+            HTTP_IF_MODIFIED_SINCE=networks_response['Last-Modified']
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response['Last-Modified'], http_date(entries_modified.timestamp())
+        )
+
+    def test_ip_change_moves_watermark(self):
+        self.ip.hostname = 'host2.mydc.net'
+        self.ip.save()
+        response = self._get()
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('host2.mydc.net', response.content.decode())
+
+    def test_ip_deletion_moves_watermark(self):
+        self.ip.delete()
+        self.assertEqual(self._get().status_code, 200)
+
+    def test_ethernet_change_moves_watermark(self):
+        self.ip.ethernet.mac = '10:10:10:10:10:10'
+        self.ip.ethernet.save()
+        self.assertEqual(self._get().status_code, 200)
+
+    @override_settings(USE_CACHE=False)
+    def test_watermarks_are_not_touched_when_cache_is_disabled(self):
+        with patch.object(
+            watermarks, '_get_environments_of_networks'
+        ) as get_environments_mock, patch.object(
+            watermarks, 'touch'
+        ) as touch_mock:
+            self.ip.ethernet.mac = '10:10:10:10:10:10'
+            self.ip.ethernet.save()
+            self.ip.hostname = 'host2.mydc.net'
+            self.ip.save()
+        self.assertFalse(get_environments_mock.called)
+        self.assertFalse(touch_mock.called)
+
+    def test_network_change_moves_watermark(self):
+        self.network.save()
+        self.assertEqual(self._get().status_code, 200)
+
+    def test_change_in_other_environment_does_not_move_watermark(self):
+        self.other_env_ip.hostname = 'other.mydc.net'
+        self.other_env_ip.save()
+        self.assertEqual(self._get().status_code, 304)
+
+    def test_watermark_is_not_moved_when_transaction_is_rolled_back(self):
+        try:
+            with transaction.atomic():
+                self.ip.save()
+                raise ValueError()
+        except ValueError:
+            pass
+        self.assertEqual(self._get().status_code, 304)
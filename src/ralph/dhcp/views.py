@@ -1,20 +1,28 @@
 import logging
+from itertools import chain, groupby, islice
+from operator import itemgetter
 
-from django.db.models import Count, Prefetch
+from django.conf import settings
+from django.db.models import Prefetch
 from django.http import (
     HttpResponse,
     HttpResponseBadRequest,
     HttpResponseNotFound,
-    HttpResponseNotModified
+    HttpResponseNotModified,
+    StreamingHttpResponse
 )
+from django.template.loader import render_to_string
 from django.utils.http import http_date, parse_http_date_safe
 from django.views.generic.base import TemplateView
 from rest_framework.views import APIView
 
 from ralph.admin.helpers import get_client_ip
+from ralph.api.filters import TRUE_VALUES
 from ralph.assets.models.components import Ethernet
 from ralph.data_center.models import DataCenter
 from ralph.deployment.models import Deployment
+from ralph.dhcp import watermarks
+from ralph.dhcp.fragments import DHCPEntriesFragments, iter_entries
 from ralph.dhcp.models import DHCPEntry, DHCPServer, DNSServer
 from ralph.networks.models.networks import (
     IPAddress,
@@ -24,6 +32,9 @@ from ralph.networks.models.networks import (
 
 logger = logging.getLogger(__name__)
 
+# placeholder of entries in rendered template (see `DHCPEntriesView`)
+ENTRIES_MARKER = '\0entries\0'
+
 
 def last_modified_date(qs, filter_dict=None):
     last_date = None
@@ -59,6 +70,8 @@ class LastModifiedMixin(object):
 
 class DHCPConfigMixin(object):
     content_type = 'text/plain'
+    # name of watermark of the view (see `ralph.dhcp.watermarks`)
+    watermark_name = None
 
     @staticmethod
     def check_objects_existence_by_names(model_class, names):
@@ -110,9 +123,31 @@ class DHCPConfigMixin(object):
             network_environment__in=environments,
             dhcp_broadcast=True,
         )
-        self.last_modified = self.get_last_modified(self.networks)
+        self.last_modified = self.get_watermark(
+            [environment.pk for environment in environments], self.networks
+        )
         return super().dispatch(request, *args, **kwargs)
 
+    def get_watermark(self, environment_ids, networks):
+        """
+        Return time of the latest change of DHCP config of environments.
+
+        Maintained watermark (see `ralph.dhcp.watermarks`) is used if it's
+        known, otherwise it's calculated from the database.
+        """
+        if not watermarks.is_enabled():
+            return self.get_last_modified(networks)
+        last_modified = watermarks.get_watermark(
+            self.watermark_name, environment_ids
+        )
+        if last_modified is None:
+            last_modified = self.get_last_modified(networks)
+            if last_modified is not None:
+                watermarks.init_watermark(
+                    self.watermark_name, environment_ids, last_modified
+                )
+        return last_modified
+
 
 class DHCPSyncView(APIView):
     def get(self, request, *args, **kwargs):
@@ -130,6 +165,8 @@ class DHCPEntriesView(
 ):
     http_method_names = ['get']
     template_name = 'dhcp/entries.conf'
+    stream_query_param = '_stream'
+    watermark_name = watermarks.ENTRIES
 
     def get_last_modified(self, networks):
         """
@@ -166,23 +203,24 @@ class DHCPEntriesView(
     def _filter_dhcp_entries(self, entries):
         """
         Exclude entries with duplicated hostnames.
+
+        Entries are sorted by the sort key of hostname (see `CollationKey`),
+        so duplicates are always next to each other.
         """
-        duplicated_hostnames = [e['hostname'] for e in entries.values(
-            'hostname'
-        ).annotate(c=Count('id')).filter(c__gt=1)]
-        for hostname in duplicated_hostnames:
-            logger.error(
-                'Duplicated hostname for DHCP entry: %s', hostname
-            )
-        return entries.exclude(hostname__in=duplicated_hostnames)
+        for _, group in groupby(entries, key=itemgetter(0)):
+            _, hostname, entry = next(group)
+            if next(group, None) is None:
+                yield entry
+            else:
+                logger.error(
+                    'Duplicated hostname for DHCP entry: %s', hostname
+                )
 
     def _get_dhcp_entries(self, networks):
         """
-        Returns filtered DHCP entries for given networks.
+        Returns filtered (rendered) DHCP entries for given networks.
         """
-        return self._filter_dhcp_entries(DHCPEntry.objects.filter(
-            network__in=networks
-        ).order_by('hostname'))
+        return self._filter_dhcp_entries(DHCPEntriesFragments(networks))
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -192,11 +230,48 @@ class DHCPEntriesView(
         })
         return context
 
+    def _should_stream(self):
+        return self.request.GET.get(self.stream_query_param) in TRUE_VALUES
+
+    def _join_entries(self, entries, size):
+        """
+        Join rendered entries into chunks of the response.
+        """
+        while True:
+            chunk = ''.join(islice(entries, size))
+            if not chunk:
+                return
+            yield chunk
+
+    def render_to_response(self, context, **response_kwargs):
+        """
+        Stream entries fetched from the database in chunks (instead of
+        rendering whole config) when `_stream` query param is passed.
+        """
+        if not self._should_stream():
+            return super().render_to_response(context, **response_kwargs)
+        # header and footer are rendered by the template
+        content = render_to_string(
+            self.get_template_names(),
+            dict(context, entries=[ENTRIES_MARKER]),
+            request=self.request
+        )
+        header, footer = content.split(ENTRIES_MARKER)
+        chunk_size = settings.DHCP_STREAMING_CHUNK_SIZE
+        entries = self._filter_dhcp_entries(
+            iter_entries(self.networks, chunk_size)
+        )
+        return StreamingHttpResponse(
+            chain([header], self._join_entries(entries, chunk_size), [footer]),
+            content_type=self.content_type
+        )
+
 
 class DHCPNetworksView(
     DHCPConfigMixin, LastModifiedMixin, TemplateView, APIView
 ):
     template_name = 'dhcp/networks.conf'
+    watermark_name = watermarks.NETWORKS
 
     def get_last_modified(self, networks):
         last_items = []
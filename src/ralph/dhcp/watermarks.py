@@ -0,0 +1,206 @@
+# -*- coding: utf-8 -*-
+"""
+Per-environment watermarks of DHCP config changes.
+
+Watermark of the network environment is the time of the latest change of
+any object affecting DHCP config of this environment (IP, ethernet, network,
+environment or deployment). Watermarks are moved by signal receivers (after
+transaction commit) and stored in django cache, so `Last-Modified` of DHCP
+config is read using single cache query instead of several aggregates.
+Changes which could affect any environment (changes of networks and
+deployments) move global watermark.
+
+Every DHCP view (entries, networks) has its own watermarks of environments,
+because they are calculated from different objects when missing (ex. evicted
+from cache) - see `DHCPConfigMixin.get_watermark`. Watermark is also treated
+as missing when global watermark is missing - it's then initialized with the
+time of the latest change of networks and deployments in the database.
+"""
+import logging
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import Max
+from django.db.models.signals import post_save
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+CACHE_KEY_PREFIX = 'dhcp:watermark'
+GLOBAL_KEY = '{}:global'.format(CACHE_KEY_PREFIX)
+# names of watermarks of DHCP views
+ENTRIES = 'entries'
+NETWORKS = 'networks'
+WATERMARK_NAMES = (ENTRIES, NETWORKS)
+
+
+def is_enabled():
+    return settings.USE_CACHE
+
+
+def _get_backend():
+    return caches[settings.DHCP_CACHE_ALIAS]
+
+
+def _get_key(name, environment_id):
+    return '{}:{}:{}'.format(CACHE_KEY_PREFIX, name, environment_id)
+
+
+def _get_global_last_modified():
+    """
+    Return time of the latest change (in the database) which could affect
+    any environment.
+    """
+    from ralph.deployment.models import Deployment
+    from ralph.networks.models.networks import Network
+    dates = [
+        model.objects.aggregate(modified=Max('modified'))['modified']
+        for model in (Deployment, Network)
+    ]
+    dates = [date for date in dates if date is not None]
+    return max(dates) if dates else None
+
+
+def get_watermark(name, environment_ids):
+    """
+    Return watermark `name` of environments (the latest of them) or `None` if
+    watermark of any of them (or global watermark) is unknown.
+    """
+    keys = [
+        _get_key(name, environment_id) for environment_id in environment_ids
+    ]
+    try:
+        values = _get_backend().get_many(keys + [GLOBAL_KEY])
+    except Exception:
+        logger.exception('Error while fetching DHCP watermarks from cache')
+        return None
+    if not keys or any(key not in values for key in keys + [GLOBAL_KEY]):
+        return None
+    return max(values.values())
+
+
+def init_watermark(name, environment_ids, modified):
+    """
+    Store watermark `name` of environments calculated from the database
+    (and global watermark, if it's missing).
+
+    Watermark moved by any change in the meantime is not overwritten.
+    """
+    backend = _get_backend()
+    try:
+        for environment_id in environment_ids:
+            backend.add(_get_key(name, environment_id), modified, None)
+        if GLOBAL_KEY not in backend.get_many([GLOBAL_KEY]):
+            global_modified = _get_global_last_modified()
+            if global_modified is not None:
+                backend.add(GLOBAL_KEY, global_modified, None)
+    except Exception:
+        logger.exception('Error while storing DHCP watermarks in cache')
+
+
+def touch(environment_ids=None, modified=None):
+    """
+    Move watermark of environments (global watermark if `environment_ids` is
+    None) to `modified` (now by default) when transaction is committed.
+    """
+    if not is_enabled():
+        return
+    if environment_ids is None:
+        keys = [GLOBAL_KEY]
+    else:
+        keys = [
+            _get_key(name, environment_id)
+            for environment_id in environment_ids
+            if environment_id is not None
+            for name in WATERMARK_NAMES
+        ]
+    if not keys:
+        return
+    modified = modified or timezone.now()
+
+    def update():
+        try:
+            _get_backend().set_many({key: modified for key in keys}, None)
+        except Exception:
+            logger.exception('Error while storing DHCP watermarks in cache')
+
+    transaction.on_commit(update)
+
+
+def _get_change_time(instance, signal):
+    # time of deletion is not stored anywhere
+    if signal is post_save:
+        return instance.modified
+    return None
+
+
+def _get_environments_of_networks(network_ids):
+    from ralph.networks.models.networks import Network
+    network_ids = [
+        network_id for network_id in network_ids if network_id is not None
+    ]
+    if not network_ids:
+        return []
+    return Network.objects.filter(pk__in=network_ids).values_list(
+        'network_environment', flat=True
+    )
+
+
+def touch_on_ip_change(sender, instance, signal, **kwargs):
+    """
+    Move watermark of environment of IP (and of its previous network).
+    """
+    if not is_enabled():
+        return
+    network_ids = {
+        instance.network_id, instance._previous_state.get('network_id')
+    }
+    touch(
+        _get_environments_of_networks(network_ids),
+        _get_change_time(instance, signal)
+    )
+
+
+def touch_on_ethernet_change(sender, instance, signal, **kwargs):
+    """
+    Move watermark of environment of ethernet's IP (deleted ethernet is
+    handled by deletion of its IP).
+    """
+    from ralph.networks.models.networks import IPAddress
+    if not is_enabled() or signal is not post_save:
+        return
+    network_ids = IPAddress.objects.filter(ethernet=instance).values_list(
+        'network', flat=True
+    )
+    touch(
+        _get_environments_of_networks(network_ids),
+        _get_change_time(instance, signal)
+    )
+
+
+def touch_on_network_change(sender, instance, signal, **kwargs):
+    """
+    Move global watermark - network could be moved to another environment and
+    its IPs could be reassigned to other networks.
+    """
+    touch(None, _get_change_time(instance, signal))
+
+
+def touch_on_network_environment_change(sender, instance, signal, **kwargs):
+    touch([instance.pk], _get_change_time(instance, signal))
+
+
+def touch_on_deployment_change(sender, instance, signal, **kwargs):
+    """
+    Move global watermark when deployment is changed.
+    """
+    from ralph.deployment.models import Deployment
+    if not is_enabled():
+        return
+    if (
+        signal is post_save and
+        not Deployment.objects.filter(pk=instance.pk).exists()
+    ):
+        return
+    touch(None, _get_change_time(instance, signal))
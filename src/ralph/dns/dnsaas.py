@@ -1,9 +1,13 @@
 # -*- coding: utf-8 -*-
 import json
 import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from functools import wraps
-from typing import List, Optional, Tuple, Union
+from itertools import islice
+from typing import Iterator, List, Optional, Tuple, Union
 from urllib.parse import parse_qs, urlencode, urljoin,  urlsplit
 import requests
 from dj.choices import Choices
@@ -11,6 +15,7 @@ from django.conf import settings
 from django.utils.translation import ugettext_lazy as _
 from oauthlib.oauth2 import BackendApplicationClient
 from oauthlib.oauth2.rfc6749.errors import CustomOAuth2Error
+from requests.adapters import DEFAULT_POOLSIZE, HTTPAdapter
 from requests_oauthlib import OAuth2Session
 
 logger = logging.getLogger(__name__)
@@ -30,9 +35,10 @@ def renew_token_when_unauthorized(func):
     @wraps(func)
     def wrapper(self, *args, **kwargs):
         self._verify_oauth_token_validity()
+        authorization = self.session.headers.get('Authorization')
         status_code, data = func(self, *args, **kwargs)
         if status_code == 401:
-            self._update_oauth_token()
+            self._update_oauth_token(expired_authorization=authorization)
             status_code, data = func(self, *args, **kwargs)
         return status_code, data
     return wrapper
@@ -41,7 +47,14 @@ def renew_token_when_unauthorized(func):
 class DNSaaS:
 
     def __init__(self, headers: dict = None):
+        self._token_lock = threading.Lock()
         self.session = requests.Session()
+        # session is shared by threads fetching pages concurrently
+        adapter = HTTPAdapter(
+            pool_maxsize=max(self.page_workers, DEFAULT_POOLSIZE)
+        )
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
         _headers = {
             'Content-Type': 'application/json',
             'User-agent': 'Ralph/DNSaaS/Client',
@@ -68,13 +81,34 @@ class DNSaaS:
         self.token_expiration = datetime.now() + timedelta(0, expire_in - 60)
         return token.get('access_token')
 
-    def _update_oauth_token(self):
-        token = self._get_oauth_token()
-        self.session.headers['Authorization'] = 'Bearer {}'.format(token)
+    def _update_oauth_token(self, expired_authorization: str = None):
+        """
+        Fetch new OAuth token.
+
+        Args:
+            expired_authorization: Authorization header with expired token -
+                token is not fetched again when it was already renewed by
+                another thread in the meantime
+        """
+        with self._token_lock:
+            if (
+                expired_authorization is not None and
+                self.session.headers.get('Authorization') !=
+                expired_authorization
+            ):
+                return
+            token = self._get_oauth_token()
+            self.session.headers['Authorization'] = 'Bearer {}'.format(token)
 
     def _verify_oauth_token_validity(self):
         if datetime.now() >= self.token_expiration:
-            self._update_oauth_token()
+            self._update_oauth_token(
+                expired_authorization=self.session.headers.get('Authorization')
+            )
+
+    @property
+    def page_workers(self) -> int:
+        return int(settings.DNSAAS_PAGE_WORKERS)
 
     @staticmethod
     def build_url(resource_name: str, id: int = None,
@@ -112,29 +146,66 @@ class DNSaaS:
 
     def get_api_result(self, url: str) -> List[dict]:
         """
-        Returns 'results' from DNSAAS API.
+        Returns 'results' from DNSAAS API (see `iter_api_results`).
 
         Args:
             :str url: Url to API
-            :int page:
 
         Returns:
             list of records
         """
-        page = 0
-        api_results, last_page = self._get_api_result(url)
-        while not last_page:
-            page = page + 1
-            next_url = self._set_page_qp(url, page)
-            _api_results, last_page = self._get_api_result(next_url)
-            api_results.extend(_api_results)
-        return api_results
-
-    def _get_api_result(self, url: str) -> Tuple[List[dict], bool]:
+        return list(self.iter_api_results(url))
+
+    def iter_api_results(self, url: str) -> Iterator[dict]:
+        """
+        Yield 'results' from DNSAAS API page by page.
+
+        When the number of pages is known (returned with the first page),
+        next pages are fetched concurrently by (at most)
+        `DNSAAS_PAGE_WORKERS` threads sharing the session, otherwise pages
+        are fetched one by one. Only a few pages ahead of the consumer are
+        fetched, so memory usage doesn't depend on the number of pages.
+
+        Args:
+            :str url: Url to API
+        """
+        api_results, last_page, total_pages = self._get_api_result(url)
+        yield from api_results
+        if last_page:
+            return
+        if total_pages is None or total_pages < 2 or self.page_workers <= 1:
+            page = 0
+            while not last_page:
+                page = page + 1
+                next_url = self._set_page_qp(url, page)
+                api_results, last_page, _ = self._get_api_result(next_url)
+                yield from api_results
+            return
+        pages = iter(range(1, total_pages))
+        with ThreadPoolExecutor(
+            max_workers=min(self.page_workers, total_pages - 1)
+        ) as executor:
+            def fetch_pages(count):
+                for page in islice(pages, count):
+                    futures.append(executor.submit(
+                        self._get_api_result, self._set_page_qp(url, page)
+                    ))
+            futures = deque()
+            fetch_pages(self.page_workers * 2)
+            # results are returned in the order of pages
+            while futures:
+                api_results, _, _ = futures.popleft().result()
+                fetch_pages(1)
+                yield from api_results
+
+    def _get_api_result(
+        self, url: str
+    ) -> Tuple[List[dict], bool, Optional[int]]:
         status_code, json_data = self._get(url)
         api_results = json_data.get('content', [])
         last_page = bool(json_data.get('last', False))
-        return api_results, last_page
+        total_pages = json_data.get('totalPages')
+        return api_results, last_page, total_pages
 
     def get_dns_records(self, ipaddresses: List[str]) -> List[dict]:
         """Gets DNS Records for `ipaddresses` by API call"""
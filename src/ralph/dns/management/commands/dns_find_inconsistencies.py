@@ -1,7 +1,12 @@
 # -*- coding: utf-8 -*-
 import ipaddress
 import logging
+import os
+import sqlite3
+import tempfile
 from collections import defaultdict
+from itertools import groupby, islice
+from operator import itemgetter
 
 from django.core.management.base import BaseCommand
 
@@ -18,6 +23,10 @@ TEMPLATE = """
 --------------
 
 """
+# number of IPs fetched from Ralph at once in low memory mode
+IPS_CHUNK_SIZE = 10000
+# number of DNS records stored at once in low memory mode
+RECORDS_CHUNK_SIZE = 10000
 
 
 def get_ptr(ip):
@@ -39,6 +48,162 @@ def get_ptr(ip):
     return rev_ptr
 
 
+def get_ip_from_ptr(ptr):
+    return '.'.join(ptr.split('.')[3::-1])
+
+
+class RecordsStore(object):
+    """
+    On-disk (SQLite) store of DNS records and Ralph IPs used to compare them
+    with bounded memory.
+
+    Every check yields the same results (in the same order) as its
+    counterpart in `Command` working on dicts - `pos` columns keep the order
+    in which records were fetched.
+    """
+    schema = """
+        CREATE TABLE a (pos INTEGER PRIMARY KEY, name TEXT, content TEXT);
+        CREATE TABLE ptr (
+            pos INTEGER PRIMARY KEY, name TEXT, content TEXT, ip TEXT
+        );
+        CREATE TABLE ip (
+            pos INTEGER PRIMARY KEY, address TEXT, hostname TEXT, ptr TEXT
+        );
+    """
+    indexes = """
+        CREATE INDEX a_content ON a (content, name);
+        CREATE INDEX a_name ON a (name, content);
+        CREATE INDEX ptr_name ON ptr (name);
+        CREATE INDEX ptr_content ON ptr (content);
+        CREATE INDEX ip_address ON ip (address);
+    """
+
+    def __init__(self, path):
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript(self.schema)
+
+    def close(self):
+        self.connection.close()
+
+    def add_records(self, records):
+        """
+        Store DNS records in chunks of `RECORDS_CHUNK_SIZE`.
+        """
+        records = iter(records)
+        while True:
+            chunk = list(islice(records, RECORDS_CHUNK_SIZE))
+            if not chunk:
+                return
+            self.connection.executemany(
+                'INSERT INTO a (name, content) VALUES (?, ?)',
+                (
+                    (record['name'], record['content'])
+                    for record in chunk if record['type'] == 'A'
+                )
+            )
+            self.connection.executemany(
+                'INSERT INTO ptr (name, content, ip) VALUES (?, ?, ?)',
+                (
+                    (
+                        record['name'], record['content'],
+                        get_ip_from_ptr(record['name'])
+                    )
+                    for record in chunk if record['type'] == 'PTR'
+                )
+            )
+
+    def add_ips(self, ips):
+        self.connection.executemany(
+            'INSERT INTO ip (address, hostname, ptr) VALUES (?, ?, ?)',
+            ((ip, hostname, get_ptr(ip)) for ip, hostname in ips)
+        )
+
+    def finish(self):
+        """
+        Index stored data (after all of them are added).
+        """
+        self.connection.executescript(self.indexes)
+        self.connection.commit()
+
+    def _grouped(self, sql):
+        """
+        Group rows (key, value) by key.
+        """
+        rows = self.connection.execute(sql)
+        for key, group in groupby(rows, key=itemgetter(0)):
+            yield key, [value for _, value in group]
+
+    def get_missing_a_records_in_dnsaas(self):
+        return self.connection.execute("""
+            SELECT address, hostname FROM ip
+            WHERE NOT EXISTS (SELECT 1 FROM a WHERE a.content = ip.address)
+            ORDER BY pos
+        """)
+
+    def get_wrong_a_records_in_dnsaas(self):
+        rows = self.connection.execute("""
+            SELECT ip.pos, ip.address, ip.hostname, a.name
+            FROM ip JOIN a ON a.content = ip.address
+            ORDER BY ip.pos, a.pos
+        """)
+        for _, group in groupby(rows, key=itemgetter(0)):
+            group = list(group)
+            ip, hostname = group[0][1:3]
+            dns_hostnames = [row[3] for row in group]
+            if hostname not in dns_hostnames or len(dns_hostnames) != 1:
+                yield (ip, hostname, dns_hostnames)
+
+    def get_missing_a_records_in_ralph(self):
+        return self._grouped("""
+            SELECT a.content, a.name FROM a
+            JOIN (
+                SELECT content, MIN(pos) AS first FROM a GROUP BY content
+            ) f ON f.content = a.content
+            WHERE NOT EXISTS (SELECT 1 FROM ip WHERE ip.address = a.content)
+            ORDER BY f.first, a.pos
+        """)
+
+    def check_ralph_ptrs(self):
+        rows = self.connection.execute("""
+            SELECT ip.pos, ip.address, ip.hostname, ptr.content
+            FROM ip LEFT JOIN ptr ON ptr.name = ip.ptr
+            WHERE EXISTS (
+                SELECT 1 FROM a
+                WHERE a.content = ip.address AND a.name = ip.hostname
+            )
+            ORDER BY ip.pos, ptr.pos
+        """)
+        for _, group in groupby(rows, key=itemgetter(0)):
+            group = list(group)
+            ip, hostname = group[0][1:3]
+            ptr_hostnames = [row[3] for row in group if row[3] is not None]
+            if hostname not in ptr_hostnames:
+                yield (ip, hostname, ptr_hostnames or None)
+
+    def get_zombie_ptrs(self):
+        return self.connection.execute("""
+            SELECT ptr.name, ptr.content FROM ptr
+            JOIN (
+                SELECT content, MIN(pos) AS first FROM ptr GROUP BY content
+            ) f ON f.content = ptr.content
+            WHERE NOT EXISTS (
+                SELECT 1 FROM a
+                WHERE a.name = ptr.content AND a.content = ptr.ip
+            )
+            ORDER BY f.first, ptr.pos
+        """)
+
+    def get_duplicated_ptrs(self):
+        return self._grouped("""
+            SELECT ptr.name, ptr.content FROM ptr
+            JOIN (
+                SELECT name, MIN(pos) AS first FROM ptr
+                GROUP BY name HAVING COUNT(*) > 1
+            ) f ON f.name = ptr.name
+            ORDER BY f.first, ptr.pos
+        """)
+
+
 class Command(BaseCommand):
     help = 'Compare DNS records in DNSaaS with state of IP-hostname in Ralph'
 
@@ -105,15 +270,50 @@ class Command(BaseCommand):
             )
         return records_by_types, records_by_types_rev
 
+    def _get_ips_queryset(self):
+        return IPAddress.objects.filter(
+            ethernet__base_object__cloudhost__isnull=True,
+            hostname__isnull=False
+        ).order_by('pk')
+
     def _get_ips(self):
         """
         Return dict with IP-hostname from Ralph.
         """
-        ips = IPAddress.objects.filter(
-            ethernet__base_object__cloudhost__isnull=True,
-            hostname__isnull=False
-        ).values_list('address', 'hostname')
-        return dict(ips)
+        return dict(self._get_ips_queryset().values_list(
+            'address', 'hostname'
+        ))
+
+    def _iter_ips(self):
+        """
+        Yield pairs of IP-hostname from Ralph fetched in chunks.
+        """
+        queryset = self._get_ips_queryset().values_list(
+            'pk', 'address', 'hostname'
+        )
+        last_pk = None
+        while True:
+            chunk = queryset
+            if last_pk is not None:
+                chunk = chunk.filter(pk__gt=last_pk)
+            ips = list(chunk[:IPS_CHUNK_SIZE])
+            for _, address, hostname in ips:
+                yield address, hostname
+            if len(ips) < IPS_CHUNK_SIZE:
+                return
+            last_pk = ips[-1][0]
+
+    def _fill_records_store(self, store):
+        url = self.dns.build_url(
+            'records',
+            get_params=[
+                ('limit', 1000),
+                ('offset', 0),
+            ] + [('type', t) for t in {'A', 'PTR'}]
+        )
+        store.add_records(self.dns.iter_api_results(url))
+        store.add_ips(self._iter_ips())
+        store.finish()
 
     def get_missing_a_records_in_dnsaas(self, ips, dns, dns_rev):
         """
@@ -175,46 +375,83 @@ class Command(BaseCommand):
             if len(hostnames) > 1:
                 yield ptr, hostnames
 
-    def handle(self, **options):
-        dns, dns_rev = self._fetch_dns_records()
-        ips = self._get_ips()
-        for func, headers, description in [
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--low-memory',
+            action='store_true',
+            default=False,
+            dest='low_memory',
+            help=(
+                'Compare records stored in temporary SQLite database '
+                'instead of in memory (the same report, bounded memory '
+                'usage).'
+            )
+        )
+
+    def _get_checks(self):
+        return [
             (
-                self.get_missing_a_records_in_dnsaas,
+                'get_missing_a_records_in_dnsaas',
                 ['IP', 'hostname'],
                 'A records missing in DNSaaS'
             ),
             (
-                self.get_missing_a_records_in_ralph,
+                'get_missing_a_records_in_ralph',
                 ['IP', 'hostname'],
                 'A records missing in Ralph'
             ),
             (
-                self.get_wrong_a_records_in_dnsaas,
+                'get_wrong_a_records_in_dnsaas',
                 ['IP', 'ralph hostname', 'dnsaas hostnames'],
                 'Inconsistent A records'
             ),
             (
-                self.check_ralph_ptrs,
+                'check_ralph_ptrs',
                 ['IP', 'ralph hostname', 'PTR content'],
                 'Missing or wrong PTR records'
             ),
             (
-                self.get_zombie_ptrs,
+                'get_zombie_ptrs',
                 ['PTR', 'hostname (content)'],
                 'Zombie PTR records'
             ),
             (
-                self.get_duplicated_ptrs,
+                'get_duplicated_ptrs',
                 ['PTR', 'hostnames'],
                 'Duplicated PTR records'
             ),
-        ]:
-            result = func(ips, dns, dns_rev)
-            self.stdout.write(TEMPLATE.format(
-                description=description,
-                headers='\t'.join(headers),
-                content='\n'.join(
-                    ['\t'.join(map(str, line)) for line in result]
-                ),
-            ))
+        ]
+
+    def _write_result(self, result, headers, description):
+        """
+        Write result of single check (formatted using `TEMPLATE`) line by
+        line.
+        """
+        header, footer = TEMPLATE.split('{content}')
+        self.stdout.write(header.format(
+            description=description, headers='\t'.join(headers),
+        ), ending='')
+        for i, line in enumerate(result):
+            self.stdout.write(
+                ('\n' if i else '') + '\t'.join(map(str, line)), ending=''
+            )
+        self.stdout.write(footer, ending='')
+
+    def handle(self, low_memory=False, **options):
+        if low_memory:
+            with tempfile.TemporaryDirectory() as directory:
+                store = RecordsStore(os.path.join(directory, 'records.db'))
+                try:
+                    self._fill_records_store(store)
+                    for name, headers, description in self._get_checks():
+                        self._write_result(
+                            getattr(store, name)(), headers, description
+                        )
+                finally:
+                    store.close()
+            return
+        dns, dns_rev = self._fetch_dns_records()
+        ips = self._get_ips()
+        for name, headers, description in self._get_checks():
+            result = getattr(self, name)(ips, dns, dns_rev)
+            self._write_result(result, headers, description)
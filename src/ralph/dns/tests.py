@@ -1,8 +1,17 @@
 # -*- coding: utf-8 -*-
+import ipaddress
+import tracemalloc
+from io import StringIO
 from unittest.mock import patch
 
+from django.core.management import call_command
 from django.db import transaction
-from django.test import override_settings, TestCase, TransactionTestCase
+from django.test import (
+    override_settings,
+    SimpleTestCase,
+    TestCase,
+    TransactionTestCase
+)
 
 from ralph.assets.tests.factories import (
     ConfigurationClassFactory,
@@ -11,13 +20,21 @@ from ralph.assets.tests.factories import (
 from ralph.data_center.models import BaseObjectCluster, DataCenterAsset
 from ralph.dns.dnsaas import DNSaaS
 from ralph.dns.forms import DNSRecordForm, RecordType
+from ralph.dns.management.commands import dns_find_inconsistencies
+from ralph.dns.management.commands.dns_find_inconsistencies import (
+    get_ptr,
+    RecordsStore
+)
 from ralph.dns.publishers import _get_txt_data_to_publish_to_dnsaas
 from ralph.dns.views import (
     add_errors,
     DNSaaSIntegrationNotEnabledError,
     DNSView
 )
+from ralph.networks.models import IPAddress
 from ralph.networks.tests.factories import IPAddressFactory
+from ralph.tests.dnsaas import FakeDNSaaSMixin
+from ralph.tests.mixins import BenchmarkMixin
 from ralph.virtual.models import VirtualServer
 from ralph.virtual.tests.factories import VirtualServerFactory
 
@@ -92,6 +109,50 @@ class TestGetDnsRecords(TestCase):
         )
 
 
+class TestGetApiResultConcurrently(
+    FakeDNSaaSMixin, BenchmarkMixin, TestCase
+):
+    pages = 60
+
+    def setUp(self):
+        super().setUp()
+        self.server.records = [
+            {'id': i} for i in range(self.pages * self.server.page_size)
+        ]
+        self.url = DNSaaS.build_url('records', get_params=[('size', '10')])
+
+    def _get_api_result(self, name, workers):
+        with override_settings(DNSAAS_PAGE_WORKERS=workers):
+            dnsaas = DNSaaS()
+            with self.benchmark(name, self.pages) as result:
+                api_results = dnsaas.get_api_result(self.url)
+        return api_results, result['elapsed']
+
+    def test_all_pages_are_returned_in_order(self):
+        api_results, _ = self._get_api_result('8 workers', 8)
+        self.assertEqual(api_results, self.server.records)
+        self.assertCountEqual([
+            int(query.get('page', ['0'])[0])
+            for query in self.server.requests
+        ], range(self.pages))
+
+    def test_concurrent_fetching_is_faster(self):
+        sequential_results, sequential_elapsed = self._get_api_result(
+            'sequential', 1
+        )
+        concurrent_results, concurrent_elapsed = self._get_api_result(
+            '8 workers', 8
+        )
+        self.assertEqual(concurrent_results, sequential_results)
+        self.assertLess(concurrent_elapsed, sequential_elapsed / 3)
+
+    def test_token_is_renewed_once_by_concurrent_requests(self):
+        self.server.rejected_token = 'token1'
+        api_results, _ = self._get_api_result('8 workers', 8)
+        self.assertEqual(api_results, self.server.records)
+        self.assertEqual(self.tokens, ['token1', 'token2'])
+
+
 class TestDNSView(TestCase):
     @override_settings(ENABLE_DNSAAS_INTEGRATION=False)
     def test_dnsaasintegration_disabled(self):
@@ -554,3 +615,131 @@ class TestDNSForm(TestCase):
         form = DNSRecordForm({})
         add_errors(form, errors)
         self.assertIn('value', form.non_field_errors())
+
+
+class TestRecordsStore(SimpleTestCase):
+    def setUp(self):
+        self.store = RecordsStore(':memory:')
+        self.addCleanup(self.store.close)
+
+    @patch.object(dns_find_inconsistencies, 'RECORDS_CHUNK_SIZE', 2)
+    def test_records_are_stored_in_chunks_in_order(self):
+        records = [
+            {'type': 'A', 'name': 'host1.mydc.net', 'content': '10.0.0.1'},
+            {'type': 'PTR', 'name': get_ptr('10.0.0.1'), 'content': 'h1'},
+            {'type': 'TXT', 'name': 'host1.mydc.net', 'content': 'txt'},
+            {'type': 'A', 'name': 'host2.mydc.net', 'content': '10.0.0.2'},
+            {'type': 'A', 'name': 'host3.mydc.net', 'content': '10.0.0.3'},
+            {'type': 'PTR', 'name': get_ptr('10.0.0.3'), 'content': 'h3'},
+        ]
+        self.store.add_records(iter(records))
+        self.assertEqual(list(self.store.connection.execute(
+            'SELECT name, content FROM a ORDER BY pos'
+        )), [
+            ('host1.mydc.net', '10.0.0.1'),
+            ('host2.mydc.net', '10.0.0.2'),
+            ('host3.mydc.net', '10.0.0.3'),
+        ])
+        self.assertEqual(list(self.store.connection.execute(
+            'SELECT content, ip FROM ptr ORDER BY pos'
+        )), [('h1', '10.0.0.1'), ('h3', '10.0.0.3')])
+
+
+class TestFindInconsistencies(TestCase):
+    ips_count = 50000
+    memory_ceiling = 16 * 1024 * 1024
+
+    def setUp(self):
+        first_ip = int(ipaddress.ip_address('10.0.0.1'))
+        self.ips = [(
+            str(ipaddress.ip_address(first_ip + i)),
+            'host{}.mydc.net'.format(i)
+        ) for i in range(self.ips_count)]
+        IPAddress.objects.bulk_create(
+            (
+                IPAddress(
+                    address=address, number=first_ip + i, hostname=hostname
+                )
+                for i, (address, hostname) in enumerate(self.ips)
+            ),
+            batch_size=5000
+        )
+        patcher = patch.object(DNSaaS, '_get_oauth_token')
+        patcher.start().return_value = 'token'
+        self.addCleanup(patcher.stop)
+        patcher = patch.object(
+            DNSaaS, 'iter_api_results', autospec=True,
+            side_effect=self._iter_records
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _iter_records(self, dnsaas, url):
+        """
+        Yield (mostly consistent) DNS records of Ralph IPs.
+        """
+        for i, (address, hostname) in enumerate(self.ips):
+            case = i % 1000
+            if case == 1:
+                # missing A record
+                continue
+            if case == 2:
+                hostname = 'wrong.mydc.net'
+            yield {'type': 'A', 'name': hostname, 'content': address}
+            if case == 3:
+                # duplicated A record
+                yield {'type': 'A', 'name': hostname, 'content': address}
+            if case == 4:
+                # missing PTR record
+                continue
+            ptr = get_ptr(address)
+            yield {
+                'type': 'PTR', 'name': ptr,
+                'content': 'other.mydc.net' if case == 5 else hostname
+            }
+            if case == 6:
+                yield {'type': 'PTR', 'name': ptr, 'content': 'other.mydc.net'}
+            if case == 7:
+                # records missing in Ralph
+                address = '192.168.{}.{}'.format(i // 1000, case)
+                yield {'type': 'A', 'name': hostname, 'content': address}
+                yield {
+                    'type': 'PTR', 'name': get_ptr(address),
+                    'content': hostname
+                }
+            if case == 8:
+                yield {
+                    'type': 'PTR',
+                    'name': get_ptr('192.168.250.{}'.format(i // 1000)),
+                    'content': 'zombie.mydc.net'
+                }
+
+    def _call_command(self, **options):
+        out = StringIO()
+        tracemalloc.start()
+        try:
+            call_command('dns_find_inconsistencies', stdout=out, **options)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        return out.getvalue(), peak
+
+    def test_low_memory_mode_returns_the_same_report(self):
+        report, peak = self._call_command()
+        low_memory_report, low_memory_peak = self._call_command(
+            low_memory=True
+        )
+        self.assertEqual(low_memory_report, report)
+        for expected in [
+            'A records missing in DNSaaS\n\nIP\thostname\n10.0.0.2\t',
+            '192.168.0.7\t[\'host7.mydc.net\']',
+            "10.0.0.3\thost2.mydc.net\t['wrong.mydc.net']",
+            "10.0.0.4\thost3.mydc.net\t['host3.mydc.net', 'host3.mydc.net']",
+            '10.0.0.5\thost4.mydc.net\tNone',
+            "10.0.0.6\thost5.mydc.net\t['other.mydc.net']",
+            '0.250.168.192.in-addr.arpa\tzombie.mydc.net',
+            "7.0.0.10.in-addr.arpa\t['host6.mydc.net', 'other.mydc.net']",
+        ]:
+            self.assertIn(expected, report)
+        self.assertLess(low_memory_peak, self.memory_ceiling)
+        self.assertLess(low_memory_peak, peak)
@@ -1,6 +1,8 @@
 # -*- coding: utf-8 -*-
 from django.apps import AppConfig
-from django.db.models.signals import post_migrate
+from django.contrib.auth import get_user_model
+from django.core.signals import request_finished
+from django.db.models.signals import m2m_changed, post_migrate
 
 
 class PermissionAppConfig(AppConfig):
@@ -8,10 +10,24 @@ class PermissionAppConfig(AppConfig):
     verbose_name = 'Permissions'
 
     def ready(self):
-        from ralph.lib.permissions.models import create_permissions
+        from ralph.lib.permissions.cache import (
+            clear_user_permissions_cache_on_m2m_change
+        )
+        from ralph.lib.permissions.models import (
+            create_permissions,
+            report_allowed_fields_cache_stats
+        )
         from ralph.lib.permissions.views import update_extra_view_permissions
         post_migrate.disconnect(
             dispatch_uid='django.contrib.auth.management.create_permissions'
         )
         post_migrate.connect(create_permissions)
         post_migrate.connect(update_extra_view_permissions)
+        user_model = get_user_model()
+        for through in (
+            user_model.groups.through, user_model.user_permissions.through
+        ):
+            m2m_changed.connect(
+                clear_user_permissions_cache_on_m2m_change, sender=through
+            )
+        request_finished.connect(report_allowed_fields_cache_stats)
@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+"""
+Cross-request cache of allowed fields (see `PermByFieldMixin.allowed_fields`).
+
+Allowed fields of the model depend only on the set of permissions of the user
+(and on superuser and active flags), so they're cached under the digest of
+these permissions and shared between all users (and requests) with the same
+permissions. Cache is two-level: process-local LRU dict in front of django
+cache (Redis in production).
+
+Since the key is calculated from effective permissions of the user, any change
+of group membership or permissions results in a different key (old entries
+simply expire). Fields of the model are also part of the key, so entries are
+not reused after model changes.
+"""
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.encoding import force_bytes
+
+logger = logging.getLogger(__name__)
+
+# name of user's attribute in which permissions digest is memoized
+PERMISSIONS_DIGEST_CACHE_ATTR = '_permissions_digest_cache'
+# user attributes in which django (ModelBackend) memoizes user's permissions
+DJANGO_PERMISSIONS_CACHE_ATTRS = (
+    '_perm_cache', '_user_perm_cache', '_group_perm_cache'
+)
+
+CACHE_KEY_PREFIX = 'permissions:allowed_fields'
+MISSING = object()
+
+
+def get_permissions_digest(user):
+    """
+    Return digest of the effective permissions of the user.
+
+    Digest doesn't depend on user's ID, so it's the same for every user
+    with the same set of permissions (in every process).
+
+    :param user: User object
+    :type user: django User object
+
+    :return: hex digest
+    :rtype: str
+    """
+    key = (user.is_active, user.is_superuser)
+    cached = getattr(user, PERMISSIONS_DIGEST_CACHE_ATTR, None)
+    if cached and cached[0] == key:
+        return cached[1]
+    if not user.is_active:
+        perms = 'inactive'
+    elif user.is_superuser:
+        perms = 'superuser'
+    else:
+        perms = '\n'.join(sorted(user.get_all_permissions()))
+    digest = hashlib.md5(force_bytes(perms)).hexdigest()
+    setattr(user, PERMISSIONS_DIGEST_CACHE_ATTR, (key, digest))
+    return digest
+
+
+def clear_user_permissions_cache(user):
+    """
+    Clear permissions (and allowed fields) memoized on the user object.
+    """
+    from ralph.lib.permissions.models import ALLOWED_FIELDS_CACHE_ATTR
+    for attr in DJANGO_PERMISSIONS_CACHE_ATTRS + (
+        PERMISSIONS_DIGEST_CACHE_ATTR, ALLOWED_FIELDS_CACHE_ATTR
+    ):
+        user.__dict__.pop(attr, None)
+
+
+def clear_user_permissions_cache_on_m2m_change(
+    sender, instance, action, reverse, pk_set, **kwargs
+):
+    """
+    Clear permissions memoized on the user object when its groups or
+    permissions are changed (the same object could be used later, ex. in the
+    same request).
+    """
+    if action.startswith('post_') and not reverse:
+        clear_user_permissions_cache(instance)
+
+
+class AllowedFieldsSharedCache(object):
+    """
+    Two-level (process-local and django cache) storage of allowed fields.
+    """
+    def __init__(self):
+        self._local = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return settings.USE_CACHE
+
+    @property
+    def backend(self):
+        return caches[settings.PERMISSIONS_CACHE_ALIAS]
+
+    def get_key(self, user, model, action):
+        fields = ','.join(sorted(model._get_permissioned_field_names()))
+        return '{}:{}:{}:{}:{}'.format(
+            CACHE_KEY_PREFIX,
+            get_permissions_digest(user),
+            model._meta.label_lower,
+            action,
+            hashlib.md5(force_bytes(fields)).hexdigest(),
+        )
+
+    def get(self, key):
+        """
+        Return allowed fields stored under `key` or `None` if they're not
+        cached.
+        """
+        with self._lock:
+            try:
+                self._local.move_to_end(key)
+                return self._local[key]
+            except KeyError:
+                pass
+        try:
+            result = self.backend.get(key, MISSING)
+        except Exception:
+            logger.exception('Error while fetching allowed fields from cache')
+            return None
+        if result is MISSING:
+            return None
+        self._set_local(key, result)
+        return result
+
+    def set(self, key, allowed_fields):
+        self._set_local(key, allowed_fields)
+        try:
+            self.backend.set(
+                key, allowed_fields, settings.PERMISSIONS_CACHE_TIMEOUT
+            )
+        except Exception:
+            logger.exception('Error while storing allowed fields in cache')
+
+    def _set_local(self, key, allowed_fields):
+        with self._lock:
+            self._local[key] = allowed_fields
+            self._local.move_to_end(key)
+            while len(self._local) > settings.PERMISSIONS_LOCAL_CACHE_SIZE:
+                self._local.popitem(last=False)
+
+    def clear_local(self):
+        with self._lock:
+            self._local.clear()
+
+
+allowed_fields_shared_cache = AllowedFieldsSharedCache()
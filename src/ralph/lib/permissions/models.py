@@ -6,6 +6,12 @@ from django.db import DEFAULT_DB_ALIAS, models, router, transaction
 from django.db.models.base import ModelBase
 from django.utils.translation import ugettext_lazy as _
 
+from ralph.lib.metrics import statsd
+from ralph.lib.permissions.cache import allowed_fields_shared_cache
+
+# name of user's attribute in which allowed fields are memoized
+ALLOWED_FIELDS_CACHE_ATTR = '_allowed_fields_cache'
+
 
 def get_perm_key(action, class_name, field_name):
     """
@@ -29,6 +35,79 @@ def get_perm_key(action, class_name, field_name):
     return '{}_{}_{}_field'.format(action, class_name, field_name)
 
 
+class AllowedFieldsCacheStats(object):
+    """
+    Hits and misses counter of allowed fields cache (see
+    `PermByFieldMixin.allowed_fields`).
+
+    Counters are reported to statsd (when collecting metrics is enabled)
+    aggregated - every `report_every` calls and at the end of every request
+    (see `report_allowed_fields_cache_stats`) - instead of sending separate
+    packet on every call.
+    """
+    report_every = 1000
+
+    def __init__(self, metric_name='permissions.allowed_fields_cache'):
+        self.hit_metric_name = '{}.hit'.format(metric_name)
+        self.miss_metric_name = '{}.miss'.format(metric_name)
+        self.reset()
+
+    def reset(self):
+        self.hits = 0
+        self.misses = 0
+        self._pending_hits = 0
+        self._pending_misses = 0
+
+    def hit(self):
+        self.hits += 1
+        self._pending_hits += 1
+        self._report_if_needed()
+
+    def miss(self):
+        self.misses += 1
+        self._pending_misses += 1
+        self._report_if_needed()
+
+    def _report_if_needed(self):
+        if self._pending_hits + self._pending_misses >= self.report_every:
+            self.report()
+
+    def report(self):
+        """
+        Send counts (collected since last report) to statsd.
+        """
+        hits, misses = self._pending_hits, self._pending_misses
+        self._pending_hits = self._pending_misses = 0
+        if hits:
+            statsd.incr(self.hit_metric_name, hits)
+        if misses:
+            statsd.incr(self.miss_metric_name, misses)
+
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def __repr__(self):
+        return '<AllowedFieldsCacheStats hits={} misses={} ({:.1%})>'.format(
+            self.hits, self.misses, self.hit_rate
+        )
+
+
+allowed_fields_cache_stats = AllowedFieldsCacheStats()
+allowed_fields_shared_cache_stats = AllowedFieldsCacheStats(
+    'permissions.allowed_fields_shared_cache'
+)
+
+
+def report_allowed_fields_cache_stats(sender, **kwargs):
+    """
+    Report allowed fields cache stats collected during the request.
+    """
+    allowed_fields_cache_stats.report()
+    allowed_fields_shared_cache_stats.report()
+
+
 class user_permission(object):  # noqa
     """
     Decorator for functions which should validate if user has all rights to
@@ -208,6 +287,12 @@ class PermByFieldMixin(models.Model, metaclass=PermissionsBase):
         :return: True or False
         :rtype: bool
         """
+        if field_name in cls._get_permissioned_field_names():
+            return field_name in cls.allowed_fields(user, action)
+        return cls._has_perm_to_field(field_name, user, action)
+
+    @classmethod
+    def _has_perm_to_field(cls, field_name, user, action='change'):
         # TODO: if it's m2m field, check on the other side
         perm_key = get_perm_key(
             action,
@@ -220,38 +305,85 @@ class PermByFieldMixin(models.Model, metaclass=PermissionsBase):
         # If the user does not have rights to view,
         # but has the right to change he can view the field
         if action == 'view' and not perm:
-            return cls.has_access_to_field(field_name, user, action='change')
+            return cls._has_perm_to_field(field_name, user, action='change')
         return perm
 
+    @classmethod
+    def _get_permissioned_field_names(cls):
+        blacklist = cls._permissions.blacklist
+        return {
+            field.name
+            for field in (cls._meta.fields + cls._meta.many_to_many)
+            if field.name not in blacklist
+        }
+
     @classmethod
     def allowed_fields(cls, user, action='change'):
         """
-        Returns a list with the names of the fields to which the user has
+        Returns a set with the names of the fields to which the user has
         permission.
 
+        Result is memoized on the user object (for every model and action),
+        so every serializer, form and admin view checking field permissions
+        during single request (user is fetched once per request) reuses it.
+        Cache hits and misses are counted in `allowed_fields_cache_stats`.
+        When result is not memoized yet, it's taken from cache shared between
+        requests (see `ralph.lib.permissions.cache`).
+
         :Example:
 
             >> user = User.objects.get(username='root')
             >> model.allowed_fields(user, 'change')
-            ['parent', 'remarks', 'service_env']
+            frozenset({'parent', 'remarks', 'service_env'})
 
         :param user: User object
         :type user: django User object
         :param action: permission action (change/view)
         :type action: str
 
-        :return: List of field names
-        :rtype: list
+        :return: Set of field names
+        :rtype: frozenset
         """
-        result = set()
-        blacklist = cls._permissions.blacklist
+        cache = getattr(user, ALLOWED_FIELDS_CACHE_ATTR, None)
+        if cache is None:
+            cache = {}
+            setattr(user, ALLOWED_FIELDS_CACHE_ATTR, cache)
+        # superuser and active flags are checked by `has_perm` before
+        # permissions, so they're part of the key to not return stale result
+        # when they change
+        key = (cls, action, user.is_active, user.is_superuser)
+        try:
+            result = cache[key]
+        except KeyError:
+            allowed_fields_cache_stats.miss()
+            result = cache[key] = cls._get_shared_allowed_fields(
+                user, action
+            )
+        else:
+            allowed_fields_cache_stats.hit()
+        return result
+
+    @classmethod
+    def _get_shared_allowed_fields(cls, user, action='change'):
+        if not allowed_fields_shared_cache.enabled:
+            return frozenset(cls._get_allowed_fields(user, action))
+        key = allowed_fields_shared_cache.get_key(user, cls, action)
+        result = allowed_fields_shared_cache.get(key)
+        if result is None:
+            allowed_fields_shared_cache_stats.miss()
+            result = frozenset(cls._get_allowed_fields(user, action))
+            allowed_fields_shared_cache.set(key, result)
+        else:
+            allowed_fields_shared_cache_stats.hit()
+        return result
 
-        for field in (cls._meta.fields + cls._meta.many_to_many):
-            if (
-                field.name not in blacklist and
-                cls.has_access_to_field(field.name, user, action)
-            ):
-                result.add(field.name)
+    @classmethod
+    def _get_allowed_fields(cls, user, action='change'):
+        result = {
+            field_name
+            for field_name in cls._get_permissioned_field_names()
+            if cls._has_perm_to_field(field_name, user, action)
+        }
         # If the user does not have rights to view,
         # but has the right to change he can view the field
         if action == 'view':
@@ -3,12 +3,17 @@ from ddt import data, ddt, unpack
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import Permission
 from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.test import override_settings
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APITestCase
 
+from ralph.lib.permissions.cache import allowed_fields_shared_cache
+from ralph.lib.permissions.models import allowed_fields_shared_cache_stats
 from ralph.lib.permissions.tests._base import PermissionsTestMixin
 from ralph.lib.permissions.tests.models import Foo
+from ralph.tests.mixins import BenchmarkMixin
 
 
 class PermissionsForObjectTests(PermissionsTestMixin, APITestCase):
@@ -90,6 +95,51 @@ class PermissionsPerFieldTests(PermissionsTestMixin, APITestCase):
         self.assertEqual(self.article_1.custom_field_1, 'test value')
 
 
+@override_settings(USE_CACHE=True)
+class AllowedFieldsSharedCacheAPITests(
+    PermissionsTestMixin, BenchmarkMixin, APITestCase
+):
+    requests_count = 20
+
+    def setUp(self):
+        self._create_users_and_articles()
+        cache.clear()
+        allowed_fields_shared_cache.clear_local()
+        allowed_fields_shared_cache_stats.reset()
+
+    def _get(self, url, user):
+        # user is fetched from database in every request
+        self.client.force_authenticate(
+            get_user_model().objects.get(pk=user.pk)
+        )
+        response = self.client.get(url, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response
+
+    def test_cold_and_warm_requests(self):
+        url = reverse('test-api:article-list')
+        with self.benchmark('allowed fields cold cache', self.requests_count):
+            for _ in range(self.requests_count):
+                cache.clear()
+                allowed_fields_shared_cache.clear_local()
+                cold_response = self._get(url, self.user2)
+        allowed_fields_shared_cache_stats.reset()
+        with self.benchmark('allowed fields warm cache', self.requests_count):
+            for _ in range(self.requests_count):
+                warm_response = self._get(url, self.user2)
+        self.assertEqual(cold_response.data, warm_response.data)
+        self.assertEqual(allowed_fields_shared_cache_stats.misses, 0)
+        self.assertGreater(allowed_fields_shared_cache_stats.hits, 0)
+
+    def test_user_sees_fields_allowed_for_his_permissions(self):
+        url = reverse('test-api:article-detail', args=(self.article_1.id,))
+        # warm up cache by user with access to custom_field_1
+        response = self._get(url, self.user2)
+        self.assertIn('custom_field_1', response.data)
+        response = self._get(url, self.user1)
+        self.assertNotIn('custom_field_1', response.data)
+
+
 @ddt
 class RalphPermissionsTests(APITestCase):
     @classmethod
@@ -1,10 +1,27 @@
+from unittest.mock import call, patch
+
 from django.contrib.auth import get_user_model
-from django.contrib.auth.models import Permission
-from django.test import RequestFactory, TestCase
+from django.contrib.auth.models import Group, Permission
+from django.core.cache import cache
+from django.test import (
+    override_settings,
+    RequestFactory,
+    SimpleTestCase,
+    TestCase
+)
 
 from ralph.assets.models.assets import AssetModel
 from ralph.assets.models.choices import ObjectModelType
-from ralph.lib.permissions.models import get_perm_key
+from ralph.lib.permissions.cache import (
+    allowed_fields_shared_cache,
+    get_permissions_digest
+)
+from ralph.lib.permissions.models import (
+    allowed_fields_cache_stats,
+    allowed_fields_shared_cache_stats,
+    AllowedFieldsCacheStats,
+    get_perm_key
+)
 
 
 class PermissionsByFieldTestCase(TestCase):
@@ -115,3 +132,220 @@ class PermissionsByFieldTestCase(TestCase):
             'manufacturer',
             fields_list
         )
+
+    def _get_fresh_user(self, user):
+        # user fetched from database (as in every request) has empty cache
+        return get_user_model().objects.get(pk=user.pk)
+
+    def test_allowed_fields_are_memoized_for_user(self):
+        user = self._get_fresh_user(self.user)
+        allowed_fields_cache_stats.reset()
+        fields_list = self.asset_model.allowed_fields(user, action='change')
+        with patch.object(user, 'has_perm') as has_perm_mock:
+            for _ in range(3):
+                self.assertEqual(
+                    self.asset_model.allowed_fields(user, action='change'),
+                    fields_list
+                )
+            self.assertTrue(
+                self.asset_model.has_access_to_field(
+                    'height_of_device', user, 'change'
+                )
+            )
+        has_perm_mock.assert_not_called()
+        self.assertEqual(allowed_fields_cache_stats.misses, 1)
+        self.assertEqual(allowed_fields_cache_stats.hits, 4)
+        self.assertEqual(allowed_fields_cache_stats.hit_rate, 0.8)
+
+    def test_allowed_fields_are_memoized_per_model_and_action(self):
+        user = self._get_fresh_user(self.user)
+        allowed_fields_cache_stats.reset()
+        self.assertEqual(
+            self.asset_model.allowed_fields(user, action='view'),
+            {'height_of_device'}
+        )
+        self.assertEqual(
+            self.asset_model.allowed_fields(user, action='change'),
+            {'height_of_device'}
+        )
+        # view -> miss (and miss for change inside), change -> hit
+        self.assertEqual(allowed_fields_cache_stats.misses, 2)
+        self.assertEqual(allowed_fields_cache_stats.hits, 1)
+
+    def test_allowed_fields_are_not_shared_between_users(self):
+        user = self._get_fresh_user(self.user)
+        super_user = self._get_fresh_user(self.super_user)
+        self.assertEqual(
+            self.asset_model.allowed_fields(user, action='change'),
+            {'height_of_device'}
+        )
+        self.assertIn(
+            'manufacturer',
+            self.asset_model.allowed_fields(super_user, action='change')
+        )
+
+    def test_allowed_fields_respects_superuser_flag_change(self):
+        user = self._get_fresh_user(self.user)
+        self.assertNotIn(
+            'manufacturer',
+            self.asset_model.allowed_fields(user, action='change')
+        )
+        user.is_superuser = True
+        self.assertIn(
+            'manufacturer',
+            self.asset_model.allowed_fields(user, action='change')
+        )
+
+
+@override_settings(USE_CACHE=True)
+@patch('ralph.lib.permissions.models.statsd')
+class AllowedFieldsCacheStatsTestCase(SimpleTestCase):
+    def setUp(self):
+        self.stats = AllowedFieldsCacheStats('cache')
+        self.stats.report_every = 3
+
+    def test_stats_are_reported_every_n_calls(self, statsd_mock):
+        self.stats.hit()
+        self.stats.miss()
+        statsd_mock.incr.assert_not_called()
+        self.stats.hit()
+        statsd_mock.incr.assert_has_calls(
+            [call('cache.hit', 2), call('cache.miss', 1)]
+        )
+        self.assertEqual(statsd_mock.incr.call_count, 2)
+        self.assertEqual(self.stats.hits, 2)
+
+    def test_report_sends_only_collected_counts(self, statsd_mock):
+        self.stats.miss()
+        self.stats.report()
+        self.stats.report()
+        statsd_mock.incr.assert_called_once_with('cache.miss', 1)
+
+
+class AllowedFieldsSharedCacheTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        allowed_fields_shared_cache.clear_local()
+        allowed_fields_shared_cache_stats.reset()
+        self.asset_model = AssetModel.objects.create(
+            type=ObjectModelType.back_office
+        )
+        self.permission = Permission.objects.get(
+            codename='change_assetmodel_height_of_device_field',
+        )
+        self.user_1 = get_user_model().objects.create(username='user1')
+        self.user_2 = get_user_model().objects.create(username='user2')
+        self.group = Group.objects.create(name='assets')
+        for user in (self.user_1, self.user_2):
+            user.user_permissions.add(self.permission)
+
+    def _get_fresh_user(self, user):
+        return get_user_model().objects.get(pk=user.pk)
+
+    def test_digest_is_the_same_for_users_with_the_same_permissions(self):
+        self.assertEqual(
+            get_permissions_digest(self._get_fresh_user(self.user_1)),
+            get_permissions_digest(self._get_fresh_user(self.user_2)),
+        )
+
+    def test_digest_changes_with_superuser_flag(self):
+        user = self._get_fresh_user(self.user_1)
+        digest = get_permissions_digest(user)
+        user.is_superuser = True
+        self.assertNotEqual(get_permissions_digest(user), digest)
+
+    def test_allowed_fields_are_shared_between_users(self):
+        self.asset_model.allowed_fields(
+            self._get_fresh_user(self.user_1), 'change'
+        )
+        user_2 = self._get_fresh_user(self.user_2)
+        get_permissions_digest(user_2)
+        with patch.object(user_2, 'has_perm') as has_perm_mock:
+            self.assertEqual(
+                self.asset_model.allowed_fields(user_2, 'change'),
+                {'height_of_device'}
+            )
+        has_perm_mock.assert_not_called()
+        self.assertEqual(allowed_fields_shared_cache_stats.misses, 1)
+        self.assertEqual(allowed_fields_shared_cache_stats.hits, 1)
+
+    def test_allowed_fields_are_taken_from_django_cache(self):
+        self.asset_model.allowed_fields(
+            self._get_fresh_user(self.user_1), 'change'
+        )
+        # simulate another process
+        allowed_fields_shared_cache.clear_local()
+        self.assertEqual(
+            self.asset_model.allowed_fields(
+                self._get_fresh_user(self.user_2), 'change'
+            ),
+            {'height_of_device'}
+        )
+        self.assertEqual(allowed_fields_shared_cache_stats.hits, 1)
+
+    def test_allowed_fields_are_not_shared_between_different_permissions(self):
+        self.asset_model.allowed_fields(
+            self._get_fresh_user(self.user_1), 'change'
+        )
+        self.assertEqual(
+            self.asset_model.allowed_fields(
+                self._get_fresh_user(self.user_2), 'view'
+            ),
+            {'height_of_device'}
+        )
+        user_3 = get_user_model().objects.create(username='user3')
+        self.assertEqual(
+            self.asset_model.allowed_fields(user_3, 'change'), set()
+        )
+        self.assertEqual(allowed_fields_shared_cache_stats.misses, 3)
+
+    def test_allowed_fields_change_with_group_permissions(self):
+        self.user_1.groups.add(self.group)
+        self.assertNotIn(
+            'name',
+            self.asset_model.allowed_fields(
+                self._get_fresh_user(self.user_1), 'change'
+            )
+        )
+        self.group.permissions.add(
+            Permission.objects.get(codename='change_assetmodel_name_field')
+        )
+        self.assertIn(
+            'name',
+            self.asset_model.allowed_fields(
+                self._get_fresh_user(self.user_1), 'change'
+            )
+        )
+        # user without group is not affected
+        self.assertNotIn(
+            'name',
+            self.asset_model.allowed_fields(
+                self._get_fresh_user(self.user_2), 'change'
+            )
+        )
+
+    def test_memoized_permissions_are_cleared_on_group_change(self):
+        self.group.permissions.add(
+            Permission.objects.get(codename='change_assetmodel_name_field')
+        )
+        user = self._get_fresh_user(self.user_1)
+        self.assertNotIn(
+            'name', self.asset_model.allowed_fields(user, 'change')
+        )
+        user.groups.add(self.group)
+        self.assertIn('name', self.asset_model.allowed_fields(user, 'change'))
+        user.groups.remove(self.group)
+        self.assertNotIn(
+            'name', self.asset_model.allowed_fields(user, 'change')
+        )
+
+    @override_settings(USE_CACHE=False)
+    def test_shared_cache_is_not_used_when_cache_is_disabled(self):
+        self.asset_model.allowed_fields(
+            self._get_fresh_user(self.user_1), 'change'
+        )
+        self.asset_model.allowed_fields(
+            self._get_fresh_user(self.user_2), 'change'
+        )
+        self.assertEqual(allowed_fields_shared_cache_stats.misses, 0)
+        self.assertEqual(allowed_fields_shared_cache_stats.hits, 0)
@@ -13,16 +13,70 @@ Example:
     ]
 """
 from collections import defaultdict
+from functools import lru_cache
 from itertools import groupby
-from typing import Dict, Iterable, List, Tuple
+from typing import Dict, Iterable, List, Optional, Set, Tuple
 
 from django.conf import settings
 from django.contrib.contenttypes.models import ContentType
 from django.core import exceptions
 from django.db import models
-from django.db.models import QuerySet
+from django.db.models import prefetch_related_objects, QuerySet
 from django.db.models.base import ModelBase
 
+# Number of descendant models fetched together (joined to the base model
+# table) in a single query. Set to 1 to fetch every content type separately.
+DEFAULT_MODELS_PER_QUERY = 10
+# Maximum number of tables used by a single query fetching descendants of
+# multiple models (MySQL refuses to join more than 61 tables). Descendant
+# models are split between more queries to stay below this limit.
+MAX_TABLES_PER_QUERY = 40
+
+
+@lru_cache(maxsize=None)
+def get_descendant_links(
+    root: ModelBase, model: ModelBase
+) -> Optional[Tuple[models.OneToOneField, ...]]:
+    """
+    Return parent links leading from `root` model down to `model` (ordered
+    from the root), or None if `model` does not inherit from `root` through
+    concrete parents.
+    """
+    links = []
+    while model is not root:
+        for parent, link in model._meta.parents.items():
+            if link is not None and issubclass(parent, root):
+                links.insert(0, link)
+                model = parent
+                break
+        else:
+            return None
+    return tuple(links)
+
+
+def _get_tables_count(queryset: QuerySet) -> int:
+    """
+    Return number of tables (including joined ones) used by the queryset.
+    """
+    query = queryset.query.clone()
+    # joins of select related are set up when query is compiled
+    query.get_compiler(queryset.db).as_sql()
+    return len(query.extra_tables) + sum(
+        1 for alias in query.alias_map if query.alias_refcount[alias]
+    )
+
+
+def _select_related_paths(select_related, prefix='') -> List[str]:
+    """
+    Flatten nested `query.select_related` dict to list of lookups.
+    """
+    paths = []
+    for name, nested in select_related.items():
+        path = prefix + name
+        paths.append(path)
+        paths.extend(_select_related_paths(nested, path + '__'))
+    return paths
+
 
 class PolymorphicQuerySet(models.QuerySet):
     def __init__(self, *args, **kwargs):
@@ -36,6 +90,7 @@ class PolymorphicQuerySet(models.QuerySet):
         self._polymorphic_filter_kwargs = {}
         self._my_cache = None
         self._pks_order = None
+        self._polymorphic_models_per_query = None
         super().__init__(*args, **kwargs)
 
     def _fetch_all(self):
@@ -63,33 +118,194 @@ class PolymorphicQuerySet(models.QuerySet):
         )  # type: Iterable[Tuple[int, object]]
         self._my_cache = self._subquery_for_children_models(result)
 
+    def _get_models_per_query(self) -> int:
+        if self._polymorphic_models_per_query is not None:
+            return self._polymorphic_models_per_query
+        return getattr(
+            settings, 'POLYMORPHIC_MODELS_PER_QUERY', DEFAULT_MODELS_PER_QUERY
+        )
+
+    def _can_join_descendant(self, model: ModelBase) -> bool:
+        """
+        Check if descendant model could be fetched in a query together with
+        other descendants (by joining its table to the base model table).
+
+        Polymorphic filters are applied separately to every descendant model
+        (models without filtered field are skipped), so they still require
+        separate query per model.
+        """
+        return (
+            not self._polymorphic_filter_args and
+            not self._polymorphic_filter_kwargs and
+            self._select_related is not True and
+            get_descendant_links(
+                self.model._meta.concrete_model, model
+            ) is not None
+        )
+
     def _subquery_for_children_models(self, result) -> Dict[int, List[object]]:
         result_mapping = defaultdict(list)
+        models_per_query = self._get_models_per_query()
+        joined_models = []  # type: List[Tuple[int, ModelBase, Set[int]]]
         for ct_id, objects_of_type in result:
             content_type = ContentType.objects.get_for_id(id=ct_id)
             model = content_type.model_class()
             polymorphic_models = getattr(model, "_polymorphic_models", [])
             if not (polymorphic_models and model not in polymorphic_models):
                 continue
-            model_name = model._meta.object_name
             ids = {obj.id for obj in objects_of_type}  # type: set[int]
-            model_query = model.objects.filter(pk__in=ids)
-            model_query = self._add_select_related_to_subquery(model_query)
-            model_query = self._add_polymorphic_select_related_to_subquery(
-                model_query, model_name
-            )
-            model_query = self._add_polymorphic_prefetch_related_to_subquery(
-                model_query, model_name
+            if models_per_query > 1 and self._can_join_descendant(model):
+                joined_models.append((ct_id, model, ids))
+            else:
+                self._fetch_descendant_model(model, ids, result_mapping)
+        for batch, joined_query in self._split_joined_models(
+            joined_models, models_per_query
+        ):
+            if joined_query is None:
+                for _, model, ids in batch:
+                    self._fetch_descendant_model(model, ids, result_mapping)
+            else:
+                self._fetch_joined_descendant_models(
+                    *joined_query, result_mapping
+                )
+        return result_mapping
+
+    def _split_joined_models(
+        self,
+        joined_models: List[Tuple[int, ModelBase, Set[int]]],
+        models_per_query: int
+    ):
+        """
+        Split descendant models into batches fetched in a single query each.
+
+        Batch is limited by the number of models and by the number of tables
+        used by its query (`MAX_TABLES_PER_QUERY`) - every model adds its
+        parent links and (prefixed) select related to it. Yield pairs of batch
+        and its query (see `_get_joined_descendant_models_query`) - query is
+        None when even single model exceeds the limit (it's fetched directly
+        from the descendant model then).
+        """
+        batch, batch_query = [], None
+        for entry in joined_models:
+            if len(batch) < models_per_query:
+                query = self._get_joined_descendant_models_query(
+                    batch + [entry]
+                )
+                if _get_tables_count(query[0]) <= MAX_TABLES_PER_QUERY:
+                    batch, batch_query = batch + [entry], query
+                    continue
+            if batch:
+                yield batch, batch_query
+            batch = [entry]
+            batch_query = self._get_joined_descendant_models_query(batch)
+            if _get_tables_count(batch_query[0]) > MAX_TABLES_PER_QUERY:
+                yield batch, None
+                batch, batch_query = [], None
+        if batch:
+            yield batch, batch_query
+
+    def _fetch_descendant_model(
+        self, model: ModelBase, ids: Set[int], result_mapping
+    ):
+        model_name = model._meta.object_name
+        model_query = model.objects.filter(pk__in=ids)
+        model_query = self._add_select_related_to_subquery(model_query)
+        model_query = self._add_polymorphic_select_related_to_subquery(
+            model_query, model_name
+        )
+        model_query = self._add_polymorphic_prefetch_related_to_subquery(
+            model_query, model_name
+        )
+        model_query = self._add_polymorphic_filter_to_subquery(model_query)
+        model_query = model_query.annotate(
+            *self._annotate_args, **self._annotate_kwargs
+        )
+        model_query = self._add_extra_to_subquery(model_query)
+
+        for obj in model_query:
+            result_mapping[obj.pk].append(obj)
+
+    def _get_joined_descendant_models_query(
+        self, models_with_ids: List[Tuple[int, ModelBase, Set[int]]]
+    ) -> Tuple[QuerySet, Dict[int, Tuple[models.OneToOneField, ...]]]:
+        """
+        Return query fetching objects of multiple descendant models and
+        parent links leading to every model (by content type).
+
+        Query is made on the base model with descendant models tables joined
+        (using select related through parent links). Select related and
+        polymorphic select related are prefixed with the path to descendant
+        model.
+        """
+        root = self.model._meta.concrete_model
+        base_select_related = _select_related_paths(self._select_related or {})
+        ids = set()
+        links_by_ct = {}
+        select_related = []
+        for ct_id, model, model_ids in models_with_ids:
+            ids |= model_ids
+            links = get_descendant_links(root, model)
+            links_by_ct[ct_id] = links
+            prefix = '__'.join(link.related_query_name() for link in links)
+            if prefix:
+                select_related.append(prefix)
+                prefix += '__'
+            model_select_related = base_select_related + list(
+                self._polymorphic_select_related.get(
+                    model._meta.object_name, []
+                )
             )
-            model_query = self._add_polymorphic_filter_to_subquery(model_query)
-            model_query = model_query.annotate(
-                *self._annotate_args, **self._annotate_kwargs
+            select_related.extend(
+                prefix + path for path in model_select_related
             )
-            model_query = self._add_extra_to_subquery(model_query)
+        query = root.objects.filter(pk__in=ids)
+        if select_related:
+            query = query.select_related(*select_related)
+        query = query.annotate(*self._annotate_args, **self._annotate_kwargs)
+        query = self._add_extra_to_subquery(query)
+        return query, links_by_ct
+
+    def _fetch_joined_descendant_models(
+        self,
+        query: QuerySet,
+        links_by_ct: Dict[int, Tuple[models.OneToOneField, ...]],
+        result_mapping
+    ):
+        """
+        Fetch objects of multiple descendant models in a single query (see
+        `_get_joined_descendant_models_query`).
 
-            for obj in model_query:
-                result_mapping[obj.pk].append(obj)
-        return result_mapping
+        Annotations and extra fields are copied from the base object to the
+        descendant one and polymorphic prefetch related is applied to
+        fetched descendants of each model.
+        """
+        copied_attrs = list(query.query.annotation_select) + list(
+            query.query.extra_select
+        )
+
+        descendants_by_model = defaultdict(list)
+        for obj in query:
+            descendant = obj
+            try:
+                for link in links_by_ct[obj.content_type_id]:
+                    descendant = getattr(
+                        descendant, link.remote_field.get_accessor_name()
+                    )
+            except exceptions.ObjectDoesNotExist:
+                # descendant row is missing - skip it, the same as when
+                # querying descendant model directly
+                continue
+            for attr in copied_attrs:
+                setattr(descendant, attr, getattr(obj, attr))
+            descendants_by_model[descendant._meta.model].append(descendant)
+            result_mapping[obj.pk].append(descendant)
+
+        for model, descendants in descendants_by_model.items():
+            prefetch_related = self._polymorphic_prefetch_related.get(
+                model._meta.object_name
+            )
+            if prefetch_related:
+                prefetch_related_objects(descendants, *prefetch_related)
 
     def _add_select_related_to_subquery(self, query: QuerySet):
         if self._select_related:
@@ -257,6 +473,7 @@ class PolymorphicQuerySet(models.QuerySet):
         clone._extra_kwargs = self._extra_kwargs.copy()
         clone._polymorphic_filter_args = self._polymorphic_filter_args.copy()
         clone._polymorphic_filter_kwargs = self._polymorphic_filter_kwargs.copy()
+        clone._polymorphic_models_per_query = self._polymorphic_models_per_query
         clone._my_cache = self._my_cache.clone() if self._my_cache else None
         clone._pks_order = self._pks_order.clone() if self._pks_order else None
         return clone
@@ -294,6 +511,19 @@ class PolymorphicQuerySet(models.QuerySet):
         obj._polymorphic_prefetch_related = kwargs
         return obj
 
+    def polymorphic_models_per_query(self, models_per_query):
+        """
+        Set how many descendant models could be fetched in a single query
+        (overrides `POLYMORPHIC_MODELS_PER_QUERY` setting). Page of objects
+        of N different types is then fetched in
+        1 + ceil(N / models_per_query) queries. Usage:
+
+        >>> MyBaseModel.polymorphic_objects.polymorphic_models_per_query(5)
+        """
+        obj = self._clone()
+        obj._polymorphic_models_per_query = models_per_query
+        return obj
+
     def polymorphic_filter(self, *args, **kwargs):
         """
         Extra filter for descendant model
@@ -0,0 +1,212 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 2.0.13 on 2026-10-17 10:12
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.db.models.manager
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('polymorphic_tests', '0004_auto_20240924_1142'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PolymorphicBenchmarkModel1',
+            fields=[
+                ('polymorphicmodelbasetest_ptr', models.OneToOneField(auto_created=True, on_delete=django.db.models.deletion.CASCADE, parent_link=True, primary_key=True, serialize=False, to='polymorphic_tests.PolymorphicModelBaseTest')),
+            ],
+            options={
+                'abstract': False,
+            },
+            bases=('polymorphic_tests.polymorphicmodelbasetest',),
+            managers=[
+                ('polymorphic_objects', django.db.models.manager.Manager()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='PolymorphicBenchmarkModel2',
+            fields=[
+                ('polymorphicmodelbasetest_ptr', models.OneToOneField(auto_created=True, on_delete=django.db.models.deletion.CASCADE, parent_link=True, primary_key=True, serialize=False, to='polymorphic_tests.PolymorphicModelBaseTest')),
+            ],
+            options={
+                'abstract': False,
+            },
+            bases=('polymorphic_tests.polymorphicmodelbasetest',),
+            managers=[
+                ('polymorphic_objects', django.db.models.manager.Manager()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='PolymorphicBenchmarkModel3',
+            fields=[
+                ('polymorphicmodelbasetest_ptr', models.OneToOneField(auto_created=True, on_delete=django.db.models.deletion.CASCADE, parent_link=True, primary_key=True, serialize=False, to='polymorphic_tests.PolymorphicModelBaseTest')),
+            ],
+            options={
+                'abstract': False,
+            },
+            bases=('polymorphic_tests.polymorphicmodelbasetest',),
+            managers=[
+                ('polymorphic_objects', django.db.models.manager.Manager()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='PolymorphicBenchmarkModel4',
+            fields=[
+                ('polymorphicmodelbasetest_ptr', models.OneToOneField(auto_created=True, on_delete=django.db.models.deletion.CASCADE, parent_link=True, primary_key=True, serialize=False, to='polymorphic_tests.PolymorphicModelBaseTest')),
+            ],
+            options={
+                'abstract': False,
+            },
+            bases=('polymorphic_tests.polymorphicmodelbasetest',),
+            managers=[
+                ('polymorphic_objects', django.db.models.manager.Manager()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='PolymorphicBenchmarkModel5',
+            fields=[
+                ('polymorphicmodelbasetest_ptr', models.OneToOneField(auto_created=True, on_delete=django.db.models.deletion.CASCADE, parent_link=True, primary_key=True, serialize=False, to='polymorphic_tests.PolymorphicModelBaseTest')),
+            ],
+            options={
+                'abstract': False,
+            },
+            bases=('polymorphic_tests.polymorphicmodelbasetest',),
+            managers=[
+                ('polymorphic_objects', django.db.models.manager.Manager()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='PolymorphicBenchmarkModel6',
+            fields=[
+                ('polymorphicmodelbasetest_ptr', models.OneToOneField(auto_created=True, on_delete=django.db.models.deletion.CASCADE, parent_link=True, primary_key=True, serialize=False, to='polymorphic_tests.PolymorphicModelBaseTest')),
+            ],
+            options={
+                'abstract': False,
+            },
+            bases=('polymorphic_tests.polymorphicmodelbasetest',),
+            managers=[
+                ('polymorphic_objects', django.db.models.manager.Manager()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='PolymorphicBenchmarkModel7',
+            fields=[
+                ('polymorphicmodelbasetest_ptr', models.OneToOneField(auto_created=True, on_delete=django.db.models.deletion.CASCADE, parent_link=True, primary_key=True, serialize=False, to='polymorphic_tests.PolymorphicModelBaseTest')),
+            ],
+            options={
+                'abstract': False,
+            },
+            bases=('polymorphic_tests.polymorphicmodelbasetest',),
+            managers=[
+                ('polymorphic_objects', django.db.models.manager.Manager()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='PolymorphicBenchmarkModel8',
+            fields=[
+                ('polymorphicmodelbasetest_ptr', models.OneToOneField(auto_created=True, on_delete=django.db.models.deletion.CASCADE, parent_link=True, primary_key=True, serialize=False, to='polymorphic_tests.PolymorphicModelBaseTest')),
+            ],
+            options={
+                'abstract': False,
+            },
+            bases=('polymorphic_tests.polymorphicmodelbasetest',),
+            managers=[
+                ('polymorphic_objects', django.db.models.manager.Manager()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='PolymorphicBenchmarkModel9',
+            fields=[
+                ('polymorphicmodelbasetest_ptr', models.OneToOneField(auto_created=True, on_delete=django.db.models.deletion.CASCADE, parent_link=True, primary_key=True, serialize=False, to='polymorphic_tests.PolymorphicModelBaseTest')),
+            ],
+            options={
+                'abstract': False,
+            },
+            bases=('polymorphic_tests.polymorphicmodelbasetest',),
+            managers=[
+                ('polymorphic_objects', django.db.models.manager.Manager()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='PolymorphicBenchmarkModel10',
+            fields=[
+                ('polymorphicmodelbasetest_ptr', models.OneToOneField(auto_created=True, on_delete=django.db.models.deletion.CASCADE, parent_link=True, primary_key=True, serialize=False, to='polymorphic_tests.PolymorphicModelBaseTest')),
+            ],
+            options={
+                'abstract': False,
+            },
+            bases=('polymorphic_tests.polymorphicmodelbasetest',),
+            managers=[
+                ('polymorphic_objects', django.db.models.manager.Manager()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='PolymorphicBenchmarkModel11',
+            fields=[
+                ('polymorphicmodelbasetest_ptr', models.OneToOneField(auto_created=True, on_delete=django.db.models.deletion.CASCADE, parent_link=True, primary_key=True, serialize=False, to='polymorphic_tests.PolymorphicModelBaseTest')),
+            ],
+            options={
+                'abstract': False,
+            },
+            bases=('polymorphic_tests.polymorphicmodelbasetest',),
+            managers=[
+                ('polymorphic_objects', django.db.models.manager.Manager()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='PolymorphicBenchmarkModel12',
+            fields=[
+                ('polymorphicmodelbasetest_ptr', models.OneToOneField(auto_created=True, on_delete=django.db.models.deletion.CASCADE, parent_link=True, primary_key=True, serialize=False, to='polymorphic_tests.PolymorphicModelBaseTest')),
+            ],
+            options={
+                'abstract': False,
+            },
+            bases=('polymorphic_tests.polymorphicmodelbasetest',),
+            managers=[
+                ('polymorphic_objects', django.db.models.manager.Manager()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='PolymorphicBenchmarkModel13',
+            fields=[
+                ('polymorphicmodelbasetest_ptr', models.OneToOneField(auto_created=True, on_delete=django.db.models.deletion.CASCADE, parent_link=True, primary_key=True, serialize=False, to='polymorphic_tests.PolymorphicModelBaseTest')),
+            ],
+            options={
+                'abstract': False,
+            },
+            bases=('polymorphic_tests.polymorphicmodelbasetest',),
+            managers=[
+                ('polymorphic_objects', django.db.models.manager.Manager()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='PolymorphicBenchmarkModel14',
+            fields=[
+                ('polymorphicmodelbasetest_ptr', models.OneToOneField(auto_created=True, on_delete=django.db.models.deletion.CASCADE, parent_link=True, primary_key=True, serialize=False, to='polymorphic_tests.PolymorphicModelBaseTest')),
+            ],
+            options={
+                'abstract': False,
+            },
+            bases=('polymorphic_tests.polymorphicmodelbasetest',),
+            managers=[
+                ('polymorphic_objects', django.db.models.manager.Manager()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='PolymorphicBenchmarkModel15',
+            fields=[
+                ('polymorphicmodelbasetest_ptr', models.OneToOneField(auto_created=True, on_delete=django.db.models.deletion.CASCADE, parent_link=True, primary_key=True, serialize=False, to='polymorphic_tests.PolymorphicModelBaseTest')),
+            ],
+            options={
+                'abstract': False,
+            },
+            bases=('polymorphic_tests.polymorphicmodelbasetest',),
+            managers=[
+                ('polymorphic_objects', django.db.models.manager.Manager()),
+            ],
+        ),
+    ]
@@ -38,3 +38,15 @@ class SomeM2MModel(models.Model):
     polymorphics = PolymorphicManyToManyField(
         PolymorphicModelBaseTest, related_name="some_m2m"
     )
+
+
+# Descendants used only to check how many queries are made when fetching page
+# of polymorphic objects mixing many different types.
+POLYMORPHIC_BENCHMARK_MODELS = [
+    type(
+        'PolymorphicBenchmarkModel{}'.format(i),
+        (PolymorphicModelBaseTest,),
+        {'__module__': __name__},
+    )
+    for i in range(1, 16)
+]
@@ -1,9 +1,17 @@
 # -*- coding: utf-8 -*-
+from unittest.mock import patch
+
+from ddt import data, ddt, unpack
 from django.contrib.contenttypes.models import ContentType
-from django.test import TestCase
+from django.db import connection
+from django.db.models import F
+from django.test import override_settings, TestCase
+from django.test.utils import CaptureQueriesContext
 
+from ralph.lib.polymorphic import models as polymorphic_models
 from ralph.lib.polymorphic.models import Polymorphic
 from ralph.lib.polymorphic.tests.models import (
+    POLYMORPHIC_BENCHMARK_MODELS,
     PolymorphicModelBaseTest,
     PolymorphicModelTest,
     PolymorphicModelTest2,
@@ -44,12 +52,11 @@ class PolymorphicTestCase(TestCase):
 
     def test_polymorphic_queryset(self):
         result = []
-        with self.assertNumQueries(6):
+        with self.assertNumQueries(5):
             # queries:
             # select PolymorphicModelBaseTest
-            # select PolymorphicModelTest
+            # select PolymorphicModelTest and PolymorphicModelTest2
             # select SomethingRelated (from sth_related) x2
-            # select PolymorphicModelTest2
             # select SomethingRelated (from another_related)
             for item in PolymorphicModelBaseTest.polymorphic_objects.all():
                 result.append(str(item))
@@ -68,11 +75,10 @@ class PolymorphicTestCase(TestCase):
         )
 
     def test_polymorphic_queryset_with_select_related(self):
-        with self.assertNumQueries(3):
+        with self.assertNumQueries(2):
             # queries:
             # select PolymorphicModelBaseTest
-            # select PolymorphicModelTest
-            # select PolymorphicModelTest2
+            # select PolymorphicModelTest and PolymorphicModelTest2
             for (
                 item
             ) in PolymorphicModelBaseTest.polymorphic_objects.polymorphic_select_related(  # noqa
@@ -97,12 +103,11 @@ class PolymorphicTestCase(TestCase):
         sm2mm_1.polymorphics.set([self.pol_1, self.pol_2])
         sm2mm_2 = SomeM2MModel.objects.create(name="def")
         sm2mm_2.polymorphics.set([self.pol_2, self.pol_3])
-        with self.assertNumQueries(4):
-            # 4 queries:
+        with self.assertNumQueries(3):
+            # 3 queries:
             # 1) SomeM2MModel
             # 2) PolymorphicModelBaseTest ids
-            # 3) PolymorphicModelTest based on 3)
-            # 4) PolymorphicModelTest2 based on 3)
+            # 3) PolymorphicModelTest and PolymorphicModelTest2 based on 2)
             result = {
                 sm.name: sm
                 for sm in SomeM2MModel.objects.prefetch_related(
@@ -147,10 +152,10 @@ class PolymorphicTestCaseNew(TestCase):
 
     def test_polymorphics_objects_without_prefetch(self):
         """
-        Iterate over objects then for each find related object resulting in N + 1 (+NUM_OF_TYPES) queries
+        Iterate over objects then for each find related object resulting in N + 1 (+1 for all types) queries
         DON'T DO IT IN PRODUCTION CODE!
         """
-        with self.assertNumQueries(6):
+        with self.assertNumQueries(5):
             (
                 o1,
                 o2,
@@ -163,9 +168,9 @@ class PolymorphicTestCaseNew(TestCase):
     def test_polymorphics_objects_with_select_related(self):
         """
         Select related objects in both models.
-        Resulting in 1 + NUM_MODELS queries (base query + separate query for each descendant model)
+        Resulting in 2 queries (base query + single query for all descendant models)
         """
-        with self.assertNumQueries(3):
+        with self.assertNumQueries(2):
             o1, o2, o3 = [
                 obj
                 for obj in PolymorphicModelBaseTest.polymorphic_objects.polymorphic_select_related(
@@ -180,10 +185,10 @@ class PolymorphicTestCaseNew(TestCase):
     def test_polymorphics_objects_with_prefetch_related(self):
         """
         Prefetch related objects in both models.
-        Resulting in 1 + NUM_MODELS + NUM_PREFETCHES queries
-        (base query + separate query for each descendant model + separate query for each prefetch)
+        Resulting in 2 + NUM_PREFETCHES queries
+        (base query + single query for all descendant models + separate query for each prefetch)
         """
-        with self.assertNumQueries(5):
+        with self.assertNumQueries(4):
             o1, o2, o3 = [
                 obj
                 for obj in PolymorphicModelBaseTest.polymorphic_objects.polymorphic_prefetch_related(
@@ -219,7 +224,7 @@ class PolymorphicTestCaseNew(TestCase):
         m1.polymorphics.set([z1, z2, z3])
         m2.polymorphics.set([z2, z3, z4])
 
-        with self.assertNumQueries(5):
+        with self.assertNumQueries(4):
             m1_, m2_ = SomeM2MModel.objects.prefetch_related(
                 "polymorphics__sth_related"
             ).all()
@@ -240,3 +245,130 @@ class PolymorphicTestCaseNew(TestCase):
                 ).prefetch_related("sth_related")
             ]
             self.assertEqual(item.sth_related.name, "Rel1")
+
+
+@ddt
+class PolymorphicMixedTypesQueriesTestCase(TestCase):
+    """
+    Number of queries made to fetch page of objects of many descendant types.
+    """
+    objects_per_model = 3
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.sth_related = SomethingRelated.objects.create(name="Rel1")
+        for model in POLYMORPHIC_BENCHMARK_MODELS:
+            for i in range(cls.objects_per_model):
+                model.objects.create(
+                    name="{} {}".format(model.__name__, i),
+                    sth_related=cls.sth_related,
+                )
+
+    def _get_queryset(self, content_types_count):
+        models = POLYMORPHIC_BENCHMARK_MODELS[:content_types_count]
+        content_types = list(
+            ContentType.objects.get_for_models(*models).values()
+        )
+        return PolymorphicModelBaseTest.polymorphic_objects.filter(
+            content_type__in=content_types
+        ), models
+
+    @unpack
+    @data(
+        # content types on page, models per query, queries
+        (1, 10, 2),
+        (5, 10, 2),
+        (15, 10, 3),
+        (1, 5, 2),
+        (5, 5, 2),
+        (15, 5, 4),
+        (1, 1, 2),
+        (5, 1, 6),
+        (15, 1, 16),
+    )
+    def test_mixed_types_page_queries(
+        self, content_types_count, models_per_query, queries_count
+    ):
+        queryset, models = self._get_queryset(content_types_count)
+        with self.assertNumQueries(queries_count):
+            result = list(
+                queryset.polymorphic_models_per_query(models_per_query)
+            )
+        self.assertEqual(
+            len(result), content_types_count * self.objects_per_model
+        )
+        self.assertEqual({type(obj) for obj in result}, set(models))
+
+    @unpack
+    @data((1, 2), (5, 2), (15, 3))
+    @override_settings(POLYMORPHIC_MODELS_PER_QUERY=10)
+    def test_mixed_types_page_queries_from_settings(
+        self, content_types_count, queries_count
+    ):
+        queryset, models = self._get_queryset(content_types_count)
+        with self.assertNumQueries(queries_count):
+            result = list(queryset)
+        self.assertEqual({type(obj) for obj in result}, set(models))
+
+    @unpack
+    @data(
+        # max tables per query, queries
+        # (every model adds its table to the base model table)
+        (6, 4),
+        (16, 2),
+    )
+    def test_mixed_types_page_queries_are_limited_by_tables(
+        self, max_tables, queries_count
+    ):
+        queryset, models = self._get_queryset(15)
+        with patch.object(
+            polymorphic_models, 'MAX_TABLES_PER_QUERY', max_tables
+        ):
+            with CaptureQueriesContext(connection) as queries:
+                result = list(queryset.polymorphic_models_per_query(15))
+        self.assertEqual(len(queries), queries_count)
+        for query in queries.captured_queries[1:]:
+            tables_count = query['sql'].upper().count(' JOIN ') + 1
+            self.assertLessEqual(tables_count, max_tables)
+        self.assertEqual(len(result), 15 * self.objects_per_model)
+        self.assertEqual({type(obj) for obj in result}, set(models))
+
+    def test_mixed_types_page_model_exceeding_tables_limit(self):
+        queryset, models = self._get_queryset(15)
+        with patch.object(polymorphic_models, 'MAX_TABLES_PER_QUERY', 1):
+            # every model is fetched directly from its own table
+            with self.assertNumQueries(16):
+                result = list(queryset.polymorphic_models_per_query(15))
+        self.assertEqual(len(result), 15 * self.objects_per_model)
+        self.assertEqual({type(obj) for obj in result}, set(models))
+
+    @data(1, 15)
+    def test_mixed_types_page_keeps_order(self, models_per_query):
+        queryset, _ = self._get_queryset(15)
+        result = list(
+            queryset.order_by("-name").polymorphic_models_per_query(
+                models_per_query
+            )
+        )
+        self.assertEqual(
+            [obj.name for obj in result],
+            sorted([obj.name for obj in result], reverse=True),
+        )
+
+    def test_mixed_types_page_with_select_related(self):
+        queryset, _ = self._get_queryset(15)
+        with self.assertNumQueries(2):
+            for obj in queryset.select_related(
+                "sth_related"
+            ).polymorphic_models_per_query(15):
+                self.assertEqual(obj.sth_related.name, "Rel1")
+
+    @data(1, 15)
+    def test_mixed_types_page_with_annotation(self, models_per_query):
+        queryset, _ = self._get_queryset(15)
+        result = list(
+            queryset.annotate(
+                related_name=F("sth_related__name")
+            ).polymorphic_models_per_query(models_per_query)
+        )
+        self.assertEqual({obj.related_name for obj in result}, {"Rel1"})
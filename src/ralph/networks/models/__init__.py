@@ -4,7 +4,8 @@ from ralph.networks.models.networks import (
     IPAddress,
     Network,
     NetworkEnvironment,
-    NetworkKind
+    NetworkKind,
+    NoFreeIPError
 )
 
 __all__ = [
@@ -14,4 +15,5 @@ __all__ = [
     'Network',
     'NetworkEnvironment',
     'NetworkKind',
+    'NoFreeIPError',
 ]
@@ -3,15 +3,20 @@ import ipaddress
 import logging
 import socket
 import struct
+from itertools import islice
 
 from django.conf import settings
+from django.core.cache import cache
 from django.core.exceptions import ValidationError
-from django.db import models, transaction
+from django.db import IntegrityError, models, transaction
+from django.db.models import OuterRef, Subquery
 from django.db.models.signals import post_migrate, pre_save
 from django.db.utils import ProgrammingError
 from django.dispatch import receiver
+from django.utils import timezone
 from django.utils.translation import ugettext_lazy as _
 from mptt.models import MPTTModel, TreeForeignKey
+from reversion import revisions as reversion
 
 from ralph.assets.models import AssetLastHostname, Ethernet
 from ralph.dns.dnsaas import DNSaaS
@@ -33,15 +38,66 @@ from ralph.networks.models.choices import IPAddressStatus
 
 logger = logging.getLogger(__name__)
 
+# number of used IP addresses fetched at once when looking for free IPs
+FREE_IP_SEARCH_CHUNK_SIZE = 1000
+# number of reassigned IP addresses added to revision (history) at once
+IPS_HISTORY_CHUNK_SIZE = 1000
+DNSAAS_NOT_FOUND_CACHE_KEY_PREFIX = 'dnsaas:not_found'
 
-def is_in_dnsaas(ip):
+
+class NoFreeIPError(ValidationError):
+    """
+    Raised when there is no free IP to issue in the network.
+    """
+
+
+def _get_dnsaas_not_found_key(ip):
+    return '{}:{}'.format(DNSAAS_NOT_FOUND_CACHE_KEY_PREFIX, ip)
+
+
+def get_ips_in_dnsaas(ips):
+    """
+    Return set of IPs (as strings) from `ips` which have A records in
+    DNSaaS.
+
+    All IPs are checked using single API call. IPs not found in DNSaaS are
+    remembered for a short time (`DNSAAS_NOT_FOUND_CACHE_TIMEOUT`), so they
+    are not checked again by subsequent searches of free IPs.
+    """
     if not settings.ENABLE_DNSAAS_INTEGRATION:
-        return False
+        return set()
+    ips = [str(ip) for ip in ips]
+    if settings.USE_CACHE:
+        not_found = cache.get_many(
+            [_get_dnsaas_not_found_key(ip) for ip in ips]
+        )
+        ips = [
+            ip for ip in ips if _get_dnsaas_not_found_key(ip) not in not_found
+        ]
+    if not ips:
+        return set()
     dnsaas_client = DNSaaS()
     url = dnsaas_client.build_url(
-        'records', get_params=[('ip', ip), ('type', 'A')]
+        'records', get_params=[('type', 'A')] + [('ip', ip) for ip in ips]
     )
-    return len(dnsaas_client.get_api_result(url)) > 0
+    found = set()
+    for record in dnsaas_client.get_api_result(url):
+        try:
+            found.add(str(ipaddress.ip_address(record['content'])))
+        except ValueError:
+            pass
+    found &= set(ips)
+    if settings.USE_CACHE:
+        cache.set_many(
+            {_get_dnsaas_not_found_key(ip): True
+             for ip in ips if ip not in found},
+            settings.DNSAAS_NOT_FOUND_CACHE_TIMEOUT
+        )
+    return found
+
+
+def is_in_dnsaas(ip):
+    return str(ip) in get_ips_in_dnsaas([ip])
 
 
 class NetworkKind(AdminAbsoluteUrlMixin, NamedMixin, models.Model):
@@ -494,34 +550,66 @@ class Network(
         ):
             network.save(update_subnetworks_parent=False)
 
+    def _reassign_ips(self, ips):
+        """
+        Assign IP addresses to the smallest network containing them (the
+        same as IPAddress.save does) using single UPDATE query, no matter how
+        many IPs are affected.
+
+        Only network (and modification time) of IPs is changed, so there is
+        nothing to notify about (neither DNS record nor DC host data contains
+        IP's network), but when there is active revision (ex. network is
+        saved in admin), IPs are added to it to keep their history.
+        """
+        smallest_network = Network.objects.filter(
+            min_ip__lte=OuterRef('number'),
+            max_ip__gte=OuterRef('number'),
+        ).order_by('-min_ip', 'max_ip').values('pk')[:1]
+        keep_history = (
+            reversion.is_active() and reversion.is_registered(IPAddress)
+        )
+        if keep_history:
+            ips_ids = list(ips.values_list('pk', flat=True))
+        ips.update(
+            network=Subquery(smallest_network), modified=timezone.now()
+        )
+        if keep_history:
+            for i in range(0, len(ips_ids), IPS_HISTORY_CHUNK_SIZE):
+                for ip in IPAddress.objects.filter(
+                    pk__in=ips_ids[i:i + IPS_HISTORY_CHUNK_SIZE]
+                ):
+                    reversion.add_to_revision(ip)
+
     def _assign_new_ips_to_network(self):
         """
-        Filter IP addresses in scope of this network and save them, to
-        (possibly) assign them to current network (according to rules in
-        IPAddress.save)
+        Assign IP addresses in scope of this network to it (or to another,
+        smaller network containing them - see `_reassign_ips`).
+
+        IPs already assigned to networks in scope of this network are not
+        affected, since they are assigned to smaller networks already.
         """
-        for ip in IPAddress.objects.exclude(
+        self._reassign_ips(IPAddress.objects.exclude(
             network=self,
         ).exclude(
-            network__in=self.get_subnetworks()
+            network__in=Network.objects.filter(
+                min_ip__gte=self.min_ip, max_ip__lte=self.max_ip
+            ).exclude(pk=self.pk)
         ).filter(
             number__gte=self.min_ip,
             number__lte=self.max_ip
-        ):
-            # call save instead of update - ip might be assigned to another
-            # (smaller) network, which became subnetwork of current network
-            ip.save()
+        ))
 
     def _unassign_ips_from_network(self):
         """
-        Filter IPAddresses which are assigned to current network, but should
-        NOT be (their address is not in scope of current network) and save them
-        (to reassign them to another network).
+        Reassign IPAddresses which are assigned to current network, but should
+        NOT be (their address is not in scope of current network) to another
+        network.
         """
-        for ip in IPAddress.objects.filter(
-            network=self, number__lt=self.min_ip, number__gt=self.max_ip
-        ):
-            ip.save()
+        self._reassign_ips(IPAddress.objects.filter(
+            network=self
+        ).exclude(
+            number__range=(self.min_ip, self.max_ip)
+        ))
 
     def get_subnetworks(self):
         return self.get_descendants()
@@ -529,31 +617,90 @@ class Network(
     def get_immediate_subnetworks(self):
         return self.get_children()
 
-    def get_first_free_ip(self):
-        used_ips = set(IPAddress.objects.filter(
-            number__range=(self.min_ip, self.max_ip)
-        ).values_list(
-            'number', flat=True
-        ))
+    def _get_free_ip_numbers(self):
+        """
+        Yield numbers of free IPs in this network (in ascending order),
+        omitting network address, broadcast address and reserved addresses.
+
+        Used IPs are fetched from database in chunks (ordered by number), so
+        the set of all used IPs in the network is never loaded at once.
+        """
         # add one to omit network address
-        min_ip = int(self.min_ip + 1 + self.reserved_from_beginning)
+        candidate = int(self.min_ip + 1 + self.reserved_from_beginning)
         # subtract 1 to omit broadcast address
         max_ip = int(self.max_ip - 1 - self.reserved_from_end)
-        free_ip_as_int = None
-        for free_ip_as_int in range(min_ip, max_ip + 1):
-            if free_ip_as_int not in used_ips:
-                next_free_ip = ipaddress.ip_address(free_ip_as_int)
-                if is_in_dnsaas(next_free_ip):
+        while candidate <= max_ip:
+            used_ips = list(IPAddress.objects.filter(
+                number__range=(candidate, max_ip)
+            ).order_by('number').values_list(
+                'number', flat=True
+            )[:FREE_IP_SEARCH_CHUNK_SIZE])
+            for used_ip in map(int, used_ips):
+                while candidate < used_ip:
+                    yield candidate
+                    candidate += 1
+                candidate = used_ip + 1
+            if len(used_ips) < FREE_IP_SEARCH_CHUNK_SIZE:
+                break
+        while candidate <= max_ip:
+            yield candidate
+            candidate += 1
+
+    def _get_free_ips(self):
+        """
+        Yield free IPs in this network which are not registered in DNSaaS.
+
+        Free IPs are checked in DNSaaS in windows of
+        `DNSAAS_FREE_IPS_CHECK_WINDOW` IPs (using single API call for each
+        window).
+        """
+        free_ips = map(ipaddress.ip_address, self._get_free_ip_numbers())
+        while True:
+            window = list(
+                islice(free_ips, settings.DNSAAS_FREE_IPS_CHECK_WINDOW)
+            )
+            if not window:
+                return
+            ips_in_dnsaas = get_ips_in_dnsaas(window)
+            for next_free_ip in window:
+                if str(next_free_ip) in ips_in_dnsaas:
                     logger.warning(
                         'IP %s is already in DNS', next_free_ip
                     )
                 else:
-                    return next_free_ip
+                    yield next_free_ip
+
+    def get_first_free_ip(self):
+        return next(self._get_free_ips(), None)
 
     def issue_next_free_ip(self):
-        # TODO: exception when any free IP found
-        ip_address = self.get_first_free_ip()
-        return IPAddress.objects.create(address=str(ip_address))
+        """
+        Create (reserve) first free IP in this network.
+
+        Network row is locked for the time of allocation, so concurrent calls
+        for the same network are serialized. When found IP was meanwhile
+        taken by someone else (ex. created manually or issued from
+        overlapping network), the next free IP is tried.
+
+        Raises:
+            NoFreeIPError: when there is no free IP left in the network
+        """
+        with transaction.atomic():
+            Network.objects.select_for_update().only('pk').get(pk=self.pk)
+            for ip_address in self._get_free_ips():
+                try:
+                    # IPAddressQuerySet.create runs in (nested) atomic block,
+                    # so failed insert is rolled back to savepoint
+                    return IPAddress.objects.create(address=str(ip_address))
+                except IntegrityError:
+                    logger.warning(
+                        'IP %s was issued concurrently, trying next one',
+                        ip_address
+                    )
+        raise NoFreeIPError(
+            _('There is no free IP in network %(network)s'),
+            params={'network': self},
+        )
 
     def search_networks(self):
         """
@@ -1,10 +1,17 @@
+import threading
 from ipaddress import ip_address, ip_network
+from itertools import islice
 from unittest.mock import patch
 
 from ddt import data, ddt, unpack
+from django.core.cache import cache
 from django.core.exceptions import ValidationError
+from django.db import connection
 from django.db.models import F
-from django.test import override_settings, RequestFactory
+from django.test import override_settings, RequestFactory, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from reversion import revisions as reversion
+from reversion.models import Version
 
 from ralph.admin.helpers import CastToInteger
 from ralph.assets.models import AssetLastHostname
@@ -17,13 +24,15 @@ from ralph.data_center.tests.factories import (
 from ralph.networks.admin import NetworkAdmin
 from ralph.networks.filters import NetworkClassFilter
 from ralph.networks.models.choices import IPAddressStatus
-from ralph.networks.models.networks import IPAddress, Network
+from ralph.networks.models.networks import IPAddress, Network, NoFreeIPError
 from ralph.networks.tests.factories import (
     IPAddressFactory,
     NetworkEnvironmentFactory,
     NetworkFactory
 )
 from ralph.tests import RalphTestCase
+from ralph.tests.dnsaas import FakeDNSaaSMixin
+from ralph.tests.mixins import BenchmarkMixin
 from ralph.virtual.tests.factories import VirtualServerFactory
 
 
@@ -226,12 +235,13 @@ class NetworkTest(RalphTestCase):
         self, network_addr, dnsaas_enabled, records, first_free
     ):
 
-        def is_in_dnsaas_mocked(ip):
+        def get_ips_in_dnsaas_mocked(ips):
             if not dnsaas_enabled:
-                return False
-            return str(ip) in records
+                return set()
+            return {str(ip) for ip in ips} & set(records)
         patcher = patch(
-            'ralph.networks.models.networks.is_in_dnsaas', is_in_dnsaas_mocked
+            'ralph.networks.models.networks.get_ips_in_dnsaas',
+            get_ips_in_dnsaas_mocked
         )
         net = Network.objects.create(
             address=network_addr,
@@ -243,6 +253,82 @@ class NetworkTest(RalphTestCase):
             self.assertEqual(net.get_first_free_ip(), first_free)
             patcher.stop()
 
+    @patch('ralph.networks.models.networks.FREE_IP_SEARCH_CHUNK_SIZE', 2)
+    def test_get_first_free_ip_fetches_used_ips_in_chunks(self):
+        net = Network.objects.create(
+            address='192.168.1.0/29', reserved_from_beginning=0,
+            reserved_from_end=0,
+        )
+        for ip in ['192.168.1.1', '192.168.1.2', '192.168.1.3', '192.168.1.5']:
+            IPAddress.objects.create(address=ip)
+        self.assertEqual(net.get_first_free_ip(), ip_address('192.168.1.4'))
+        IPAddress.objects.create(address='192.168.1.4')
+        self.assertEqual(net.get_first_free_ip(), ip_address('192.168.1.6'))
+        IPAddress.objects.create(address='192.168.1.6')
+        self.assertIsNone(net.get_first_free_ip())
+
+    def test_issue_next_free_ip(self):
+        net = Network.objects.create(
+            address='192.168.1.0/29', reserved_from_beginning=0,
+            reserved_from_end=0,
+        )
+        IPAddress.objects.create(address='192.168.1.1')
+        ip = net.issue_next_free_ip()
+        self.assertEqual(ip.address, '192.168.1.2')
+        self.assertEqual(ip.network, net)
+
+    def test_issue_next_free_ip_raises_when_network_is_full(self):
+        net = Network.objects.create(
+            address='192.168.1.0/30', reserved_from_beginning=0,
+            reserved_from_end=0,
+        )
+        IPAddress.objects.create(address='192.168.1.1')
+        IPAddress.objects.create(address='192.168.1.2')
+        with self.assertRaises(NoFreeIPError):
+            net.issue_next_free_ip()
+        self.assertEqual(IPAddress.objects.filter(network=net).count(), 2)
+
+    def test_issue_next_free_ip_raises_when_all_ips_taken_concurrently(self):
+        net = Network.objects.create(
+            address='192.168.1.0/30', reserved_from_beginning=0,
+            reserved_from_end=0,
+        )
+
+        def take_free_ips():
+            # every free IP is created by someone else after it was found
+            for address in ('192.168.1.1', '192.168.1.2'):
+                number = int(ip_address(address))
+                IPAddress.objects.create(number=number)
+                yield number
+
+        with patch.object(net, '_get_free_ip_numbers', take_free_ips):
+            with self.assertRaises(NoFreeIPError):
+                net.issue_next_free_ip()
+        self.assertEqual(IPAddress.objects.filter(network=net).count(), 2)
+
+    def test_issue_next_free_ip_skips_ip_taken_concurrently(self):
+        net = Network.objects.create(
+            address='192.168.1.0/29', reserved_from_beginning=0,
+            reserved_from_end=0,
+        )
+        get_free_ip_numbers = net._get_free_ip_numbers
+
+        def take_first_free_ip():
+            # simulate first free IP created by someone else after it was
+            # found as free
+            numbers = get_free_ip_numbers()
+            number = next(numbers)
+            IPAddress.objects.create(number=number)
+            yield number
+            yield from numbers
+
+        with patch.object(net, '_get_free_ip_numbers', take_first_free_ip):
+            ip = net.issue_next_free_ip()
+        self.assertEqual(ip.address, '192.168.1.2')
+        self.assertTrue(
+            IPAddress.objects.filter(address='192.168.1.1').exists()
+        )
+
     def test_min_and_max_ip_are_assigned(self):
         net = Network.objects.create(
             name='net', address='1.0.0.0/16'
@@ -315,6 +401,64 @@ class NetworkTest(RalphTestCase):
         self.refresh_objects_from_db(ip, sub1, sub2)
         self.assertEqual(ip.network, sub1)
 
+    def _count_queries_of_creating_subnet(self, net_address, ips_count):
+        net = Network.objects.create(name='net', address=net_address)
+        subnet_address = next(net.network.subnets(new_prefix=24))
+        IPAddress.objects.bulk_create([
+            IPAddress(address=str(ip), number=int(ip), network=net)
+            for ip in list(subnet_address.hosts())[:ips_count]
+        ])
+        with CaptureQueriesContext(connection) as queries:
+            subnet = Network.objects.create(
+                name='subnet', address=str(subnet_address)
+            )
+        self.assertEqual(
+            IPAddress.objects.filter(network=subnet).count(), ips_count
+        )
+        return len(queries)
+
+    def test_new_network_reassigns_ips_in_constant_number_of_queries(self):
+        self.assertEqual(
+            self._count_queries_of_creating_subnet('10.30.0.0/16', 5),
+            self._count_queries_of_creating_subnet('10.31.0.0/16', 250),
+        )
+
+    def test_change_network_address_reassigns_ips_to_parent(self):
+        net = Network.objects.create(name='net', address='10.40.0.0/16')
+        subnet = Network.objects.create(name='subnet', address='10.40.1.0/24')
+        ip_in_subnet = IPAddress.objects.create(address='10.40.1.10')
+        ip_in_net = IPAddress.objects.create(address='10.40.2.10')
+        self.assertEqual(ip_in_subnet.network, subnet)
+        self.assertEqual(ip_in_net.network, net)
+
+        subnet.address = '10.40.2.0/24'
+        subnet.save()
+        self.refresh_objects_from_db(ip_in_subnet, ip_in_net)
+        self.assertEqual(ip_in_subnet.network, net)
+        self.assertEqual(ip_in_net.network, subnet)
+
+    def test_delete_network_reassigns_ips_to_parent(self):
+        net = Network.objects.create(name='net', address='10.40.0.0/16')
+        subnet = Network.objects.create(name='subnet', address='10.40.1.0/24')
+        ip = IPAddress.objects.create(address='10.40.1.10')
+        subnet.delete()
+        ip.refresh_from_db()
+        self.assertEqual(ip.network, net)
+
+    def test_reassigned_ips_are_added_to_revision(self):
+        net = Network.objects.create(name='net', address='10.40.0.0/16')
+        ip = IPAddress.objects.create(address='10.40.1.10')
+        with reversion.create_revision():
+            subnet = Network.objects.create(
+                name='subnet', address='10.40.1.0/24'
+            )
+        history = Version.objects.get_for_object(ip)
+        self.assertEqual(len(history), 1)
+        self.assertNotEqual(subnet.pk, net.pk)
+        self.assertIn(
+            '"network": {}'.format(subnet.pk), history[0].serialized_data
+        )
+
     def test_delete_network_shouldnt_delete_related_ip(self):
         net = Network.objects.create(
             name='net', address='192.169.58.0/24'
@@ -733,3 +877,109 @@ class TestNetworkClassFilter(RalphTestCase):
         )
         queryset = filter_.queryset(None, Network.objects.all())
         self.assertEqual(queryset.count(), 2)
+
+
+class IssueNextFreeIPConcurrencyTest(BenchmarkMixin, TransactionTestCase):
+    threads_count = 8
+    ips_per_thread = 20
+
+    def setUp(self):
+        self.net = Network.objects.create(
+            address='10.20.0.0/22', reserved_from_beginning=0,
+            reserved_from_end=0,
+        )
+        IPAddress.objects.create(address='10.20.0.3')
+
+    def _issue_ips(self, results, errors):
+        try:
+            net = Network.objects.get(pk=self.net.pk)
+            for _ in range(self.ips_per_thread):
+                results.append(net.issue_next_free_ip().address)
+        except Exception as e:
+            errors.append(e)
+        finally:
+            connection.close()
+
+    def test_concurrent_issue_next_free_ip_does_not_duplicate_ips(self):
+        results, errors = [], []
+        threads = [
+            threading.Thread(target=self._issue_ips, args=(results, errors))
+            for _ in range(self.threads_count)
+        ]
+        allocations = self.threads_count * self.ips_per_thread
+        with self.benchmark(
+            'issue_next_free_ip with {} threads'.format(self.threads_count),
+            operations=allocations,
+        ) as result:
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(len(results), allocations)
+        self.assertEqual(len(set(results)), allocations)
+        self.assertNotIn('10.20.0.3', results)
+        self.assertEqual(
+            IPAddress.objects.filter(network=self.net).count(),
+            allocations + 1
+        )
+        self.assertGreater(result['per_second'], 0)
+
+
+@override_settings(ENABLE_DNSAAS_INTEGRATION=True)
+class FreeIPDNSaaSCheckTest(FakeDNSaaSMixin, BenchmarkMixin, RalphTestCase):
+    ips_in_dnsaas = 40
+
+    def setUp(self):
+        super().setUp()
+        self.net = Network.objects.create(
+            address='10.30.0.0/24', reserved_from_beginning=0,
+            reserved_from_end=0,
+        )
+        self.server.records = [
+            {
+                'type': 'A', 'name': 'host.mydc.net',
+                'content': '10.30.0.{}'.format(i)
+            } for i in range(1, self.ips_in_dnsaas + 1)
+        ]
+        cache.clear()
+
+    def _get_first_free_ip(self, window):
+        self.server.requests = []
+        with override_settings(DNSAAS_FREE_IPS_CHECK_WINDOW=window):
+            with self.benchmark(
+                'get_first_free_ip (window of {} IPs)'.format(window)
+            ) as result:
+                free_ip = self.net.get_first_free_ip()
+        return free_ip, len(self.server.requests), result['elapsed']
+
+    def test_free_ips_are_checked_in_windows(self):
+        expected_ip = ip_address('10.30.0.{}'.format(self.ips_in_dnsaas + 1))
+        free_ip, requests, elapsed = self._get_first_free_ip(1)
+        self.assertEqual(free_ip, expected_ip)
+        self.assertEqual(requests, self.ips_in_dnsaas + 1)
+        free_ip, window_requests, window_elapsed = self._get_first_free_ip(16)
+        self.assertEqual(free_ip, expected_ip)
+        self.assertEqual(window_requests, 3)
+        self.assertLess(window_elapsed, elapsed)
+
+    def test_ips_in_dnsaas_are_skipped(self):
+        self.server.records.append(
+            {'type': 'A', 'name': 'host.mydc.net', 'content': '10.30.0.43'}
+        )
+        IPAddress.objects.create(address='10.30.0.42')
+        free_ips = list(islice(self.net._get_free_ips(), 3))
+        self.assertEqual(free_ips, [
+            ip_address('10.30.0.41'), ip_address('10.30.0.44'),
+            ip_address('10.30.0.45'),
+        ])
+
+    @override_settings(USE_CACHE=True)
+    def test_ips_not_found_in_dnsaas_are_not_checked_again(self):
+        self.server.records = []
+        free_ip, requests, _ = self._get_first_free_ip(16)
+        self.assertEqual(free_ip, ip_address('10.30.0.1'))
+        self.assertEqual(requests, 1)
+        free_ip, requests, _ = self._get_first_free_ip(16)
+        self.assertEqual(free_ip, ip_address('10.30.0.1'))
+        self.assertEqual(requests, 0)
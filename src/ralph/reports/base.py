@@ -1,5 +1,9 @@
 # -*- coding: utf-8 -*-
-import uuid
+import itertools
+from collections import OrderedDict
+
+# unique (per process) ids of nodes - used as HTML ids in report tree
+_uids = itertools.count()
 
 
 class ReportNode(object):
@@ -12,7 +16,7 @@ class ReportNode(object):
         self.parent = parent
         self.children = []
         self.link = link
-        self.uid = "n{}".format(uuid.uuid1())
+        self.uid = "n{}".format(next(_uids))
 
     def add_child(self, child):
         self.children.append(child)
@@ -44,16 +48,45 @@ class ReportNode(object):
 
 class ReportContainer(list):
     """Container for nodes. This class provides few helpful methods to
-    manipulate on node set."""
+    manipulate on node set.
+
+    Nodes are indexed by name and roots and leaves are tracked when nodes
+    are added, so none of the lookups scans the whole container. Nodes should
+    be added only using `add` or `get_or_create`."""
+    def __init__(self, *args):
+        super().__init__(*args)
+        self._by_name = {}
+        self._roots = OrderedDict()
+        self._leaves = OrderedDict()
+        for node in self:
+            self._index(node)
+
+    def _index(self, node):
+        # first node with given name is returned by `get`
+        self._by_name.setdefault(node.name, node)
+        if node.parent is None:
+            self._roots[node] = None
+        if not node.children:
+            self._leaves[node] = None
+
+    def _append(self, node):
+        self.append(node)
+        self._index(node)
+
+    def _add_child(self, parent, child):
+        parent.add_child(child)
+        self._roots.pop(child, None)
+        self._leaves.pop(parent, None)
+
     def get(self, name):
-        return next((node for node in self if node.name == name), None)
+        return self._by_name.get(name)
 
     def get_or_create(self, name):
         node = self.get(name)
         created = False
         if not node:
             node = ReportNode(name)
-            self.append(node)
+            self._append(node)
             created = True
         return node, created
 
@@ -62,24 +95,46 @@ class ReportContainer(list):
             new_node, created = self.get_or_create(name)
         else:
             new_node = ReportNode(name)
-            self.append(new_node)
+            self._append(new_node)
             created = True
         new_node.count = count
         if parent:
             if not isinstance(parent, ReportNode):
                 parent, __ = self.get_or_create(parent)
         if created:
-            parent.add_child(new_node)
+            self._add_child(parent, new_node)
         new_node.link = link
         return new_node, parent
 
     @property
     def roots(self):
-        return [node for node in self if node.parent is None]
+        return list(self._roots)
 
     @property
     def leaves(self):
-        return [node for node in self if node.children == []]
+        return list(self._leaves)
+
+    def update_counts(self):
+        """Add counts of leaves to all their ancestors.
+
+        Equivalent of calling `update_count` on every leaf, but each node is
+        visited only once.
+        """
+        leaves_counts = {}
+        for root in self._roots:
+            stack = [(root, False)]
+            while stack:
+                node, children_counted = stack.pop()
+                if not node.children:
+                    leaves_counts[node] = node.count
+                elif children_counted:
+                    leaves_counts[node] = sum(
+                        leaves_counts[child] for child in node.children
+                    )
+                    node.add_to_count(leaves_counts[node])
+                else:
+                    stack.append((node, True))
+                    stack.extend((child, False) for child in node.children)
 
     def to_dict(self):
         def traverse(node):
@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+"""
+Background generation of reports (see `ralph.reports.views.ReportDetail`).
+
+Reports are generated on `ralph_async_reports` RQ queue. When the queue is
+not asynchronous (ex. in tests), report is generated in the current process.
+"""
+import csv
+import io
+import logging
+import tempfile
+import uuid
+
+import django_rq
+from django.core.files import File
+from django.db import transaction
+from django.utils import timezone
+
+from ralph.data_center.models.physical import DataCenter
+from ralph.lib.external_services.models import JobStatus
+from ralph.reports.models import ReportResult
+
+logger = logging.getLogger(__name__)
+
+REPORTS_QUEUE_NAME = 'ralph_async_reports'
+# number of CSV rows after which progress of the report is saved
+PROGRESS_UPDATE_INTERVAL = 1000
+
+
+def get_report_class(slug):
+    # imported locally to avoid circular import (views use this module)
+    from ralph.reports.urls import urlpatterns
+    for pattern in urlpatterns:
+        if pattern.name == slug:
+            return pattern.callback.view_class
+    raise ValueError('Report {} not found'.format(slug))
+
+
+def _is_up_to_date(result, refresh):
+    """
+    Return True if result could be returned without checking data used by
+    the report.
+    """
+    if result.in_progress:
+        return True
+    return result.is_finished and not refresh and result.is_checked_recently
+
+
+def get_report_result(report, refresh=False):
+    """
+    Return `ReportResult` of the report for its current params (asset type,
+    data center).
+
+    Report is (re)generated when there is no result yet, when data used by
+    the report changed since the result was generated, when last generation
+    failed (or its job is dead) or when `refresh` is True. Report which is
+    being generated is never requeued (it's requeued after it's finished, if
+    needed) - the previous result is served (as stale) in the meantime.
+
+    Data version (aggregates of all tables used by the report) is calculated
+    only when result is not checked recently (see
+    `settings.REPORTS_DATA_CHECK_INTERVAL`).
+    """
+    key = report.get_result_key()
+    result = ReportResult.objects.filter(key=key).first()
+    if result is not None and _is_up_to_date(result, refresh):
+        return result
+    params = report.get_result_params()
+    data_version = report.get_data_version()
+    now = timezone.now()
+    with transaction.atomic():
+        result, created = ReportResult.objects.select_for_update(
+        ).get_or_create(
+            key=key,
+            defaults={
+                'params': params,
+                'data_version': data_version,
+                'job_started': now,
+                'checked': now,
+            },
+        )
+        enqueue = created or (not result.in_progress and (
+            refresh or not result.is_finished or
+            result.data_version != data_version
+        ))
+        if enqueue and not created:
+            # previous result (and csv) is kept until the new one is
+            # generated
+            result.params = params
+            result.data_version = data_version
+            result.job_id = uuid.uuid4()
+            result.job_started = now
+            result.status = JobStatus.QUEUED.id
+            result.processed = 0
+            result.error = ''
+            result.checked = now
+            result.save()
+        elif not created and not result.in_progress:
+            result.checked = now
+            result.save(update_fields=['checked'])
+    if enqueue:
+        enqueue_report_result(result)
+        result.refresh_from_db()
+    return result
+
+
+def enqueue_report_result(result):
+    queue = django_rq.get_queue(REPORTS_QUEUE_NAME)
+    if not queue.is_async:
+        # run job in current process without touching redis at all
+        generate_report_result(result.job_id)
+        return
+    transaction.on_commit(
+        lambda: queue.enqueue(
+            generate_report_result, kwargs={'job_id': result.job_id}
+        )
+    )
+
+
+def _serialize_nodes(nodes):
+    return [
+        {
+            'uid': node.uid,
+            'name': node.name,
+            'count': node.count,
+            'children': _serialize_nodes(node.children),
+        }
+        for node in nodes
+    ]
+
+
+def _update(job_id, **kwargs):
+    """
+    Update report result, if it wasn't requeued in the meantime.
+    """
+    return ReportResult.objects.filter(job_id=job_id).update(**kwargs)
+
+
+def _generate_csv(report, model, result):
+    processed = 0
+    with tempfile.TemporaryFile() as f:
+        text = io.TextIOWrapper(f, encoding='utf-8', newline='')
+        writer = csv.writer(text)
+        for processed, row in enumerate(report.prepare(model)):
+            writer.writerow(row)
+            if processed and processed % PROGRESS_UPDATE_INTERVAL == 0:
+                _update(result.job_id, processed=processed)
+        # flush and release underlying binary file
+        text.detach()
+        f.seek(0)
+        result.csv.save(report.filename, File(f), save=False)
+    # header is not counted as processed row
+    return processed
+
+
+def generate_report_result(job_id):
+    """
+    Generate report for `ReportResult` queued with given `job_id`.
+    """
+    from ralph.reports.views import CSVReportMixin  # circular import
+    try:
+        result = ReportResult.objects.get(job_id=job_id)
+    except ReportResult.DoesNotExist:
+        logger.info('Report job %s outdated - skipping', job_id)
+        return
+    _update(
+        job_id, status=JobStatus.STARTED.id, job_started=timezone.now()
+    )
+    params = result.params
+    try:
+        report = get_report_class(params['slug'])()
+        model = report.get_model(params['asset_type'])
+        dc = DataCenter.objects.filter(pk=params['dc']).first()
+        if isinstance(report, CSVReportMixin):
+            previous_csv = result.csv.name
+            processed = _generate_csv(report, model, result)
+            if _update(
+                job_id, status=JobStatus.FINISHED.id, processed=processed,
+                csv=result.csv.name, generated=timezone.now()
+            ):
+                if previous_csv:
+                    result.csv.storage.delete(previous_csv)
+            else:
+                result.csv.delete(save=False)
+        else:
+            roots = report.execute(model, dc)
+            _update(
+                job_id, status=JobStatus.FINISHED.id,
+                processed=len(report.report), result=_serialize_nodes(roots),
+                generated=timezone.now()
+            )
+    except Exception as e:
+        logger.exception('Error during generation of report %s', result.key)
+        _update(job_id, status=JobStatus.FAILED.id, error=str(e))
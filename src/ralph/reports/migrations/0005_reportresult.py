@@ -0,0 +1,40 @@
+# Generated by Django 2.0.13 on 2026-10-17 12:00
+
+from django.db import migrations, models
+import django_extensions.db.fields.json
+import ralph.reports.models
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0004_reportlanguage_default'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReportResult',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='date created')),
+                ('modified', models.DateTimeField(auto_now=True, verbose_name='last modified')),
+                ('key', models.CharField(max_length=255, unique=True)),
+                ('params', django_extensions.db.fields.json.JSONField(default=dict)),
+                ('data_version', models.CharField(max_length=32)),
+                ('job_id', models.UUIDField(default=uuid.uuid4)),
+                ('job_started', models.DateTimeField(blank=True, null=True)),
+                ('status', models.PositiveIntegerField(choices=[(1, 'queued'), (2, 'finished'), (3, 'failed'), (4, 'started'), (5, 'frozen'), (6, 'killed')], default=1, verbose_name='job status')),
+                ('processed', models.PositiveIntegerField(default=0)),
+                ('result', django_extensions.db.fields.json.JSONField(blank=True, default=dict)),
+                ('csv', models.FileField(blank=True, null=True, upload_to=ralph.reports.models.get_report_result_file_path)),
+                ('error', models.TextField(blank=True, default='')),
+                ('generated', models.DateTimeField(blank=True, null=True)),
+                ('checked', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'ordering': ('-modified', '-created'),
+                'abstract': False,
+            },
+        ),
+    ]
@@ -1,8 +1,15 @@
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
 from django.core.exceptions import ValidationError
 from django.db import models
+from django.utils import timezone
 from django.utils.translation import ugettext_lazy as _
+from django_extensions.db.fields.json import JSONField
 
 from ralph.attachments.helpers import get_file_path
+from ralph.lib.external_services.models import JobStatus
 from ralph.lib.mixins.models import (
     AdminAbsoluteUrlMixin,
     NamedMixin,
@@ -16,6 +23,12 @@ def get_report_file_path(instance, filename):
     )
 
 
+def get_report_result_file_path(instance, filename):
+    return get_file_path(
+        instance, filename, default_dir='report_results'
+    )
+
+
 class Report(AdminAbsoluteUrlMixin, NamedMixin, TimeStampMixin, models.Model):
     pass
 
@@ -58,3 +71,100 @@ class ReportTemplate(TimeStampMixin, models.Model):
     @property
     def name(self):
         return self.report.name
+
+
+class ReportResult(TimeStampMixin, models.Model):
+    """
+    Result of report (see `ralph.reports.views`) generated in background job.
+
+    Result is stored until data used by the report changes (`data_version`
+    differs) or it's explicitly refreshed by the user. Until the new result
+    is generated, the previous one (if any) is served as stale.
+
+    Data used by the report is checked at most once per
+    `settings.REPORTS_DATA_CHECK_INTERVAL` (see `checked`).
+    """
+    key = models.CharField(max_length=255, unique=True)
+    params = JSONField()
+    data_version = models.CharField(max_length=32)
+    # changed every time the report is (re)queued - job of outdated
+    # generation is not allowed to save its result
+    job_id = models.UUIDField(default=uuid.uuid4)
+    # time when current job was queued (and then started)
+    job_started = models.DateTimeField(blank=True, null=True)
+    status = models.PositiveIntegerField(
+        verbose_name=_('job status'),
+        choices=JobStatus(),
+        default=JobStatus.QUEUED.id,
+    )
+    processed = models.PositiveIntegerField(default=0)
+    result = JSONField(blank=True)
+    csv = models.FileField(
+        upload_to=get_report_result_file_path,
+        blank=True,
+        null=True,
+    )
+    error = models.TextField(blank=True, default='')
+    # time when stored `result` (or `csv`) was generated
+    generated = models.DateTimeField(blank=True, null=True)
+    # time when `data_version` was last compared with the data
+    checked = models.DateTimeField(blank=True, null=True)
+
+    def __str__(self):
+        return '{} ({})'.format(self.key, self.get_status_display())
+
+    @property
+    def is_finished(self):
+        return self.status == JobStatus.FINISHED.id
+
+    @property
+    def is_failed(self):
+        return self.status == JobStatus.FAILED.id
+
+    @property
+    def is_ready(self):
+        return not self.in_progress
+
+    @property
+    def in_progress(self):
+        """
+        Return True if job of the result is queued or running.
+
+        Job which didn't finish within `settings.REPORTS_JOB_TIMEOUT` (ex.
+        worker was killed or job was never enqueued) is treated as dead.
+        """
+        if self.status not in (JobStatus.QUEUED.id, JobStatus.STARTED.id):
+            return False
+        return self.job_started is not None and (
+            self.job_started > timezone.now() - timedelta(
+                seconds=settings.REPORTS_JOB_TIMEOUT
+            )
+        )
+
+    @property
+    def is_checked_recently(self):
+        return self.checked is not None and (
+            self.checked > timezone.now() - timedelta(
+                seconds=settings.REPORTS_DATA_CHECK_INTERVAL
+            )
+        )
+
+    @property
+    def has_result(self):
+        return self.generated is not None
+
+    @property
+    def is_stale(self):
+        """
+        Return True if stored result is not the result of the last job.
+        """
+        return self.has_result and not self.is_finished
+
+    def to_dict(self):
+        return {
+            'status': self.get_status_display(),
+            'processed': self.processed,
+            'ready': self.is_ready,
+            'stale': self.is_stale,
+            'error': self.error,
+        }
@@ -0,0 +1,245 @@
+# -*- coding: utf-8 -*-
+import json
+from datetime import timedelta
+from tempfile import TemporaryDirectory
+from unittest.mock import patch
+
+from django.conf import settings
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from ralph.assets.models.choices import ObjectModelType
+from ralph.assets.tests.factories import (
+    CategoryFactory,
+    DataCenterAssetModelFactory
+)
+from ralph.data_center.tests.factories import DataCenterAssetFactory
+from ralph.lib.external_services.models import JobStatus
+from ralph.reports import jobs
+from ralph.reports.models import ReportResult
+from ralph.reports.views import CategoryModelReport
+from ralph.tests import RalphTestCase
+from ralph.tests.mixins import ClientMixin
+
+
+@override_settings(REPORTS_ASYNC=True)
+class AsyncReportTest(ClientMixin, RalphTestCase):
+    """
+    Reports queue is not asynchronous in tests (see `settings.test`), so
+    reports are generated in the same process (without redis).
+    """
+    def setUp(self):
+        super().setUp()
+        self.login_as_user()
+        tmp_dir = TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        media_settings = override_settings(MEDIA_ROOT=tmp_dir.name)
+        media_settings.enable()
+        self.addCleanup(media_settings.disable)
+        self.model = DataCenterAssetModelFactory(
+            category=CategoryFactory(name='Keyboard'),
+            type=ObjectModelType.data_center,
+            name='Keyboard1',
+        )
+        DataCenterAssetFactory.create_batch(3, model=self.model)
+        self.tree_url = reverse('category_model_report') + '?asset_type=dc'
+        self.csv_url = reverse('asset-relations') + '?asset_type=dc'
+
+    def _get_node(self, nodes, name):
+        return next(node for node in nodes if node['name'] == name)
+
+    def _generate_report_mock(self):
+        return patch.object(
+            jobs, 'generate_report_result',
+            wraps=jobs.generate_report_result
+        )
+
+    def test_tree_report_is_stored(self):
+        response = self.client.get(self.tree_url)
+        self.assertEqual(response.status_code, 200)
+        report_result = ReportResult.objects.get()
+        self.assertEqual(report_result.status, JobStatus.FINISHED.id)
+        self.assertEqual(
+            self._get_node(report_result.result, 'Keyboard')['count'], 3
+        )
+        self.assertEqual(
+            self._get_node(response.context['result'], 'Keyboard')['count'],
+            3
+        )
+
+    @override_settings(REPORTS_DATA_CHECK_INTERVAL=0)
+    def test_stored_report_is_reused_until_data_changes(self):
+        self.client.get(self.tree_url)
+        with self._generate_report_mock() as generate_mock:
+            response = self.client.get(self.tree_url)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(generate_mock.called)
+
+        DataCenterAssetFactory(model=self.model)
+        with self._generate_report_mock() as generate_mock:
+            response = self.client.get(self.tree_url)
+        self.assertEqual(generate_mock.call_count, 1)
+        self.assertEqual(
+            self._get_node(response.context['result'], 'Keyboard')['count'],
+            4
+        )
+        self.assertEqual(ReportResult.objects.count(), 1)
+
+    @override_settings(REPORTS_DATA_CHECK_INTERVAL=0)
+    def test_report_in_progress_is_not_requeued_when_data_changes(self):
+        self.client.get(self.tree_url)
+        report_result = ReportResult.objects.get()
+        ReportResult.objects.update(status=JobStatus.STARTED.id)
+
+        DataCenterAssetFactory(model=self.model)
+        for url in (self.tree_url, self.tree_url + '&refresh=1'):
+            with self._generate_report_mock() as generate_mock:
+                response = self.client.get(url)
+            self.assertFalse(generate_mock.called)
+        # previous result is served as stale
+        self.assertTrue(response.context['report_result'].is_stale)
+        self.assertEqual(
+            self._get_node(response.context['result'], 'Keyboard')['count'],
+            3
+        )
+        self.assertEqual(
+            ReportResult.objects.get().job_id, report_result.job_id
+        )
+
+        # finished job is requeued, because data changed in the meantime
+        jobs.generate_report_result(report_result.job_id)
+        with self._generate_report_mock() as generate_mock:
+            response = self.client.get(self.tree_url)
+        self.assertEqual(generate_mock.call_count, 1)
+        self.assertFalse(response.context['report_result'].is_stale)
+        self.assertEqual(
+            self._get_node(response.context['result'], 'Keyboard')['count'],
+            4
+        )
+
+    def test_job_started_for_too_long_is_requeued(self):
+        self.client.get(self.tree_url)
+        report_result = ReportResult.objects.get()
+        ReportResult.objects.update(
+            status=JobStatus.STARTED.id,
+            job_started=timezone.now() - timedelta(
+                seconds=settings.REPORTS_JOB_TIMEOUT + 1
+            )
+        )
+        response = self.client.get(self.tree_url + '&status=1')
+        self.assertTrue(json.loads(response.content.decode())['ready'])
+        with self._generate_report_mock() as generate_mock:
+            response = self.client.get(self.tree_url)
+        self.assertEqual(generate_mock.call_count, 1)
+        report_result.refresh_from_db()
+        self.assertEqual(report_result.status, JobStatus.FINISHED.id)
+        self.assertFalse(response.context['report_result'].is_stale)
+
+    def test_data_is_not_checked_when_result_was_checked_recently(self):
+        self.client.get(self.tree_url)
+        with patch.object(
+            CategoryModelReport, 'get_data_version'
+        ) as get_data_version_mock:
+            self.client.get(self.tree_url)
+        self.assertFalse(get_data_version_mock.called)
+
+        ReportResult.objects.update(
+            checked=timezone.now() - timedelta(
+                seconds=settings.REPORTS_DATA_CHECK_INTERVAL + 1
+            )
+        )
+        with self._generate_report_mock() as generate_mock:
+            self.client.get(self.tree_url)
+        self.assertFalse(generate_mock.called)
+        self.assertTrue(ReportResult.objects.get().is_checked_recently)
+
+    def test_previous_csv_is_served_until_new_one_is_generated(self):
+        self.client.get(self.csv_url)
+        report_result = ReportResult.objects.get()
+        ReportResult.objects.update(status=JobStatus.QUEUED.id)
+        response = self.client.get(self.csv_url + '&csv=on')
+        b''.join(response.streaming_content)
+        response.close()
+        self.assertEqual(response.status_code, 200)
+
+        jobs.generate_report_result(report_result.job_id)
+        new_csv = ReportResult.objects.get().csv
+        self.assertNotEqual(new_csv.name, report_result.csv.name)
+        self.assertFalse(new_csv.storage.exists(report_result.csv.name))
+
+    def test_refresh_regenerates_report(self):
+        self.client.get(self.tree_url)
+        job_id = ReportResult.objects.get().job_id
+        with self._generate_report_mock() as generate_mock:
+            self.client.get(self.tree_url + '&refresh=1')
+        self.assertEqual(generate_mock.call_count, 1)
+        self.assertNotEqual(ReportResult.objects.get().job_id, job_id)
+
+    def test_reports_are_stored_per_params(self):
+        self.client.get(self.tree_url)
+        self.client.get(reverse('category_model_report') + '?asset_type=all')
+        self.assertEqual(ReportResult.objects.count(), 2)
+
+    def test_status(self):
+        self.client.get(self.tree_url)
+        response = self.client.get(self.tree_url + '&status=1')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.content.decode()), {
+            'status': 'finished',
+            'processed': 2,
+            'ready': True,
+            'stale': False,
+            'error': '',
+        })
+
+    def test_status_of_not_existing_report(self):
+        response = self.client.get(self.tree_url + '&status=1')
+        self.assertEqual(response.status_code, 404)
+
+    def test_failed_report_is_generated_again(self):
+        with patch.object(
+            CategoryModelReport, 'prepare', side_effect=ValueError('error')
+        ):
+            response = self.client.get(self.tree_url)
+        self.assertEqual(response.status_code, 200)
+        report_result = ReportResult.objects.get()
+        self.assertEqual(report_result.status, JobStatus.FAILED.id)
+        self.assertEqual(report_result.error, 'error')
+
+        self.client.get(self.tree_url)
+        report_result.refresh_from_db()
+        self.assertEqual(report_result.status, JobStatus.FINISHED.id)
+
+    def test_outdated_job_is_skipped(self):
+        self.client.get(self.tree_url)
+        outdated_job_id = ReportResult.objects.get().job_id
+        self.client.get(self.tree_url + '&refresh=1')
+        with patch.object(CategoryModelReport, 'prepare') as prepare_mock:
+            jobs.generate_report_result(outdated_job_id)
+        self.assertFalse(prepare_mock.called)
+        self.assertEqual(
+            ReportResult.objects.get().status, JobStatus.FINISHED.id
+        )
+
+    def test_csv_report_is_same_as_generated_synchronously(self):
+        with override_settings(REPORTS_ASYNC=False):
+            sync_response = self.client.get(self.csv_url + '&csv=on')
+        response = self.client.get(self.csv_url + '&csv=on')
+        self.assertEqual(response.status_code, 200)
+        content = b''.join(response.streaming_content)
+        response.close()
+        self.assertEqual(content, sync_response.content)
+        self.assertEqual(
+            response['Content-Disposition'],
+            'attachment;filename=asset_relations.csv'
+        )
+        self.assertEqual(ReportResult.objects.get().processed, 3)
+
+    def test_stored_csv_report_is_reused(self):
+        self.client.get(self.csv_url)
+        with self._generate_report_mock() as generate_mock:
+            response = self.client.get(self.csv_url + '&csv=on')
+        b''.join(response.streaming_content)
+        response.close()
+        self.assertFalse(generate_mock.called)
@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+from ddt import data, ddt
+from django.test import SimpleTestCase
+
+from ralph.reports.base import ReportContainer
+from ralph.tests.mixins import BenchmarkMixin
+
+
+class ReportContainerTest(SimpleTestCase):
+    def setUp(self):
+        self.report = self._get_report()
+
+    def _get_report(self):
+        report = ReportContainer()
+        model, __ = report.add(name='Keyboard1', parent='Keyboard')
+        report.add(name='new', parent=model, count=2, unique=False)
+        report.add(name='used', parent=model, count=3, unique=False)
+        report.add(name='Mouse1', parent='Mouse', count=4)
+        report.add(name='Mouse2', parent='Mouse', count=1)
+        return report
+
+    def test_get_returns_first_node_with_name(self):
+        model = self.report.get('Keyboard1')
+        self.report.add(name='Keyboard1', parent=model, unique=False)
+        self.assertIs(self.report.get('Keyboard1'), model)
+        self.assertIsNone(self.report.get('Monitor'))
+
+    def test_get_or_create(self):
+        node, created = self.report.get_or_create('Mouse')
+        self.assertFalse(created)
+        self.assertIs(node, self.report.get('Mouse'))
+        node, created = self.report.get_or_create('Monitor')
+        self.assertTrue(created)
+        self.assertIn(node, self.report.roots)
+
+    def test_roots_and_leaves(self):
+        self.assertEqual(
+            [node.name for node in self.report.roots], ['Keyboard', 'Mouse']
+        )
+        self.assertEqual(
+            [node.name for node in self.report.leaves],
+            ['new', 'used', 'Mouse1', 'Mouse2']
+        )
+
+    def test_update_counts(self):
+        self.report.update_counts()
+        self.assertEqual(self.report.to_dict(), [
+            {'name': 'Keyboard', 'count': 5, 'children': [
+                {'name': 'Keyboard1', 'count': 5, 'children': [
+                    {'name': 'new', 'count': 2, 'children': []},
+                    {'name': 'used', 'count': 3, 'children': []},
+                ]},
+            ]},
+            {'name': 'Mouse', 'count': 5, 'children': [
+                {'name': 'Mouse1', 'count': 4, 'children': []},
+                {'name': 'Mouse2', 'count': 1, 'children': []},
+            ]},
+        ])
+
+    def test_update_counts_same_as_update_count_of_leaves(self):
+        other_report = self._get_report()
+        for leaf in other_report.leaves:
+            leaf.update_count()
+        self.report.update_counts()
+        self.assertEqual(self.report.to_dict(), other_report.to_dict())
+
+    def test_uids_are_unique(self):
+        uids = [node.uid for node in self.report]
+        self.assertEqual(len(uids), len(set(uids)))
+
+
+@ddt
+class ReportContainerBenchmarkTest(BenchmarkMixin, SimpleTestCase):
+    # number of models per category
+    models_per_category = 50
+
+    def _fill_report(self, report, nodes):
+        # every model has two (non-unique) status nodes
+        models_count = nodes // 3
+        for i in range(models_count):
+            model, __ = report.add(
+                name='model-{}'.format(i),
+                parent='category-{}'.format(i // self.models_per_category),
+            )
+            report.add(name='new', parent=model, count=1, unique=False)
+            report.add(name='used', parent=model, count=2, unique=False)
+        return models_count
+
+    @data(1000, 10000, 50000)
+    def test_build_and_count_report(self, nodes):
+        report = ReportContainer()
+        with self.benchmark(
+            'build and count report with {} nodes'.format(nodes),
+            operations=nodes
+        ):
+            models_count = self._fill_report(report, nodes)
+            report.update_counts()
+            roots = report.roots
+        self.assertEqual(sum(root.count for root in roots), models_count * 3)
+        self.assertEqual(len(report.leaves), models_count * 2)
@@ -1,6 +1,10 @@
 # -*- coding: utf-8 -*-
 import factory
+import tablib
 from django.core.exceptions import ValidationError
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from ralph.admin.helpers import get_content_type_for_model
@@ -343,6 +347,56 @@ class TestAssetsSupportsReport(RalphTestCase):
             )
 
 
+class TestCSVReportStreaming(ClientMixin, RalphTestCase):
+    def setUp(self):
+        self.login_as_user()
+        self.assets = DataCenterAssetFactory.create_batch(
+            5, force_depreciation=False
+        )
+        for asset in self.assets:
+            asset.tags.add('tag-{}'.format(asset.id))
+        self.url = reverse('asset-relations') + '?asset_type=dc&csv=on'
+
+    def test_csv_is_streamed(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(
+            response['Content-Disposition'],
+            'attachment;filename=asset_relations.csv'
+        )
+        rows = list(AssetRelationsReport().prepare(DataCenterAsset))
+        self.assertEqual(
+            b''.join(response.streaming_content),
+            tablib.Dataset(*rows[1:], headers=rows[0]).csv.encode('utf-8')
+        )
+
+    def test_rows_fetched_in_chunks_keep_ordering(self):
+        rows = list(AssetRelationsReport().prepare(DataCenterAsset))
+        self.assertEqual(len(rows), 6)
+        with override_settings(REPORTS_STREAMING_CHUNK_SIZE=2):
+            # 3 chunks of assets with prefetched tags
+            with self.assertNumQueries(6):
+                chunked_rows = list(
+                    AssetRelationsReport().prepare(DataCenterAsset)
+                )
+        self.assertEqual(chunked_rows, rows)
+
+    def test_chunks_are_fetched_by_keyset_when_ordering_is_not_unique(self):
+        DataCenterAsset.objects.update(
+            modified=self.assets[0].modified, created=self.assets[0].created
+        )
+        with override_settings(REPORTS_STREAMING_CHUNK_SIZE=2):
+            with CaptureQueriesContext(connection) as queries:
+                rows = list(AssetRelationsReport().prepare(DataCenterAsset))
+        self.assertEqual(
+            [row[0] for row in rows[1:]],
+            [str(asset.id) for asset in self.assets]
+        )
+        for query in queries.captured_queries:
+            self.assertNotIn('OFFSET', query['sql'].upper())
+
+
 class TestReportLanguage(RalphTestCase):
 
     def test_clean_metod(self):
@@ -1,24 +1,43 @@
 # -*- coding: utf-8 -*-
+import csv
+import hashlib
 import logging
 
-import tablib
 from django.conf import settings
+from django.contrib.auth import get_user_model
 from django.contrib.contenttypes.models import ContentType
-from django.db.models import Count, Prefetch
-from django.http import HttpResponse
+from django.db.models import Count, Max, Prefetch
+from django.http import (
+    FileResponse,
+    Http404,
+    JsonResponse,
+    StreamingHttpResponse
+)
+from django.shortcuts import get_object_or_404
 from django.urls import reverse
-from django.utils.encoding import smart_str
+from django.utils.encoding import force_bytes, smart_str
 from django.utils.translation import ugettext_lazy as _
+from taggit.models import TaggedItem
 
 from ralph.admin.helpers import getattr_dunder
 from ralph.admin.mixins import RalphTemplateView
-from ralph.assets.models.assets import Asset, AssetModel
+from ralph.api.filters import TRUE_VALUES
+from ralph.api.pagination import (
+    get_keyset_condition,
+    get_keyset_order_by,
+    get_keyset_position
+)
+from ralph.assets.models.assets import Asset, AssetModel, Category, Manufacturer
+from ralph.assets.models.base import BaseObject
 from ralph.assets.models.choices import ObjectModelType
+from ralph.attachments.models import AttachmentItem
 from ralph.back_office.models import BackOfficeAsset
 from ralph.data_center.models.physical import DataCenter, DataCenterAsset
 from ralph.licences.models import BaseObjectLicence, Licence, LicenceUser
-from ralph.operations.models import Failure, OperationType
+from ralph.operations.models import Failure, Operation, OperationType
 from ralph.reports.base import ReportContainer
+from ralph.reports.jobs import get_report_result
+from ralph.reports.models import ReportResult
 from ralph.supports.models import BaseObjectsSupport
 
 logger = logging.getLogger(__name__)
@@ -35,6 +54,48 @@ def get_choice_name(choices_class, key, default='------'):
         return 'Does not exist for key {}'.format(key)
 
 
+def iterate_in_chunks(queryset):
+    """
+    Iterate over queryset fetching objects in chunks of
+    `settings.REPORTS_STREAMING_CHUNK_SIZE`.
+
+    Unlike `QuerySet.iterator`, related objects (`prefetch_related`) are
+    prefetched for every chunk. Ordering of the queryset is kept (pk is added
+    to it to make it unique) and every chunk is fetched using keyset condition
+    (objects after the last one of the previous chunk) instead of `OFFSET`.
+    """
+    chunk_size = settings.REPORTS_STREAMING_CHUNK_SIZE
+    model = queryset.model
+    ordering = []
+    for field in queryset.query.order_by or model._meta.ordering:
+        field_name = field.lstrip('-')
+        if field_name in ('pk', model._meta.pk.name):
+            ordering.append(field.replace(field_name, 'pk'))
+            break
+        ordering.append(field)
+    else:
+        ordering.append('pk')
+    queryset = queryset.order_by(*get_keyset_order_by(ordering))
+    chunk_queryset = queryset
+    while True:
+        chunk = list(chunk_queryset[:chunk_size])
+        yield from chunk
+        if len(chunk) < chunk_size:
+            return
+        chunk_queryset = queryset.filter(get_keyset_condition(
+            ordering, get_keyset_position(ordering, chunk[-1])
+        ))
+
+
+class Echo(object):
+    """
+    File-like object returning written value instead of storing it (used to
+    stream output of `csv.writer`).
+    """
+    def write(self, value):
+        return value
+
+
 class CSVReportMixin(object):
     """CSV report mixin.
 
@@ -44,16 +105,37 @@ class CSVReportMixin(object):
     def get_response(self, request, result):
         """Get django response method.
 
+        Rows are written to the response one by one, while it's streamed.
+
+        Args:
+            request: Django request object
+            result: iterable of rows (first one is a header)
+
+        Returns:
+            Django response object
+        """
+        writer = csv.writer(Echo())
+        response = StreamingHttpResponse(
+            (writer.writerow(row) for row in result),
+            content_type='text/csv;charset=utf-8'
+        )
+        response['Content-Disposition'] = 'attachment;filename={}'.format(
+            self.filename
+        )
+        return response
+
+    def get_stored_response(self, request, report_result):
+        """Get django response with CSV generated in background.
+
         Args:
             request: Django request object
-            result: data list
+            report_result: finished `ReportResult` of the report
 
         Returns:
             Django response object
         """
-        data = tablib.Dataset(*result[1:], headers=result[0])
-        response = HttpResponse(
-            data.csv,
+        response = FileResponse(
+            report_result.csv.open('rb'),
             content_type='text/csv;charset=utf-8'
         )
         response['Content-Disposition'] = 'attachment;filename={}'.format(
@@ -70,6 +152,11 @@ class ReportDetail(RalphTemplateView):
     with_datacenters = False
     with_counter = True
     links = False
+    refresh_query_param = 'refresh'
+    status_query_param = 'status'
+    # models used by the report - result of the report generated in
+    # background is valid until any of them changes
+    data_models = [BaseObject, AssetModel, Category, Manufacturer]
     modes = [
         {
             'name': 'all',
@@ -94,15 +181,41 @@ class ReportDetail(RalphTemplateView):
     def execute(self, model, dc=None):
         self.dc = dc
         self.prepare(model, dc=dc)
-        for item in self.report.leaves:
-            item.update_count()
+        self.report.update_counts()
         return self.report.roots
 
     def prepare(self, model, dc):
         raise NotImplemented()
 
     def is_async(self, request):
-        return False
+        return settings.REPORTS_ASYNC
+
+    def get_result_params(self):
+        return {
+            'slug': self.slug,
+            'asset_type': self.asset_type,
+            'dc': self.dc.id if self.dc else None,
+        }
+
+    def get_result_key(self):
+        return '{slug}:{asset_type}:{dc}'.format(**self.get_result_params())
+
+    def get_data_version(self):
+        """
+        Return fingerprint of data used by the report (number of records
+        and last modification of each of `data_models`).
+        """
+        state = []
+        for model in self.data_models:
+            aggregates = {'count': Count('pk')}
+            fields = {field.name for field in model._meta.concrete_fields}
+            if 'modified' in fields:
+                aggregates['modified'] = Max('modified')
+            state.append((
+                model._meta.label,
+                sorted(model._base_manager.aggregate(**aggregates).items())
+            ))
+        return hashlib.md5(force_bytes(repr(state))).hexdigest()
 
     @property
     def datacenters(self):
@@ -135,7 +248,7 @@ class ReportDetail(RalphTemplateView):
         return [self.template_name]
 
     def get_result(self, request, model, *args, **kwargs):
-        return list(self.prepare(model, *args, **kwargs))
+        return self.prepare(model, *args, **kwargs)
 
     def dispatch(self, request, *args, **kwargs):
         try:
@@ -150,18 +263,26 @@ class ReportDetail(RalphTemplateView):
 
     def get_context_data(self, **kwargs):
         context_data = super().get_context_data(**kwargs)
+        cache_key = (
+            self.asset_type +
+            (str(self.dc.id) if self.dc else 'all') +
+            self.slug
+        )
+        report_result = getattr(self, 'report_result', None)
+        if report_result:
+            # last generated result is rendered (even if it's stale)
+            result = report_result.result if report_result.has_result else []
+            cache_key += '{}{}'.format(
+                report_result.job_id, report_result.status
+            )
+        else:
+            result = self.execute(self.get_model(self.asset_type), self.dc)
         context_data.update({
             'report': self,
             'subsection': self.name,
-            'result': self.execute(
-                self.get_model(self.asset_type),
-                self.dc,
-            ),
-            'cache_key': (
-                self.asset_type +
-                (str(self.dc.id) if self.dc else 'all') +
-                self.slug
-            ),
+            'result': result,
+            'report_result': report_result,
+            'cache_key': cache_key,
             'modes': self.modes,
             'mode': self.asset_type,
             'datacenters': self.datacenters,
@@ -171,11 +292,35 @@ class ReportDetail(RalphTemplateView):
         return context_data
 
     def get(self, request, *args, **kwargs):
+        if self.is_async(request):
+            return self.get_async(request, *args, **kwargs)
         if request.GET.get('csv'):
             model = self.get_model(self.asset_type)
             return self.get_response(request, self.get_result(request, model))
         return super().get(request, *args, **kwargs)
 
+    def get_async(self, request, *args, **kwargs):
+        """
+        Render report generated in background job (see `ralph.reports.jobs`).
+
+        Until the report is generated, page with its progress is rendered
+        (progress could be polled using `status_query_param`).
+        """
+        if self.get_model(self.asset_type) is None:
+            raise Http404
+        if request.GET.get(self.status_query_param):
+            report_result = get_object_or_404(
+                ReportResult, key=self.get_result_key()
+            )
+            return JsonResponse(report_result.to_dict())
+        self.report_result = get_report_result(
+            self,
+            refresh=request.GET.get(self.refresh_query_param) in TRUE_VALUES
+        )
+        if request.GET.get('csv') and self.report_result.csv:
+            return self.get_stored_response(request, self.report_result)
+        return super().get(request, *args, **kwargs)
+
 
 class ReportWithoutAllModeDetail(object):
     """
@@ -320,6 +465,7 @@ class AssetRelationsReport(BaseRelationsReport):
     description = _('Asset list of information about the user, owner, model.')
     filename = 'asset_relations.csv'
     extra_headers = ['tags']
+    data_models = ReportDetail.data_models + [TaggedItem, get_user_model()]
     dc_headers = [
         'id', 'niw', 'barcode', 'sn', 'model__category__name',
         'model__manufacturer__name', 'model__name',
@@ -356,7 +502,9 @@ class AssetRelationsReport(BaseRelationsReport):
             select_related = self.dc_select_related
 
         yield headers + self.extra_headers
-        for asset in queryset.select_related(*select_related):
+        for asset in iterate_in_chunks(
+            queryset.select_related(*select_related)
+        ):
             row = [str(getattr_dunder(asset, column)) for column in headers]
             row += self.get_extra_columns(asset)
             yield row
@@ -379,6 +527,9 @@ class AssetSupportsReport(BaseRelationsReport):
     description = _('Assets with assigned supports')
     filename = 'asset_supports.csv'
     extra_headers = ['supprt_price_per_object', 'attachments']
+    data_models = ReportDetail.data_models + [
+        BaseObjectsSupport, AttachmentItem
+    ]
     # TODO(mkurek): allow for fields aliases in headers (ex. use tuple with
     # (field_name, header_name))
     # TODO(mkurek): unify these reports
@@ -438,7 +589,9 @@ class AssetSupportsReport(BaseRelationsReport):
             )
 
         yield headers + self.extra_headers
-        for bos in queryset.select_related(*select_related):
+        for bos in iterate_in_chunks(
+            queryset.select_related(*select_related)
+        ):
             row = [str(getattr_dunder(bos, column)) for column in headers]
             row += self.get_extra_columns(bos)
             yield row
@@ -483,6 +636,9 @@ class LicenceRelationsReport(BaseRelationsReport):
     name = _('Licence - relations')
     filename = 'licence_relations.csv'
     description = _('List of licenses assigned to assets and users.')
+    data_models = ReportDetail.data_models + [
+        BaseObjectLicence, LicenceUser, get_user_model()
+    ]
 
     licences_headers = [
         'niw', 'software', 'number_bought', 'price__amount', 'price__currency',
@@ -548,7 +704,7 @@ class LicenceRelationsReport(BaseRelationsReport):
             )
         )
 
-        for licence in queryset:
+        for licence in iterate_in_chunks(queryset):
             row = [
                 smart_str(getattr_dunder(licence, column))
                 for column in self.licences_headers
@@ -587,6 +743,9 @@ class FailureReport(ReportWithoutAllModeDetail, ReportDetail):
     with_datacenters = True
     name = _('Failures')
     description = _('Failure types for each manufacturer.')
+    data_models = ReportDetail.data_models + [
+        Operation, Failure.base_objects.through, OperationType
+    ]
 
     def prepare(self, model, dc=None):
         queryset = model._default_manager
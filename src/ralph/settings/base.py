@@ -306,7 +306,7 @@ REST_FRAMEWORK = {
         'rest_framework.parsers.MultiPartParser',
         'rest_framework_xml.parsers.XMLParser',
     ),
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.LimitOffsetPagination',  # noqa
+    'DEFAULT_PAGINATION_CLASS': 'ralph.api.pagination.RalphPagination',
     'PAGE_SIZE': 10,
     'DEFAULT_METADATA_CLASS': 'ralph.lib.api.utils.RalphApiMetadata',
     'DEFAULT_VERSIONING_CLASS': 'rest_framework.versioning.AcceptHeaderVersioning',  # noqa
@@ -315,6 +315,10 @@ REST_FRAMEWORK = {
     'EXCEPTION_HANDLER': 'ralph.lib.api.exception_handler.validation_error_exception_handler',  # noqa
 }
 
+# number of objects fetched and serialized at once when streaming API list
+# response (`?_stream=1`)
+API_STREAMING_CHUNK_SIZE = int(os.environ.get('API_STREAMING_CHUNK_SIZE', 500))
+
 API_THROTTLING = bool_from_env('API_THROTTLING', default=False)
 if API_THROTTLING:
     REST_FRAMEWORK.update({
@@ -385,6 +389,16 @@ else:
 # set to False to turn off cache decorator
 USE_CACHE = bool_from_env('USE_CACHE', True)
 
+# cache of fields allowed for users with the same permissions, shared between
+# requests (see ralph.lib.permissions.cache); turned off with USE_CACHE
+PERMISSIONS_CACHE_ALIAS = os.environ.get('PERMISSIONS_CACHE_ALIAS', 'default')
+PERMISSIONS_CACHE_TIMEOUT = int(
+    os.environ.get('PERMISSIONS_CACHE_TIMEOUT', 60 * 60)
+)
+PERMISSIONS_LOCAL_CACHE_SIZE = int(
+    os.environ.get('PERMISSIONS_LOCAL_CACHE_SIZE', 1000)
+)
+
 SENTRY_ENABLED = bool_from_env('SENTRY_ENABLED')
 
 BACK_OFFICE_ASSET_AUTO_ASSIGN_HOSTNAME = bool_from_env(
@@ -397,11 +411,16 @@ BACKOFFICE_HOSTNAME_FIELD_READONLY = bool_from_env(
 
 TAGGIT_CASE_INSENSITIVE = True  # case insensitive tags
 
+# time (in seconds) after which job generating report is treated as dead
+REPORTS_JOB_TIMEOUT = int(os.environ.get('REPORTS_JOB_TIMEOUT', 3600))
 RALPH_QUEUES = {
     'ralph_ext_pdf': {},
     'ralph_async_transitions': {
         'DEFAULT_TIMEOUT': 3600,
     },
+    'ralph_async_reports': {
+        'DEFAULT_TIMEOUT': REPORTS_JOB_TIMEOUT,
+    },
 }
 for queue_name, options in RALPH_QUEUES.items():
     RQ_QUEUES[queue_name] = ChainMap(RQ_QUEUES['default'], options)
@@ -421,6 +440,19 @@ RALPH_INTERNAL_SERVICES = {
     }
 }
 
+# generate reports in background jobs (on `ralph_async_reports` queue) and
+# store their results until data used by the report changes
+REPORTS_ASYNC = bool_from_env('REPORTS_ASYNC', False)
+# minimal time (in seconds) between checks if data used by stored report
+# changed (every check aggregates all tables used by the report)
+REPORTS_DATA_CHECK_INTERVAL = int(
+    os.environ.get('REPORTS_DATA_CHECK_INTERVAL', 900)
+)
+# number of objects fetched at once when CSV report is generated
+REPORTS_STREAMING_CHUNK_SIZE = int(
+    os.environ.get('REPORTS_STREAMING_CHUNK_SIZE', 1000)
+)
+
 # =============================================================================
 # DC view
 # =============================================================================
@@ -432,6 +464,16 @@ RACK_LISTING_NUMBERING_TOP_TO_BOTTOM = False
 # =============================================================================
 
 DEPLOYMENT_MAX_DNS_ENTRIES_TO_CLEAN = 30
+# number of compiled preboot configuration templates kept in memory (per
+# process)
+DEPLOYMENT_TEMPLATES_CACHE_SIZE = int(
+    os.environ.get('DEPLOYMENT_TEMPLATES_CACHE_SIZE', 128)
+)
+# how long (in seconds) IP -> deployment and deployment -> preboot lookups
+# of PXE endpoints are cached
+DEPLOYMENT_CACHE_TIMEOUT = int(
+    os.environ.get('DEPLOYMENT_CACHE_TIMEOUT', 60)
+)
 
 # =============================================================================
 
@@ -537,6 +579,17 @@ DEFAULT_NETWORK_MARGIN = int(os.environ.get('DEFAULT_NETWORK_MARGIN', 10))
 # when set to True, network records (IP/Ethernet) can't be modified until
 # 'expose in DHCP' is selected
 DHCP_ENTRY_FORBID_CHANGE = bool_from_env('DHCP_ENTRY_FORBID_CHANGE', True)
+# rendered DHCP entries are cached per network (see ralph.dhcp.fragments);
+# turned off with USE_CACHE
+DHCP_CACHE_ALIAS = os.environ.get('DHCP_CACHE_ALIAS', 'default')
+DHCP_FRAGMENTS_CACHE_TIMEOUT = int(
+    os.environ.get('DHCP_FRAGMENTS_CACHE_TIMEOUT', 24 * 60 * 60)
+)
+# number of DHCP entries fetched from the database at once when config is
+# streamed (`_stream` query param)
+DHCP_STREAMING_CHUNK_SIZE = int(
+    os.environ.get('DHCP_STREAMING_CHUNK_SIZE', 1000)
+)
 
 # disable integration with DNSaaS as it's no longer supported
 # https://github.com/allegro/django-powerdns-dnssec
@@ -545,6 +598,16 @@ ENABLE_DNSAAS_INTEGRATION = False
 DNSAAS_URL = os.environ.get('DNSAAS_URL', '')
 DNSAAS_TOKEN = os.environ.get('DNSAAS_TOKEN', '')
 DNSAAS_TIMEOUT = os.environ.get('DNSAAS_TIMEOUT', 10)
+# number of threads fetching pages of DNSaaS API results concurrently
+DNSAAS_PAGE_WORKERS = int(os.environ.get('DNSAAS_PAGE_WORKERS', 4))
+# number of free IPs checked in DNSaaS at once when looking for free IP and
+# time (in seconds) for which IPs not found in DNSaaS are not checked again
+DNSAAS_FREE_IPS_CHECK_WINDOW = int(
+    os.environ.get('DNSAAS_FREE_IPS_CHECK_WINDOW', 16)
+)
+DNSAAS_NOT_FOUND_CACHE_TIMEOUT = int(
+    os.environ.get('DNSAAS_NOT_FOUND_CACHE_TIMEOUT', 60)
+)
 DNSAAS_AUTO_PTR_ALWAYS = os.environ.get('DNSAAS_AUTO_PTR_ALWAYS', 2)
 DNSAAS_AUTO_PTR_NEVER = os.environ.get('DNSAAS_AUTO_PTR_NEVER', 1)
 # user in dnsaas which can do changes, like update TXT records etc.
@@ -683,6 +746,11 @@ RALPH_HOST_URL = os.environ.get('RALPH_HOST_URL', None)
 COLLECT_METRICS = False
 ALLOW_PUSH_GRAPHS_DATA_TO_STATSD = False
 STATSD_GRAPHS_PREFIX = 'ralph.graphs'
+# number of graphs computed concurrently by `push_graphs_to_statsd` command
+STATSD_GRAPHS_WORKERS = int(os.environ.get('STATSD_GRAPHS_WORKERS', 4))
+# precomputed data of graph (see `refresh_graphs_data` command) older than
+# this (in seconds) is computed again when graph is rendered
+GRAPH_DATA_MAX_AGE = int(os.environ.get('GRAPH_DATA_MAX_AGE', 15 * 60))
 
 ENABLE_REQUESTS_AND_QUERIES_METRICS = True
 LARGE_NUMBER_OF_QUERIES_THRESHOLD = 25
@@ -712,3 +780,9 @@ ASSET_BUYOUT_CATEGORY_TO_MONTHS = json.loads(os.environ.get(
 )
 
 DATA_UPLOAD_MAX_NUMBER_FIELDS = 3000
+
+# Number of polymorphic descendant models (ex. BaseObject descendants) which
+# objects are fetched together, in a single query, when listing polymorphic
+# objects. Set to 1 to fetch objects of every descendant model separately.
+# Queries are split further when they would join too many tables.
+POLYMORPHIC_MODELS_PER_QUERY = int(os.environ.get('POLYMORPHIC_MODELS_PER_QUERY', 10))  # noqa
@@ -46,6 +46,7 @@ URLCONF_MODULES = ['ralph.urls.base', ROOT_URLCONF]
 
 RQ_QUEUES['ralph_job_test'] = dict(ASYNC=False, **REDIS_CONNECTION)
 RQ_QUEUES['ralph_async_transitions']['ASYNC'] = False
+RQ_QUEUES['ralph_async_reports']['ASYNC'] = False
 RALPH_INTERNAL_SERVICES.update({
     'JOB_TEST': {
         'queue_name': 'ralph_job_test',
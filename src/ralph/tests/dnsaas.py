@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+import json
+import math
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+from unittest.mock import patch
+from urllib.parse import parse_qs, urlsplit
+
+from django.test import override_settings
+
+from ralph.dns.dnsaas import DNSaaS
+
+
+class FakeDNSaaSHandler(BaseHTTPRequestHandler):
+    """
+    Paginated records endpoint (filtered by `ip` and `type`) responding with
+    a latency.
+    """
+    def do_GET(self):
+        server = self.server
+        time.sleep(server.latency)
+        query = parse_qs(urlsplit(self.path).query)
+        server.requests.append(query)
+        page = int(query.get('page', ['0'])[0])
+        if (
+            page > 0 and
+            self.headers['Authorization'] == 'Bearer {}'.format(
+                server.rejected_token
+            )
+        ):
+            self._respond(401, {})
+            return
+        records = [
+            record for record in server.records
+            if all(
+                record.get(field) in query[param]
+                for param, field in [('ip', 'content'), ('type', 'type')]
+                if param in query
+            )
+        ]
+        pages = max(1, math.ceil(len(records) / server.page_size))
+        self._respond(200, {
+            'content': records[
+                page * server.page_size:(page + 1) * server.page_size
+            ],
+            'last': page >= pages - 1,
+            'totalPages': pages,
+        })
+
+    def _respond(self, status_code, data):
+        content = json.dumps(data).encode()
+        self.send_response(status_code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, *args):
+        pass
+
+
+class FakeDNSaaSServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+    page_size = 10
+    latency = 0.05
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), FakeDNSaaSHandler)
+        self.reset()
+
+    def reset(self):
+        self.records = []
+        self.requests = []
+        self.rejected_token = None
+
+    @property
+    def url(self):
+        return 'http://{}:{}/'.format(*self.server_address)
+
+
+class FakeDNSaaSMixin(object):
+    """
+    Run fake DNSaaS server for the test case and point DNSaaS client to it.
+
+    Tokens fetched by the client are collected in `self.tokens`.
+    """
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = FakeDNSaaSServer()
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        super().setUp()
+        self.server.reset()
+        self.tokens = []
+        patcher = patch.object(
+            DNSaaS, '_get_oauth_token', autospec=True,
+            side_effect=self._get_oauth_token
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        settings_override = override_settings(DNSAAS_URL=self.server.url)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def _get_oauth_token(self, dnsaas):
+        dnsaas.token_expiration = datetime.now() + timedelta(hours=1)
+        self.tokens.append('token{}'.format(len(self.tokens) + 1))
+        return self.tokens[-1]
@@ -1,5 +1,8 @@
 # -*- coding: utf-8 -*-
+import logging
 import sys
+import time
+from contextlib import contextmanager
 from importlib import import_module, reload
 from django.conf import settings
 from django.urls import clear_url_caches
@@ -40,3 +43,32 @@ class ReloadUrlsMixin(object):
             if urlconf in sys.modules:
                 reload(sys.modules[urlconf])
                 import_module(urlconf)
+
+
+class BenchmarkMixin(object):
+    """
+    Use this mixin to measure how long some piece of code takes in tests.
+
+    Results are logged to `ralph.tests.benchmark` logger (enable it in
+    test settings to see them) and returned in dict, ex.:
+
+    >>> with self.benchmark('allocate IPs', operations=100) as result:
+    ...     allocate_ips(100)
+    >>> result['per_second']
+    """
+    benchmark_logger = logging.getLogger('ralph.tests.benchmark')
+
+    @contextmanager
+    def benchmark(self, name, operations=1):
+        result = {}
+        start = time.perf_counter()
+        yield result
+        elapsed = time.perf_counter() - start
+        result['elapsed'] = elapsed
+        result['per_operation'] = elapsed / operations
+        result['per_second'] = operations / elapsed if elapsed else 0
+        self.benchmark_logger.info(
+            '%s: %d operation(s) in %.3fs (%.6fs each, %.1f/s)',
+            name, operations, elapsed, result['per_operation'],
+            result['per_second']
+        )